@@ -0,0 +1,128 @@
+"""
+Rotas de eventos em tempo real (Server-Sent Events)
+
+O dashboard abre um único EventSource e recebe:
+- leaderboard: delta do top-N (entradas que mudaram e user_ids que saíram)
+- rank: a entrada do próprio usuário no ranking, quando muda
+- user: XP, nível e moedas do usuário depois de add-xp
+
+A fila de cada conexão é coalescente (ver app.services.event_bus) e o
+stream espera SSE_MIN_INTERVAL entre envios, então rajadas de mudanças
+chegam como uma única atualização em menos de um segundo.
+"""
+
+import asyncio
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import orjson
+from fastapi import APIRouter, Query
+from fastapi.responses import StreamingResponse
+
+from app.services.event_bus import LEADERBOARD_TOPIC, event_bus, user_topic
+from app.services.leaderboard import leaderboard
+
+router = APIRouter(prefix="/api", tags=["events"])
+
+# Comentário enviado a conexões paradas para manter proxies abertos
+SSE_HEARTBEAT = float(os.getenv("SSE_HEARTBEAT", "15"))
+# Intervalo mínimo entre envios (junta rajadas numa atualização só)
+SSE_MIN_INTERVAL = float(os.getenv("SSE_MIN_INTERVAL", "0.25"))
+SSE_RETRY_MS = 3000
+
+# limit -> (versão do leaderboard, top-N serializado); compartilhado entre
+# todas as conexões, então cada mudança calcula o top uma vez por limit
+_top_cache: Dict[int, Tuple[int, List[Dict[str, Any]]]] = {}
+
+
+def _format(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+def _top(limit: int) -> List[Dict[str, Any]]:
+    cached = _top_cache.get(limit)
+    if cached is not None and cached[0] == leaderboard.version:
+        return cached[1]
+    entries = [entry.model_dump(mode="json") for entry in leaderboard.top(limit)]
+    _top_cache[limit] = (leaderboard.version, entries)
+    return entries
+
+
+class _ClientState:
+    """O que já foi enviado a uma conexão (para mandar só o delta)"""
+
+    def __init__(self, user_id: str, limit: int):
+        self.user_id = user_id
+        self.limit = limit
+        self.version = -1
+        self.top: Dict[str, Dict[str, Any]] = {}
+        self.rank: Optional[Dict[str, Any]] = None
+
+    def leaderboard_events(self) -> List[bytes]:
+        if leaderboard.version == self.version:
+            return []
+        full = self.version < 0
+        self.version = leaderboard.version
+        messages = []
+
+        top = _top(self.limit)
+        current = {entry["user_id"]: entry for entry in top}
+        changed = [entry for entry in top if self.top.get(entry["user_id"]) != entry]
+        removed = [user_id for user_id in self.top if user_id not in current]
+        if full or changed or removed:
+            messages.append(_format("leaderboard", {
+                "version": self.version, "full": full,
+                "changed": changed, "removed": removed,
+            }))
+        self.top = current
+
+        entry = leaderboard.entry(self.user_id)
+        rank = entry.model_dump(mode="json") if entry else None
+        if full or rank != self.rank:
+            messages.append(_format("rank", rank))
+        self.rank = rank
+        return messages
+
+
+async def _stream(user_id: str, limit: int) -> AsyncIterator[bytes]:
+    subscription = event_bus.subscribe(LEADERBOARD_TOPIC, user_topic(user_id))
+    state = _ClientState(user_id, limit)
+    try:
+        yield f"retry: {SSE_RETRY_MS}\n\n".encode()
+        for message in state.leaderboard_events():
+            yield message
+
+        while True:
+            events = await subscription.get(timeout=SSE_HEARTBEAT)
+            if not events:
+                yield b": ping\n\n"
+                continue
+            for event, data in events:
+                if event == "leaderboard":
+                    for message in state.leaderboard_events():
+                        yield message
+                else:
+                    yield _format(event, data)
+            await asyncio.sleep(SSE_MIN_INTERVAL)
+    finally:
+        event_bus.unsubscribe(subscription)
+
+
+@router.get("/events/{user_id}")
+async def stream_events(user_id: str, limit: int = Query(10, ge=1, le=100)):
+    """
+    Stream (text/event-stream) de mudanças no ranking e no perfil do usuário
+
+    **Parâmetros:**
+    - user_id: ID do usuário
+    - limit: Tamanho do top do leaderboard acompanhado (padrão: 10)
+
+    **Retorna:**
+    - Eventos SSE: leaderboard (delta do top), rank (entrada do usuário)
+      e user (xp, level, coins). O primeiro leaderboard traz full=true.
+    """
+    return StreamingResponse(
+        _stream(user_id, limit),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -2,89 +2,193 @@
 Rotas da API para lições e missões
 """
 
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Depends, Query, Request, Response
+from typing import FrozenSet, List, Literal, Optional, Tuple, Type, Union
 from datetime import datetime
 
+from pydantic import BaseModel
+
+from app.core.resilience import UpstreamUnavailable
+from app.core.response_cache import response_cache, serialize
+from app.core.responses import TrustedJSONResponse
 from app.models.lesson import (
-    Lesson, Mission, UserProgress, ProgressUpdate, LeaderboardEntry
+    Lesson, LessonSummary, Mission, MissionSummary, UserProgress, ProgressUpdate,
+    ProgressBatch, ProgressBatchResult, ProgressItemResult, UnlockedLessons,
+    LeaderboardEntry, GradeRequest, GradeResult, DashboardBootstrap
 )
+from app.services.dax_grader import dax_grader
+from app.services.leaderboard import leaderboard
 from app.services.lesson_service import lesson_service
+from app.services.prerequisite_graph import ids_of
+from app.services.progress_service import progress_service
+from app.services.user_service import user_service
 
 router = APIRouter(prefix="/api", tags=["lessons"])
 
+# Conteúdo do catálogo só muda quando o LessonService recarrega
+lesson_service.add_reload_listener(response_cache.invalidate)
+lesson_service.add_reload_listener(dax_grader.clear)
+
+View = Literal["full", "summary"]
+ProgressFormat = Literal["list", "bitmap"]
+
+
+def _parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[FrozenSet[str]]:
+    """Converte 'id,title,xp' em conjunto de campos, validando contra o modelo"""
+    if not fields:
+        return None
+    requested = frozenset(f.strip() for f in fields.split(",") if f.strip())
+    unknown = requested - model.model_fields.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos inválidos: {', '.join(sorted(unknown))}"
+        )
+    return requested
+
+
+def _project(obj, include: Optional[FrozenSet[str]]):
+    """Aplica a projeção de campos (se houver) a um modelo ou lista"""
+    if include is None:
+        return obj
+    if isinstance(obj, list):
+        return [item.model_dump(mode="json", include=include) for item in obj]
+    return obj.model_dump(mode="json", include=include)
+
 
 # ============================================
 # ROTAS DE MISSÕES
 # ============================================
 
-@router.get("/missions", response_model=List[Mission])
-async def get_all_missions():
+@router.get("/missions", response_model=Union[List[Mission], List[MissionSummary]])
+async def get_all_missions(
+    request: Request, view: View = "full", fields: Optional[str] = None
+):
     """
     Retorna todas as missões disponíveis
     
+    **Parâmetros:**
+    - view: 'full' (padrão) ou 'summary' para o resumo leve
+    - fields: lista de campos separados por vírgula (ex: 'id,name,icon')
+    
     **Retorna:**
     - Lista de missões ordenadas por ordem de progressão
     """
-    missions = lesson_service.get_all_missions()
-    return missions
+    summary = view == "summary"
+    include = _parse_fields(fields, MissionSummary if summary else Mission)
+    loader = (
+        lesson_service.get_all_mission_summaries if summary
+        else lesson_service.get_all_missions
+    )
+    return await response_cache.respond(
+        request, "missions", (view, include), lambda: _project(loader(), include)
+    )
 
 
-@router.get("/missions/{mission_id}", response_model=Mission)
-async def get_mission(mission_id: str):
+@router.get("/missions/{mission_id}", response_model=Union[Mission, MissionSummary])
+async def get_mission(
+    mission_id: str, request: Request, view: View = "full", fields: Optional[str] = None
+):
     """
     Retorna uma missão específica
     
     **Parâmetros:**
     - mission_id: ID da missão (ex: 'dax-basics')
+    - view: 'full' (padrão) ou 'summary'
+    - fields: lista de campos separados por vírgula
     
     **Retorna:**
     - Dados completos da missão
     """
-    mission = lesson_service.get_mission(mission_id)
-    if not mission:
-        raise HTTPException(status_code=404, detail="Missão não encontrada")
-    return mission
+    summary = view == "summary"
+    include = _parse_fields(fields, MissionSummary if summary else Mission)
+    
+    def load():
+        if summary:
+            mission = lesson_service.get_mission_summary(mission_id)
+        else:
+            mission = lesson_service.get_mission(mission_id)
+        if not mission:
+            raise HTTPException(status_code=404, detail="Missão não encontrada")
+        return _project(mission, include)
+    
+    return await response_cache.respond(
+        request, "mission", (mission_id, view, include), load
+    )
 
 
-@router.get("/missions/{mission_id}/lessons", response_model=List[Lesson])
-async def get_mission_lessons(mission_id: str):
+@router.get(
+    "/missions/{mission_id}/lessons",
+    response_model=Union[List[Lesson], List[LessonSummary]]
+)
+async def get_mission_lessons(
+    mission_id: str, request: Request, view: View = "full", fields: Optional[str] = None
+):
     """
     Retorna todas as lições de uma missão
     
     **Parâmetros:**
     - mission_id: ID da missão
+    - view: 'full' (padrão) ou 'summary' (sem teoria e exercícios, ideal
+      para a trilha de lições)
+    - fields: lista de campos separados por vírgula (ex: 'id,title,icon,xp')
     
     **Retorna:**
     - Lista de lições da missão, ordenadas
     """
-    mission = lesson_service.get_mission(mission_id)
-    if not mission:
-        raise HTTPException(status_code=404, detail="Missão não encontrada")
+    summary = view == "summary"
+    include = _parse_fields(fields, LessonSummary if summary else Lesson)
+    
+    async def load():
+        if not lesson_service.get_mission(mission_id):
+            raise HTTPException(status_code=404, detail="Missão não encontrada")
+        if summary:
+            lessons = lesson_service.get_lesson_summaries_by_mission(mission_id)
+        else:
+            lessons = await lesson_service.get_lessons_by_mission(mission_id)
+        return _project(lessons, include)
     
-    lessons = lesson_service.get_lessons_by_mission(mission_id)
-    return lessons
+    return await response_cache.respond(
+        request, "mission_lessons", (mission_id, view, include), load
+    )
 
 
 # ============================================
 # ROTAS DE LIÇÕES
 # ============================================
 
-@router.get("/lessons/{lesson_id}", response_model=Lesson)
-async def get_lesson(lesson_id: int):
+@router.get("/lessons/{lesson_id}", response_model=Union[Lesson, LessonSummary])
+async def get_lesson(
+    lesson_id: int, request: Request, view: View = "full", fields: Optional[str] = None
+):
     """
     Retorna uma lição específica com todo o conteúdo
     
     **Parâmetros:**
     - lesson_id: ID numérico da lição
+    - view: 'full' (padrão) ou 'summary'
+    - fields: lista de campos separados por vírgula
     
     **Retorna:**
     - Dados completos da lição incluindo teoria e exercícios
     """
-    lesson = lesson_service.get_lesson(lesson_id)
-    if not lesson:
-        raise HTTPException(status_code=404, detail="Lição não encontrada")
-    return lesson
+    summary = view == "summary"
+    include = _parse_fields(fields, LessonSummary if summary else Lesson)
+    
+    async def load():
+        if summary:
+            lesson = lesson_service.get_lesson_summary(lesson_id)
+        else:
+            lesson = await lesson_service.get_lesson(lesson_id)
+        if not lesson:
+            raise HTTPException(status_code=404, detail="Lição não encontrada")
+        return _project(lesson, include)
+    
+    return await response_cache.respond(
+        request, "lesson", (lesson_id, view, include), load
+    )
 
 
 @router.get("/lessons/{lesson_id}/next", response_model=Lesson)
@@ -99,43 +203,165 @@ async def get_next_lesson(lesson_id: int, mission_id: str):
     **Retorna:**
     - Próxima lição ou 404 se for a última
     """
-    next_lesson = lesson_service.get_next_lesson(lesson_id, mission_id)
+    next_lesson = await lesson_service.get_next_lesson(lesson_id, mission_id)
     if not next_lesson:
         raise HTTPException(
             status_code=404, 
             detail="Não há próxima lição (você completou a missão!)"
         )
-    return next_lesson
+    return TrustedJSONResponse(next_lesson)
+
+
+@router.get("/lessons/{lesson_id}/previous", response_model=Lesson)
+async def get_previous_lesson(lesson_id: int, mission_id: str):
+    """
+    Retorna a lição anterior da sequência
+
+    **Parâmetros:**
+    - lesson_id: ID da lição atual
+    - mission_id: ID da missão
+
+    **Retorna:**
+    - Lição anterior ou 404 se for a primeira
+    """
+    previous_lesson = await lesson_service.get_previous_lesson(lesson_id, mission_id)
+    if not previous_lesson:
+        raise HTTPException(
+            status_code=404,
+            detail="Não há lição anterior (esta é a primeira da missão)"
+        )
+    return TrustedJSONResponse(previous_lesson)
+
+
+@router.post(
+    "/lessons/{lesson_id}/exercises/{exercise_index}/grade",
+    response_model=GradeResult
+)
+async def grade_exercise(lesson_id: int, exercise_index: int, submission: GradeRequest):
+    """
+    Corrige a resposta de um exercício de código no servidor
+    
+    **Parâmetros:**
+    - lesson_id: ID da lição
+    - exercise_index: Posição do exercício na lição (começa em 0)
+    
+    **Body:**
+    - answer: Fórmula DAX escrita pelo aluno
+    
+    **Retorna:**
+    - Se a resposta está correta (ignorando espaços, caixa, aspas e
+      separadores equivalentes) e o XP do exercício
+    """
+    lesson = await lesson_service.get_lesson(lesson_id)
+    if not lesson:
+        raise HTTPException(status_code=404, detail="Lição não encontrada")
+    if not 0 <= exercise_index < len(lesson.exercises):
+        raise HTTPException(status_code=404, detail="Exercício não encontrado")
+    
+    exercise = lesson.exercises[exercise_index]
+    if not exercise.solution:
+        raise HTTPException(
+            status_code=400,
+            detail="Este exercício não é corrigido por código"
+        )
+    
+    outcome = dax_grader.grade(lesson_id, exercise_index, exercise, submission.answer)
+    return GradeResult(
+        correct=outcome.correct,
+        xp_reward=exercise.xp_reward if outcome.correct else 0,
+        explanation=exercise.explanation if outcome.correct else None,
+        syntax_error=outcome.syntax_error
+    )
 
 
 # ============================================
 # ROTAS DE PROGRESSO
 # ============================================
 
-@router.get("/progress/{user_id}", response_model=UserProgress)
-async def get_user_progress(user_id: str, mission_id: str = "dax-basics"):
+def _validate_progress(progress: ProgressUpdate) -> Optional[Tuple[int, str]]:
+    """Valida lição e XP pelo índice do catálogo; retorna (status, erro) ou None"""
+    lesson = lesson_service.get_lesson_summary(progress.lesson_id)
+    if not lesson:
+        return 404, "Lição não encontrada"
+    if progress.xp_earned > lesson.xp:
+        return 400, "XP ganho não pode ser maior que XP da lição"
+    return None
+
+
+def _mission_progress(user_id: str, mission_id: str, completed: int) -> UserProgress:
+    """Monta o UserProgress de uma missão a partir do bitset de completadas"""
+    graph = lesson_service.prerequisites
+    completed &= graph.mission_mask(mission_id)
+    available = graph.unlocked(completed, mission_id) & ~completed
+    mission_lessons = lesson_service.get_lesson_summaries_by_mission(mission_id)
+    # Missão completa: fica na última lição; missão ainda sem lições: 1
+    current_lesson = next(
+        (l.id for l in mission_lessons if available >> l.id & 1),
+        mission_lessons[-1].id if mission_lessons else 1
+    )
+    
+    return UserProgress(
+        user_id=user_id,
+        mission_id=mission_id,
+        completed_lessons=list(ids_of(completed)),
+        current_lesson=current_lesson,
+        total_xp=sum(l.xp for l in mission_lessons if completed >> l.id & 1),
+        streak_days=1,
+        last_activity=datetime.now().isoformat()
+    )
+
+
+@router.get("/progress/{user_id}", response_model=UserProgress, response_model_exclude_none=True)
+async def get_user_progress(
+    user_id: str, mission_id: str = "dax-basics", format: ProgressFormat = "list"
+):
     """
     Retorna o progresso do usuário em uma missão
     
     **Parâmetros:**
     - user_id: ID do usuário
     - mission_id: ID da missão (padrão: 'dax-basics')
+    - format: 'list' (padrão) ou 'bitmap' para receber as lições
+      completadas em completed_bitmap (tamanho constante) em vez da lista
     
     **Retorna:**
     - Progresso completo do usuário
+    """
+    if not lesson_service.get_mission(mission_id):
+        raise HTTPException(status_code=404, detail="Missão não encontrada")
     
-    **TODO:** Integrar com banco de dados real (Supabase)
+    completed = await progress_service.completed_mask(user_id)
+    progress = _mission_progress(user_id, mission_id, completed)
+    return progress.as_bitmap() if format == "bitmap" else progress
+
+
+@router.get("/progress/{user_id}/unlocked", response_model=UnlockedLessons)
+async def get_unlocked_lessons(user_id: str, mission_id: Optional[str] = None):
     """
-    # Por enquanto retorna dados mockados
-    # Em produção, buscar do Supabase
-    return UserProgress(
+    Retorna as lições liberadas para o usuário
+    
+    **Parâmetros:**
+    - user_id: ID do usuário
+    - mission_id: Restringe a uma missão (opcional; padrão: todas)
+    
+    **Retorna:**
+    - completed, unlocked (pré-requisitos cumpridos) e available
+      (liberadas e ainda não completadas)
+    """
+    graph = lesson_service.prerequisites
+    if mission_id is not None and not lesson_service.get_mission(mission_id):
+        raise HTTPException(status_code=404, detail="Missão não encontrada")
+    
+    completed = await progress_service.completed_mask(user_id)
+    unlocked = graph.unlocked(completed, mission_id)
+    completed &= graph.mission_mask(mission_id)
+    
+    return UnlockedLessons(
         user_id=user_id,
         mission_id=mission_id,
-        completed_lessons=[],
-        current_lesson=1,
-        total_xp=0,
-        streak_days=1,
-        last_activity=datetime.now().isoformat()
+        completed=list(ids_of(completed)),
+        unlocked=list(ids_of(unlocked)),
+        available=list(ids_of(unlocked & ~completed))
     )
 
 
@@ -154,28 +380,15 @@ async def save_progress(progress: ProgressUpdate):
     **Retorna:**
     - Confirmação e progresso atualizado
     
-    **TODO:** Persistir no Supabase
+    A gravação é adiada: o progresso vai para o journal local e é
+    enviado ao Supabase em lote (ver ProgressJournal).
     """
-    # Validar lição existe
-    lesson = lesson_service.get_lesson(progress.lesson_id)
-    if not lesson:
-        raise HTTPException(status_code=404, detail="Lição não encontrada")
-    
-    # Validar XP corresponde
-    if progress.xp_earned > lesson.xp:
-        raise HTTPException(
-            status_code=400, 
-            detail="XP ganho não pode ser maior que XP da lição"
-        )
+    error = _validate_progress(progress)
+    if error:
+        raise HTTPException(status_code=error[0], detail=error[1])
     
-    # TODO: Salvar no Supabase
-    # supabase_client.table('user_progress').upsert({
-    #     'user_id': progress.user_id,
-    #     'lesson_id': progress.lesson_id,
-    #     'completed': progress.completed,
-    #     'xp_earned': progress.xp_earned,
-    #     'completed_at': datetime.now()
-    # })
+    # Journal local + flush em lote para user_progress
+    await progress_service.record(progress)
     
     return {
         "success": True,
@@ -185,6 +398,57 @@ async def save_progress(progress: ProgressUpdate):
     }
 
 
+@router.post("/progress/batch", response_model=ProgressBatchResult)
+async def save_progress_batch(batch: ProgressBatch):
+    """
+    Salva várias atualizações de progresso numa única requisição
+    
+    Pensado para clientes que ficaram offline (ou tablets de sala de aula)
+    e acumularam lições completadas.
+    
+    **Body:**
+    - updates: Lista de ProgressUpdate (até 500 itens)
+    
+    **Retorna:**
+    - Resultado por item (na mesma ordem do envio) e totais
+    
+    Itens inválidos são rejeitados individualmente sem derrubar o lote.
+    Os válidos vão ao journal numa única escrita.
+    """
+    results: List[ProgressItemResult] = []
+    valid: List[ProgressUpdate] = []
+    
+    for index, progress in enumerate(batch.updates):
+        error = _validate_progress(progress)
+        if error:
+            status_code, message = error
+            results.append(ProgressItemResult(
+                index=index,
+                user_id=progress.user_id,
+                lesson_id=progress.lesson_id,
+                success=False,
+                status_code=status_code,
+                error=message
+            ))
+            continue
+        valid.append(progress)
+        results.append(ProgressItemResult(
+            index=index,
+            user_id=progress.user_id,
+            lesson_id=progress.lesson_id,
+            success=True
+        ))
+    
+    if valid:
+        await progress_service.record_many(valid)
+    
+    return ProgressBatchResult(
+        accepted=len(valid),
+        rejected=len(results) - len(valid),
+        results=results
+    )
+
+
 @router.post("/progress/reset/{user_id}")
 async def reset_progress(user_id: str, mission_id: str = "dax-basics"):
     """
@@ -195,15 +459,20 @@ async def reset_progress(user_id: str, mission_id: str = "dax-basics"):
     - mission_id: ID da missão a resetar
     
     **Retorna:**
-    - Confirmação do reset
+    - Confirmação do reset e quantos registros de progresso foram apagados
     
-    **CUIDADO:** Essa ação é irreversível!
+    **CUIDADO:** Essa ação é irreversível! O XP já ganho é mantido.
     """
-    # TODO: Implementar reset no Supabase
+    if not lesson_service.get_mission(mission_id):
+        raise HTTPException(status_code=404, detail="Missão não encontrada")
+    
+    lesson_ids = [l.id for l in lesson_service.get_lesson_summaries_by_mission(mission_id)]
+    deleted = await progress_service.reset(user_id, lesson_ids)
     return {
         "success": True,
         "message": f"Progresso resetado para missão {mission_id}",
-        "user_id": user_id
+        "user_id": user_id,
+        "deleted": deleted
     }
 
 
@@ -212,41 +481,107 @@ async def reset_progress(user_id: str, mission_id: str = "dax-basics"):
 # ============================================
 
 @router.get("/leaderboard", response_model=List[LeaderboardEntry])
-async def get_leaderboard(limit: int = 10):
+async def get_leaderboard(limit: int = Query(10, ge=1, le=100)):
     """
     Retorna o ranking dos top jogadores
     
     **Parâmetros:**
-    - limit: Número de jogadores a retornar (padrão: 10)
+    - limit: Número de jogadores a retornar (padrão: 10, máximo: 100)
     
     **Retorna:**
     - Lista dos top jogadores ordenados por XP
+    """
+    return TrustedJSONResponse(leaderboard.top(limit))
+
+
+@router.get("/leaderboard/{user_id}/rank", response_model=LeaderboardEntry)
+async def get_user_rank(user_id: str):
+    """
+    Retorna a posição de um jogador no ranking
+    
+    **Parâmetros:**
+    - user_id: ID do usuário
+    
+    **Retorna:**
+    - Entrada do ranking do jogador (com rank) ou 404
+    """
+    entry = leaderboard.entry(user_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Jogador não está no ranking")
+    return TrustedJSONResponse(entry)
+
+
+@router.get("/leaderboard/{user_id}/around", response_model=List[LeaderboardEntry])
+async def get_players_around(user_id: str, radius: int = Query(5, ge=0, le=50)):
+    """
+    Retorna os jogadores ao redor de um usuário no ranking
+    
+    **Parâmetros:**
+    - user_id: ID do usuário
+    - radius: Quantos jogadores acima e abaixo (padrão: 5)
+    
+    **Retorna:**
+    - Fatia do ranking centrada no jogador
+    """
+    entries = leaderboard.around(user_id, radius)
+    if not entries:
+        raise HTTPException(status_code=404, detail="Jogador não está no ranking")
+    return TrustedJSONResponse(entries)
+
+
+# ============================================
+# ROTA DE BOOTSTRAP DO DASHBOARD
+# ============================================
+
+@router.get("/bootstrap/{user_id}", response_model=DashboardBootstrap)
+async def get_dashboard_bootstrap(
+    user_id: str,
+    mission_id: str = "dax-basics",
+    limit: int = Query(10, ge=1, le=100)
+):
+    """
+    Retorna numa única resposta os dados da primeira tela do Dashboard
+    
+    **Parâmetros:**
+    - user_id: ID do usuário
+    - mission_id: Missão do progresso (padrão: 'dax-basics')
+    - limit: Tamanho do top do leaderboard (padrão: 10)
     
-    **TODO:** Buscar dados reais do Supabase
-    """
-    # Dados mockados para exemplo
-    mock_leaderboard = [
-        LeaderboardEntry(
-            user_id="user1",
-            username="DAXMaster",
-            total_xp=1250,
-            completed_lessons=25,
-            streak_days=15,
-            badges=["iron_man", "captain_america"],
-            rank=1
-        ),
-        LeaderboardEntry(
-            user_id="user2",
-            username="BIHero",
-            total_xp=980,
-            completed_lessons=20,
-            streak_days=10,
-            badges=["iron_man"],
-            rank=2
+    **Retorna:**
+    - user (perfil ou null), missions, progress, leaderboard e rank
+    
+    Perfil e progresso são buscados em paralelo. A lista de missões sai
+    já serializada do response_cache (os mesmos bytes de GET /missions).
+    """
+    if not lesson_service.get_mission(mission_id):
+        raise HTTPException(status_code=404, detail="Missão não encontrada")
+    
+    try:
+        user, completed = await asyncio.gather(
+            user_service.get_user(user_id),
+            progress_service.completed_mask(user_id)
         )
-    ]
+    except UpstreamUnavailable:
+        raise
+    except Exception:
+        raise HTTPException(status_code=500, detail="Erro ao carregar o dashboard")
+    
+    missions = await response_cache.get(
+        "missions", ("full", None), lesson_service.get_all_missions
+    )
+    progress = _mission_progress(user_id, mission_id, completed)
+    entry = leaderboard.entry(user_id)
     
-    return mock_leaderboard[:limit]
+    # Monta o JSON por partes para reaproveitar os bytes cacheados
+    body = b"".join((
+        b'{"user":', serialize(user) if user else b"null",
+        b',"missions":', missions.body,
+        b',"progress":', progress.model_dump_json(exclude_none=True).encode(),
+        b',"leaderboard":', serialize(leaderboard.top(limit)),
+        b',"rank":', serialize(entry) if entry else b"null",
+        b"}",
+    ))
+    return Response(content=body, media_type="application/json")
 
 
 # ============================================
@@ -261,7 +596,7 @@ async def health_check():
     **Retorna:**
     - Status da API e estatísticas
     """
-    total_lessons = len(lesson_service.lessons_db)
+    total_lessons = lesson_service.total_lessons
     total_missions = len(lesson_service.missions_db)
     
     return {
@@ -1,14 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends
-from app.models.user_models import UserCreate, UserResponse, LoginRequest
-from app.services.user_service_ultimate import user_service_ultimate
-from app.core.supabase_fixed import supabase
+from fastapi import APIRouter, HTTPException, Depends, Response
+from app.core.auth import require_user
+from app.core.resilience import UpstreamUnavailable
+from app.models.user_models import AuthenticatedUser, UserCreate, UserResponse, LoginRequest
+from app.services.user_service import user_service
+from app.repositories import repositories
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 @router.post("/register", response_model=UserResponse)
 async def register_user(user_data: UserCreate):
-    """Registrar novo usuário - VERSÃO ULTIMATE"""
-    user = await user_service_ultimate.create_user(user_data)
+    """Registrar novo usuário"""
+    user = await user_service.create_user(user_data)
     if not user:
         raise HTTPException(
             status_code=400, 
@@ -19,96 +21,74 @@ async def register_user(user_data: UserCreate):
 @router.post("/login")
 async def login_user(login_data: LoginRequest):
     """Login do usuário"""
-    try:
-        response = supabase.auth.sign_in_with_password({
-            "email": login_data.email,
-            "password": login_data.password
-        })
-        
-        if response.user:
-            # Buscar dados do usuário
-            user_data = supabase.from_("users")\
-                .select("*")\
-                .eq("id", response.user.id)\
-                .execute()
-            
-            if user_data.data:
-                return {
-                    "user": UserResponse(**user_data.data[0]),
-                    "session": response.session
-                }
-        
+    result = await user_service.login_user(login_data.email, login_data.password)
+    if not result:
         raise HTTPException(status_code=401, detail="Credenciais inválidas")
-        
+    return result
+
+@router.get("/me", response_model=UserResponse)
+async def get_current_user(auth: AuthenticatedUser = Depends(require_user)):
+    """Perfil do usuário do access token (verificado localmente, sem ida ao Supabase Auth)"""
+    try:
+        user = await user_service.get_user(auth.user_id)
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=401, detail="Erro no login")
+        raise HTTPException(status_code=500, detail="Erro ao buscar usuário")
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    return user
 
 @router.get("/{user_id}", response_model=UserResponse)
-async def get_user(user_id: str):
-    """Buscar dados do usuário"""
+async def get_user(user_id: str, response: Response):
+    """
+    Buscar dados do usuário (cache de perfis na frente do Supabase)
+    
+    Com o Supabase fora, responde com o último perfil conhecido e o
+    cabeçalho `Warning: 110` (desatualizado); sem ele, 503.
+    """
     try:
-        response = supabase.from_("users")\
-            .select("*")\
-            .eq("id", user_id)\
-            .execute()
-        
-        if response.data:
-            return UserResponse(**response.data[0])
-        raise HTTPException(status_code=404, detail="Usuário não encontrado")
-            
+        user, stale = await user_service.get_user_with_status(user_id)
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail="Erro ao buscar usuário")
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    if stale:
+        response.headers["Warning"] = '110 - "Response is Stale"'
+    return user
 
 @router.post("/{user_id}/add-xp")
 async def add_user_xp(user_id: str, xp_earned: int = 100, coins_earned: int = 10):
-    """Adicionar XP e moedas ao usuário"""
+    """Adicionar XP e moedas ao usuário (incremento atômico no banco)"""
     try:
-        # Buscar usuário atual
-        current = supabase.from_("users")\
-            .select("*")\
-            .eq("id", user_id)\
-            .execute()
-        
-        if not current.data:
-            raise HTTPException(status_code=404, detail="Usuário não encontrado")
-        
-        current_user = current.data[0]
-        
-        # Calcular novos valores
-        new_xp = current_user['xp'] + xp_earned
-        new_coins = current_user['coins'] + coins_earned
-        new_level = max(1, new_xp // 1000 + 1)
-        
-        # Atualizar
-        response = supabase.from_("users")\
-            .update({
-                "xp": new_xp,
-                "coins": new_coins,
-                "level": new_level
-            })\
-            .eq("id", user_id)\
-            .execute()
-        
-        if response.data:
-            return {
-                "message": f"🎉 +{xp_earned} XP e +{coins_earned} moedas!",
-                "user": UserResponse(**response.data[0])
-            }
-        
-        raise HTTPException(status_code=400, detail="Erro ao atualizar")
-            
+        user = await user_service.update_user_xp(user_id, xp_earned, coins_earned)
+    except UpstreamUnavailable:
+        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail="Erro ao atualizar XP")
+    
+    if not user:
+        raise HTTPException(status_code=404, detail="Usuário não encontrado")
+    
+    return {
+        "message": f"🎉 +{xp_earned} XP e +{coins_earned} moedas!",
+        "user": user
+    }
 
 @router.get("/check/connection")
 async def check_connection():
     """Verificar conexão com banco"""
     try:
-        result = supabase.from_("users").select("id", count="exact").execute()
+        users_count = await repositories.users.count()
         return {
             "status": "connected",
-            "users_count": result.count,
-            "message": "✅ Conexão com Supabase estabelecida!"
+            "backend": repositories.name,
+            "users_count": users_count,
+            "message": f"✅ Conexão com {repositories.name} estabelecida!"
         }
     except Exception as e:
         return {
@@ -116,6 +96,11 @@ async def check_connection():
             "error": str(e)
         }
 
+@router.get("/check/cache")
+async def check_cache():
+    """Estatísticas do cache de perfis (hits, misses, tamanho)"""
+    return user_service.cache.stats()
+
 @router.post("/manual-create")
 async def manual_create_user(username: str, email: str):
     """Criar usuário manualmente para testes"""
@@ -123,7 +108,7 @@ async def manual_create_user(username: str, email: str):
     import uuid
     user_id = str(uuid.uuid4())
     
-    user = await user_service_ultimate.manual_create_user(user_id, username, email)
+    user = await user_service.manual_create_user(user_id, username, email)
     if not user:
         raise HTTPException(status_code=400, detail="Erro na criação manual")
     return user
\ No newline at end of file
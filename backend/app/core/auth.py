@@ -0,0 +1,219 @@
+"""
+Verificação local dos access tokens do Supabase Auth
+
+Os tokens são JWTs assinados pelo Supabase: com o segredo do projeto
+(HS256, SUPABASE_JWT_SECRET) ou com chaves assimétricas publicadas no
+JWKS do projeto (RS256/ES256). A assinatura é verificada aqui, com
+python-jose, sem ida ao Supabase por requisição:
+
+- O JWKS é baixado no primeiro uso e guardado por AUTH_JWKS_TTL segundos.
+  Um `kid` desconhecido força uma nova busca (rotação de chaves), no
+  máximo uma a cada AUTH_JWKS_MIN_REFRESH segundos. Se a busca falhar,
+  as chaves antigas continuam valendo.
+- Claims já verificadas ficam num cache LRU por token até o `exp` do
+  token, então a mesma sessão não é reverificada a cada requisição.
+
+Uso nas rotas:
+
+    @router.get("/me")
+    async def me(auth: AuthenticatedUser = Depends(require_user)):
+        ...
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+import httpx
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from jose import JWTError, jwt
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.metrics import Counter, registry
+from app.models.user_models import AuthenticatedUser
+
+logger = logging.getLogger(__name__)
+
+Claims = Dict[str, Any]
+
+SYMMETRIC_ALGORITHMS = ("HS256",)
+ASYMMETRIC_ALGORITHMS = ("RS256", "ES256")
+
+auth_verifications = registry.register(Counter(
+    "auth_verifications_total", "Verificações de access token",
+    ("result",),
+))
+
+
+class AuthError(Exception):
+    """Token ausente, malformado, expirado ou com assinatura inválida"""
+    pass
+
+
+class SigningKeys:
+    """Segredo HS256 e JWKS do projeto, com política de atualização"""
+
+    def __init__(self, jwks_url: str, secret: str = "", ttl: float = 600,
+                 min_refresh: float = 30, timeout: float = 5):
+        self.jwks_url = jwks_url
+        self.secret = secret
+        self.ttl = ttl
+        self.min_refresh = min_refresh
+        self.timeout = timeout
+        self._keys: Dict[str, Dict[str, Any]] = {}
+        self._fetched_at = 0.0
+        self._attempted_at = float("-inf")
+        self._lock = asyncio.Lock()
+
+    def _expired(self) -> bool:
+        return time.monotonic() - self._fetched_at > self.ttl
+
+    async def _refresh(self) -> None:
+        async with self._lock:
+            # Outra requisição pode ter atualizado enquanto esta esperava
+            if time.monotonic() - self._attempted_at < self.min_refresh:
+                return
+            self._attempted_at = time.monotonic()
+            try:
+                async with httpx.AsyncClient(timeout=self.timeout) as client:
+                    response = await client.get(self.jwks_url)
+                    response.raise_for_status()
+                keys: List[Dict[str, Any]] = response.json().get("keys", [])
+            except (httpx.HTTPError, ValueError) as e:
+                # Mantém as chaves antigas; a próxima tentativa respeita min_refresh
+                logger.warning("⚠️ Falha ao buscar JWKS", extra={"error": str(e)})
+                return
+            self._keys = {key.get("kid", ""): key for key in keys}
+            self._fetched_at = time.monotonic()
+            logger.info("🔑 JWKS atualizado", extra={"keys": len(self._keys)})
+
+    async def key_for(self, header: Dict[str, Any]) -> Any:
+        """Chave para verificar um token a partir do cabeçalho (alg, kid)"""
+        algorithm = header.get("alg")
+        if algorithm in SYMMETRIC_ALGORITHMS:
+            if not self.secret:
+                raise AuthError("Tokens HS256 exigem SUPABASE_JWT_SECRET")
+            return self.secret
+        if algorithm not in ASYMMETRIC_ALGORITHMS:
+            raise AuthError(f"Algoritmo não suportado: {algorithm}")
+
+        kid = header.get("kid", "")
+        if kid not in self._keys or self._expired():
+            await self._refresh()
+        key = self._keys.get(kid)
+        if key is None:
+            raise AuthError("Chave de assinatura desconhecida")
+        return key
+
+
+class TokenVerifier:
+    """Verifica JWTs localmente e guarda as claims verificadas"""
+
+    def __init__(self, keys: SigningKeys, audience: str = "authenticated",
+                 issuer: Optional[str] = None, cache_size: int = 10000,
+                 leeway: int = 30):
+        self.keys = keys
+        self.audience = audience
+        self.issuer = issuer
+        self.leeway = leeway
+        self.cache: TTLCache[Claims] = TTLCache(maxsize=cache_size, ttl=3600)
+
+    @staticmethod
+    def _cache_key(token: str) -> bytes:
+        # Não guarda o token em si na memória do cache
+        return hashlib.blake2b(token.encode(), digest_size=20).digest()
+
+    async def verify(self, token: str) -> Claims:
+        """Retorna as claims do token ou levanta AuthError"""
+        cache_key = self._cache_key(token)
+        claims = self.cache.get(cache_key)
+        if claims is not None:
+            auth_verifications.inc("cached")
+            return claims
+
+        try:
+            header = jwt.get_unverified_header(token)
+            key = await self.keys.key_for(header)
+            claims = jwt.decode(
+                token, key,
+                algorithms=[header["alg"]],
+                audience=self.audience,
+                issuer=self.issuer,
+                options={"leeway": self.leeway},
+            )
+        except (JWTError, KeyError) as e:
+            auth_verifications.inc("invalid")
+            raise AuthError(str(e)) from e
+        except AuthError:
+            auth_verifications.inc("invalid")
+            raise
+
+        # Válido até o exp do token (tokens sem exp ficam o TTL padrão)
+        exp = claims.get("exp")
+        ttl = exp - time.time() if isinstance(exp, (int, float)) else None
+        if ttl is None or ttl > 0:
+            self.cache.set(cache_key, claims, ttl=ttl)
+        auth_verifications.inc("verified")
+        return claims
+
+
+def _create_verifier() -> TokenVerifier:
+    settings = get_settings()
+    auth_url = f"{settings.supabase_url.rstrip('/')}/auth/v1"
+    keys = SigningKeys(
+        jwks_url=f"{auth_url}/.well-known/jwks.json",
+        secret=settings.supabase_jwt_secret,
+        ttl=settings.auth_jwks_ttl,
+        min_refresh=settings.auth_jwks_min_refresh,
+    )
+    return TokenVerifier(
+        keys,
+        audience=settings.supabase_jwt_audience,
+        issuer=auth_url,
+        cache_size=settings.auth_claims_cache_size,
+    )
+
+
+# Singleton instance
+token_verifier = _create_verifier()
+
+
+# ============================================
+# DEPENDÊNCIAS DO FASTAPI
+# ============================================
+
+_bearer = HTTPBearer(auto_error=False)
+
+
+async def optional_user(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(_bearer),
+) -> Optional[AuthenticatedUser]:
+    """Usuário do token Bearer, None sem token; 401 se o token for inválido"""
+    if credentials is None:
+        return None
+    try:
+        claims = await token_verifier.verify(credentials.credentials)
+    except AuthError:
+        raise HTTPException(
+            status_code=401,
+            detail="Token inválido ou expirado",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return AuthenticatedUser.from_claims(claims)
+
+
+async def require_user(
+    user: Optional[AuthenticatedUser] = Depends(optional_user),
+) -> AuthenticatedUser:
+    """Exige um access token válido do Supabase"""
+    if user is None:
+        raise HTTPException(
+            status_code=401,
+            detail="Autenticação necessária",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return user
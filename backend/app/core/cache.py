@@ -0,0 +1,133 @@
+"""
+Cache em memória limitado, com TTL por entrada e despejo LRU
+
+Com stale_ttl > 0, entradas vencidas continuam guardadas por mais
+stale_ttl segundos: get() já não as retorna, mas get_stale() sim, para
+servir o último valor conhecido quando o upstream está fora.
+
+Leitura e escrita concorrentes: quem faz read-through toma
+`generation()` antes de ir ao upstream e grava com
+`set(key, value, generation=g)`. Se uma escrita (set sem generation,
+invalidate ou clear) tocou a chave nesse meio-tempo, a gravação é
+descartada, para que uma leitura lenta não sobrescreva o valor novo
+com o antigo.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """Cache LRU com expiração por entrada e contadores de hit/miss"""
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 60.0, stale_ttl: float = 0.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Relógio de escritas: última escrita por chave (as maxsize mais
+        # recentes); chaves esquecidas valem como escritas em _floor
+        self._clock = 0
+        self._writes: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._floor = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Retorna o valor se existir e não tiver expirado"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            expires_at, value = item
+            now = time.monotonic()
+            if expires_at <= now:
+                if expires_at + self.stale_ttl <= now:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def get_stale(self, key: Hashable) -> Optional[V]:
+        """Último valor conhecido, mesmo vencido (dentro de stale_ttl)"""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at + self.stale_ttl <= time.monotonic():
+                return None
+            return value
+
+    def generation(self) -> int:
+        """Marca a tomar antes de ler o upstream (ver set)"""
+        return self._clock
+
+    def _written_after(self, key: Hashable, generation: int) -> bool:
+        return self._writes.get(key, self._floor) > generation
+
+    def _bump(self, key: Hashable) -> None:
+        self._clock += 1
+        self._writes[key] = self._clock
+        self._writes.move_to_end(key)
+        while len(self._writes) > self.maxsize:
+            _, forgotten = self._writes.popitem(last=False)
+            self._floor = max(self._floor, forgotten)
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None,
+            generation: Optional[int] = None) -> bool:
+        """
+        Grava (ou substitui) um valor, despejando o menos usado se cheio
+
+        Sem generation é uma escrita. Com generation (read-through), só
+        grava se a chave não foi escrita depois dela; retorna se gravou.
+        """
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is None:
+                self._bump(key)
+            elif self._written_after(key, generation):
+                return False
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._bump(key)
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._writes.clear()
+            self._clock += 1
+            self._floor = self._clock
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,184 @@
+"""
+Compressão de respostas (gzip e brotli) com negociação por Accept-Encoding
+
+Dois caminhos:
+- Conteúdo estático do catálogo: o response_cache comprime cada corpo uma
+  única vez por carga de conteúdo (nível máximo, já que o custo é pago só
+  uma vez) e serve direto a variante aceita pelo cliente.
+- Rotas dinâmicas: o CompressionMiddleware comprime na hora as respostas
+  JSON/texto acima de COMPRESSION_MIN_SIZE bytes (nível mais baixo, para
+  não pesar na latência).
+
+O brotli é opcional: sem o pacote `brotli` instalado, só gzip é oferecido.
+"""
+
+import gzip
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depende do ambiente
+    brotli = None
+
+
+Compressor = Callable[[bytes, int], bytes]
+
+_COMPRESSORS: Dict[str, Compressor] = {
+    "gzip": lambda data, level: gzip.compress(data, compresslevel=level, mtime=0),
+}
+if brotli is not None:
+    _COMPRESSORS["br"] = lambda data, level: brotli.compress(data, quality=level)
+
+# Ordem de preferência do servidor quando o cliente aceita várias com o mesmo q
+PREFERENCE = ("br", "gzip")
+
+# Níveis: estático (comprimido uma vez) e dinâmico (comprimido por requisição)
+STATIC_LEVELS = {"gzip": 9, "br": 11}
+DYNAMIC_LEVELS = {"gzip": 6, "br": 4}
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript")
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Codificações suportadas neste processo, em ordem de preferência"""
+    return tuple(e for e in PREFERENCE if e in _COMPRESSORS)
+
+
+def compress(data: bytes, encoding: str, level: int) -> bytes:
+    return _COMPRESSORS[encoding](data, level)
+
+
+def _parse_accept_encoding(header: str) -> Dict[str, float]:
+    """'gzip;q=0.8, br' -> {'gzip': 0.8, 'br': 1.0}"""
+    accepted: Dict[str, float] = {}
+    for item in header.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[name] = quality
+    return accepted
+
+
+def negotiate(accept_encoding: Optional[str], offered: Iterable[str]) -> Optional[str]:
+    """
+    Escolhe a codificação para a resposta (None = sem compressão)
+
+    Maior q do cliente vence; no empate, a ordem de `offered`.
+    """
+    if not accept_encoding:
+        return None
+    accepted = _parse_accept_encoding(accept_encoding)
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for encoding in offered:
+        quality = accepted.get(encoding, wildcard)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def precompress(body: bytes) -> Dict[str, bytes]:
+    """Variantes comprimidas de um corpo estático (só as que valem a pena)"""
+    settings = get_settings()
+    if not settings.compression_enabled or len(body) < settings.compression_min_size:
+        return {}
+    variants = {}
+    for encoding in available_encodings():
+        compressed = compress(body, encoding, STATIC_LEVELS[encoding])
+        if len(compressed) < len(body):
+            variants[encoding] = compressed
+    return variants
+
+
+def add_vary(headers: MutableHeaders) -> None:
+    """Acrescenta Accept-Encoding ao Vary sem duplicar"""
+    vary = headers.get("vary")
+    if not vary:
+        headers["Vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["Vary"] = f"{vary}, Accept-Encoding"
+
+
+# ============================================
+# MIDDLEWARE (RESPOSTAS DINÂMICAS)
+# ============================================
+
+class CompressionMiddleware:
+    """
+    Middleware ASGI que comprime respostas dinâmicas acima de um limiar
+
+    Respostas que já têm Content-Encoding (as variantes pré-comprimidas do
+    response_cache) passam direto. Respostas em streaming também.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: Optional[int] = None):
+        self.app = app
+        settings = get_settings()
+        self.minimum_size = (
+            settings.compression_min_size if minimum_size is None else minimum_size
+        )
+        self.enabled = settings.compression_enabled
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate(Headers(scope=scope).get("accept-encoding"),
+                             available_encodings())
+        start: Optional[Message] = None
+        passthrough = False
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                # Segura o início até saber o tamanho do corpo
+                start = message
+                return
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            passthrough = True
+            body: bytes = message.get("body", b"")
+            headers = MutableHeaders(raw=start["headers"])
+            if _compressible(headers):
+                add_vary(headers)
+                if (
+                    encoding is not None
+                    and not message.get("more_body", False)
+                    and len(body) >= self.minimum_size
+                ):
+                    compressed = compress(body, encoding, DYNAMIC_LEVELS[encoding])
+                    if len(compressed) < len(body):
+                        headers["Content-Encoding"] = encoding
+                        headers["Content-Length"] = str(len(compressed))
+                        message = {"type": "http.response.body", "body": compressed}
+            await send(start)
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
+
+def _compressible(headers: MutableHeaders) -> bool:
+    """Só JSON/texto ainda não codificado"""
+    if "content-encoding" in headers:
+        return False
+    content_type = headers.get("content-type", "")
+    # SSE precisa chegar evento a evento, sem buffer de compressão
+    return (content_type.startswith(COMPRESSIBLE_TYPES)
+            and not content_type.startswith("text/event-stream"))
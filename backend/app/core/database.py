@@ -0,0 +1,150 @@
+"""
+Camada assíncrona de acesso ao Supabase
+
+As consultas ao PostgREST passam por um único httpx.AsyncClient
+compartilhado (pool de conexões, HTTP/2 quando o pacote 'h2' está
+instalado), então requisições concorrentes sobrepõem seu I/O em vez de
+bloquear o event loop. Chamadas que só existem na API síncrona do
+supabase-py (ex: Auth) rodam num pool de threads dedicado via run_sync
+(run_auth para o Auth, com a mesma medição de latência das consultas).
+"""
+
+import asyncio
+import importlib.util
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional, TypeVar, Union
+
+import httpx
+from postgrest import AsyncPostgrestClient
+from postgrest._async.request_builder import AsyncRequestBuilder, AsyncRPCFilterRequestBuilder
+
+from app.core.config import get_settings
+from app.core.metrics import InstrumentedClient, observe_supabase
+from app.core.supabase import supabase
+
+
+T = TypeVar("T")
+
+settings = get_settings()
+
+POOL_MAX_CONNECTIONS = settings.supabase_pool_max_connections
+POOL_MAX_KEEPALIVE = settings.supabase_pool_max_keepalive
+POOL_KEEPALIVE_EXPIRY = settings.supabase_pool_keepalive_expiry
+REQUEST_TIMEOUT = settings.supabase_timeout
+CONNECT_TIMEOUT = settings.supabase_connect_timeout
+THREADPOOL_SIZE = settings.supabase_threadpool_size
+HTTP2_ENABLED = settings.supabase_http2 and importlib.util.find_spec("h2") is not None
+
+
+class PooledPostgrestClient(AsyncPostgrestClient):
+    """AsyncPostgrestClient com limites de pool e HTTP/2 configuráveis"""
+
+    def __init__(
+        self,
+        base_url: str,
+        *,
+        headers: Dict[str, str],
+        timeout: httpx.Timeout,
+        limits: httpx.Limits,
+        http2: bool,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self._limits = limits
+        self._http2 = http2
+        self._transport = transport
+        super().__init__(base_url, headers=headers, timeout=timeout)
+
+    def create_session(
+        self,
+        base_url: str,
+        headers: Dict[str, str],
+        timeout: Union[int, float, httpx.Timeout],
+    ) -> httpx.AsyncClient:
+        return InstrumentedClient(
+            base_url=base_url,
+            headers=headers,
+            timeout=timeout,
+            limits=self._limits,
+            http2=self._http2,
+            transport=self._transport,
+        )
+
+
+class Database:
+    """Acesso assíncrono às tabelas e funções do Supabase"""
+
+    def __init__(self, url: str, key: str):
+        self.url = url.rstrip("/")
+        self.key = key
+        self._postgrest: Optional[PooledPostgrestClient] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._transport: Optional[httpx.AsyncBaseTransport] = None
+
+    @property
+    def postgrest(self) -> PooledPostgrestClient:
+        """Cliente PostgREST compartilhado, criado no primeiro uso"""
+        if self._postgrest is None:
+            self._postgrest = PooledPostgrestClient(
+                f"{self.url}/rest/v1",
+                headers={
+                    "Accept": "application/json",
+                    "Content-Type": "application/json",
+                    "apikey": self.key,
+                    "Authorization": f"Bearer {self.key}",
+                },
+                timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=POOL_MAX_CONNECTIONS,
+                    max_keepalive_connections=POOL_MAX_KEEPALIVE,
+                    keepalive_expiry=POOL_KEEPALIVE_EXPIRY,
+                ),
+                http2=HTTP2_ENABLED,
+                transport=self._transport,
+            )
+        return self._postgrest
+
+    def use_transport(self, transport: httpx.AsyncBaseTransport) -> None:
+        """Troca o transporte HTTP (ex: LocalSupabase em testes e benchmarks)"""
+        self._transport = transport
+        self._postgrest = None
+
+    def from_(self, table: str) -> AsyncRequestBuilder:
+        """Inicia uma consulta em uma tabela (await .execute() no final)"""
+        return self.postgrest.from_(table)
+
+    def rpc(self, func: str, params: Dict[str, Any]) -> AsyncRPCFilterRequestBuilder:
+        """Chama uma função do banco (await .execute() no final)"""
+        return self.postgrest.rpc(func, params)
+
+    @property
+    def auth(self):
+        """Cliente síncrono do Supabase Auth (use com run_sync)"""
+        return supabase.get_client().auth
+
+    async def run_sync(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Executa uma chamada bloqueante no pool de threads, fora do event loop"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=THREADPOOL_SIZE, thread_name_prefix="supabase-sync"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def run_auth(self, method: str, *args: Any) -> Any:
+        """Chama um método do Auth síncrono (ex: "sign_up") no pool, medindo a latência"""
+        with observe_supabase("auth", method):
+            return await self.run_sync(getattr(self.auth, method), *args)
+
+    async def close(self) -> None:
+        """Fecha o pool HTTP e o pool de threads"""
+        if self._postgrest is not None:
+            await self._postgrest.aclose()
+            self._postgrest = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+# Instância global
+db = Database(url=settings.supabase_url, key=settings.supabase_anon_key)
@@ -0,0 +1,237 @@
+"""
+Stand-in local do PostgREST do Supabase, em memória
+
+Transporte httpx que responde às mesmas requisições que o Database
+envia ao Supabase (tabelas com filtros, ordenação, contagem, upsert e
+funções RPC), sem rede. Usado em testes, benchmarks e desenvolvimento
+offline:
+
+    from app.core.database import db
+    from app.core.local_supabase import LocalSupabase
+
+    db.use_transport(LocalSupabase())
+"""
+
+import json
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+
+Row = Dict[str, Any]
+RpcHandler = Callable[["LocalSupabase", Dict[str, Any]], Any]
+
+# Chave primária de cada tabela conhecida (padrão: "id")
+PRIMARY_KEYS: Dict[str, Tuple[str, ...]] = {
+    "user_progress": ("user_id", "lesson_id"),
+}
+
+
+def level_for_xp(xp: int) -> int:
+    """Mesma fórmula da função add_user_xp no banco (1 nível a cada 1000 XP)"""
+    return max(1, xp // 1000 + 1)
+
+
+def _rpc_add_user_xp(store: "LocalSupabase", params: Dict[str, Any]) -> List[Row]:
+    """Equivalente local de sql/add_user_xp.sql"""
+    user = store.tables.get("users", {}).get((params["p_user_id"],))
+    if user is None:
+        return []
+    user["xp"] += params.get("p_xp", 0)
+    user["coins"] += params.get("p_coins", 0)
+    user["level"] = level_for_xp(user["xp"])
+    return [dict(user)]
+
+
+def _rpc_upsert_user_progress(store: "LocalSupabase", params: Dict[str, Any]) -> None:
+    """Equivalente local de sql/upsert_user_progress.sql"""
+    table = store.tables.setdefault("user_progress", {})
+    for row in params["p_rows"]:
+        key = (row["user_id"], row["lesson_id"])
+        current = table.get(key)
+        if current is None:
+            table[key] = dict(row)
+            continue
+        completed = bool(current.get("completed"))
+        current.update(
+            completed=completed or bool(row.get("completed")),
+            xp_earned=max(current.get("xp_earned") or 0, row.get("xp_earned") or 0),
+            time_spent=row["time_spent"] if row.get("time_spent") is not None
+            else current.get("time_spent"),
+            completed_at=current.get("completed_at") if completed else row.get("completed_at"),
+        )
+    return None
+
+
+def _coerce(raw: str, sample: Any) -> Any:
+    """Converte o valor textual do filtro para o tipo da coluna"""
+    if raw == "null":
+        return None
+    if isinstance(sample, bool):
+        return raw.lower() == "true"
+    if isinstance(sample, int):
+        return int(raw)
+    if isinstance(sample, float):
+        return float(raw)
+    return raw.strip('"')
+
+
+def _matches(row: Row, column: str, expr: str) -> bool:
+    op, _, raw = expr.partition(".")
+    value = row.get(column)
+    if op == "is":
+        return value is None if raw == "null" else value == (raw.lower() == "true")
+    if op == "in":
+        options = raw.strip("()").split(",")
+        return value in {_coerce(o, value) for o in options}
+    target = _coerce(raw, value)
+    if op == "eq":
+        return value == target
+    if op == "neq":
+        return value != target
+    if value is None or target is None:
+        return False
+    if op == "gt":
+        return value > target
+    if op == "gte":
+        return value >= target
+    if op == "lt":
+        return value < target
+    if op == "lte":
+        return value <= target
+    raise ValueError(f"Operador não suportado: {op}")
+
+
+class LocalSupabase(httpx.AsyncBaseTransport):
+    """Transporte httpx que emula o PostgREST em memória"""
+
+    RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+    def __init__(self):
+        self.tables: Dict[str, Dict[Tuple, Row]] = {}
+        self.rpcs: Dict[str, RpcHandler] = {
+            "add_user_xp": _rpc_add_user_xp,
+            "upsert_user_progress": _rpc_upsert_user_progress,
+        }
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------
+    # Helpers para popular os dados
+    # ------------------------------------------------------------
+
+    def _key(self, table: str, row: Row, on_conflict: Optional[str] = None) -> Tuple:
+        columns = on_conflict.split(",") if on_conflict else PRIMARY_KEYS.get(table, ("id",))
+        return tuple(row.get(c) for c in columns)
+
+    def seed(self, table: str, rows: List[Row]) -> None:
+        """Insere linhas diretamente, sem passar por HTTP"""
+        target = self.tables.setdefault(table, {})
+        for row in rows:
+            target[self._key(table, row)] = dict(row)
+
+    def register_rpc(self, name: str, handler: RpcHandler) -> None:
+        self.rpcs[name] = handler
+
+    # ------------------------------------------------------------
+    # Transporte
+    # ------------------------------------------------------------
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        await request.aread()
+        path = request.url.path.split("/rest/v1/", 1)[-1].strip("/")
+        body = json.loads(request.content) if request.content else None
+        prefer = request.headers.get("prefer", "")
+
+        try:
+            with self._lock:
+                if path.startswith("rpc/"):
+                    return self._rpc(path[4:], body or {})
+                return self._table(request.method, path, request.url.params, body, prefer)
+        except (KeyError, ValueError, TypeError) as e:
+            return httpx.Response(400, json={"message": str(e), "code": "LOCAL"})
+
+    def _rpc(self, name: str, params: Dict[str, Any]) -> httpx.Response:
+        handler = self.rpcs.get(name)
+        if handler is None:
+            return httpx.Response(404, json={"message": f"function {name} not found"})
+        return httpx.Response(200, json=handler(self, params))
+
+    def _filtered(self, table: str, params: httpx.QueryParams) -> List[Row]:
+        rows = list(self.tables.get(table, {}).values())
+        for column, expr in params.multi_items():
+            if column in self.RESERVED_PARAMS:
+                continue
+            rows = [r for r in rows if _matches(r, column, expr)]
+        return rows
+
+    def _table(
+        self,
+        method: str,
+        table: str,
+        params: httpx.QueryParams,
+        body: Any,
+        prefer: str,
+    ) -> httpx.Response:
+        target = self.tables.setdefault(table, {})
+
+        if method in ("GET", "HEAD"):
+            rows = self._filtered(table, params)
+            orders = [o for value in params.get_list("order") for o in value.split(",")]
+            for order in reversed(orders):
+                if order:
+                    column, _, direction = order.partition(".")
+                    rows.sort(
+                        key=lambda r: (r.get(column) is None, r.get(column)),
+                        reverse=direction.startswith("desc"),
+                    )
+            total = len(rows)
+            offset = int(params.get("offset", 0))
+            limit = params.get("limit")
+            rows = rows[offset:offset + int(limit)] if limit else rows[offset:]
+            select = params.get("select", "*")
+            if select != "*":
+                columns = select.split(",")
+                rows = [{c: r.get(c) for c in columns} for r in rows]
+            headers = {}
+            if "count=" in prefer:
+                end = offset + len(rows) - 1
+                headers["content-range"] = f"{offset}-{end}/{total}" if rows else f"*/{total}"
+            return httpx.Response(200, json=[dict(r) for r in rows], headers=headers)
+
+        if method == "POST":
+            items = body if isinstance(body, list) else [body]
+            upsert = "resolution=merge-duplicates" in prefer
+            ignore = "resolution=ignore-duplicates" in prefer
+            written = []
+            for item in items:
+                key = self._key(table, item, params.get("on_conflict"))
+                if key in target:
+                    if ignore:
+                        continue
+                    if not upsert:
+                        return httpx.Response(409, json={
+                            "message": "duplicate key value violates unique constraint",
+                            "code": "23505",
+                        })
+                    target[key].update(item)
+                else:
+                    target[key] = dict(item)
+                written.append(dict(target[key]))
+            return httpx.Response(201, json=written)
+
+        if method == "PATCH":
+            rows = self._filtered(table, params)
+            for row in rows:
+                row.update(body or {})
+            return httpx.Response(200, json=[dict(r) for r in rows])
+
+        if method == "DELETE":
+            rows = self._filtered(table, params)
+            for row in rows:
+                target.pop(self._key(table, row), None)
+            return httpx.Response(200, json=[dict(r) for r in rows])
+
+        return httpx.Response(405, json={"message": f"Método {method} não suportado"})
@@ -0,0 +1,185 @@
+"""
+Logging estruturado e assíncrono
+
+Os handlers do logger "app" só colocam o registro numa fila limitada
+(put_nowait); uma thread do QueueListener formata e escreve no stdout.
+Assim o event loop nunca espera por I/O de log. Se a fila encher, o
+registro é descartado e contado em log_records_dropped_total (/metrics).
+
+Configuração (app.core.config):
+- LOG_LEVEL: nível padrão (INFO)
+- LOG_LEVELS: níveis por módulo, ex: "app.services.user_service=WARNING,app.core=DEBUG"
+- LOG_SAMPLING: fração mantida de DEBUG/INFO por módulo, ex: "app.services.user_service=0.1"
+  (WARNING e acima nunca são amostrados)
+- LOG_FORMAT: json (padrão) ou text
+- LOG_QUEUE_SIZE: capacidade da fila (10000)
+
+Campos extras viram chaves do JSON:
+
+    logger.info("XP adicionado", extra={"user_id": user_id, "xp": 50})
+"""
+
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, List, Optional, Tuple
+
+from app.core.config import get_settings
+from app.core.metrics import Counter, registry
+
+
+ROOT_LOGGER = "app"
+
+# Atributos padrão do LogRecord (o resto veio de extra=)
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+log_dropped = registry.register(Counter(
+    "log_records_dropped_total", "Registros de log descartados com a fila cheia",
+    ("logger",),
+))
+
+
+def _parse_mapping(spec: str) -> Dict[str, str]:
+    """'a=1,b=2' -> {'a': '1', 'b': '2'}"""
+    result = {}
+    for item in spec.split(","):
+        name, sep, value = item.partition("=")
+        if sep and name.strip():
+            result[name.strip()] = value.strip()
+    return result
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro, com os campos extras"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            # Campos extras não sobrescrevem ts/level/logger/msg
+            if key not in _RESERVED and not key.startswith("_"):
+                entry.setdefault(key, value)
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Formato legível para desenvolvimento, com os campos extras no fim"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)-7s %(name)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        fields = {
+            k: v for k, v in vars(record).items()
+            if k not in _RESERVED and not k.startswith("_")
+        }
+        if fields:
+            text += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        return text
+
+
+class SamplingFilter(logging.Filter):
+    """Mantém só uma fração dos registros DEBUG/INFO de módulos barulhentos"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Prefixo mais específico primeiro
+        self.rates = sorted(rates.items(), key=lambda item: len(item[0]), reverse=True)
+        self._cache: Dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._cache.get(name)
+        if rate is None:
+            rate = 1.0
+            for prefix, value in self.rates:
+                if name == prefix or name.startswith(prefix + "."):
+                    rate = value
+                    break
+            self._cache[name] = rate
+        return rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1.0 or random.random() < rate
+
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler que descarta (e conta) em vez de bloquear ou falhar"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Só resolve a mensagem (args podem mudar depois); a formatação
+        # fica para a thread do listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_dropped.inc(record.name)
+
+
+_listener: Optional[QueueListener] = None
+# (handlers, nível, propagate) do logger 'app' antes do setup_logging
+_previous: Optional[Tuple[List[logging.Handler], int, bool]] = None
+
+
+def setup_logging() -> None:
+    """Configura o logger 'app' (idempotente; desfeito por shutdown_logging)"""
+    global _listener, _previous
+    if _listener is not None:
+        return
+    settings = get_settings()
+
+    output = logging.StreamHandler(sys.stdout)
+    output.setFormatter(TextFormatter() if settings.log_format == "text" else JsonFormatter())
+
+    log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(maxsize=settings.log_queue_size)
+    handler = DroppingQueueHandler(log_queue)
+    rates = {name: float(rate) for name, rate in _parse_mapping(settings.log_sampling).items()}
+    if rates:
+        handler.addFilter(SamplingFilter(rates))
+
+    root = logging.getLogger(ROOT_LOGGER)
+    _previous = (list(root.handlers), root.level, root.propagate)
+    root.handlers[:] = [handler]
+    root.setLevel(settings.log_level.upper())
+    root.propagate = False
+    for name, level in _parse_mapping(settings.log_levels).items():
+        logging.getLogger(name).setLevel(level.upper())
+
+    _listener = QueueListener(log_queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Esvazia a fila, para a thread de escrita e restaura os handlers anteriores"""
+    global _listener, _previous
+    if _listener is None:
+        return
+    root = logging.getLogger(ROOT_LOGGER)
+    # Tira o QueueHandler antes de parar o listener: sem isso os registros
+    # seguintes iriam para uma fila que ninguém mais lê
+    handlers, level, propagate = _previous
+    root.handlers[:] = handlers
+    root.setLevel(level)
+    root.propagate = propagate
+    _listener.stop()
+    _listener = None
+    _previous = None
@@ -0,0 +1,288 @@
+"""
+Métricas em memória no formato texto do Prometheus
+
+Contadores, gauges e histogramas com labels, sem dependências externas.
+O MetricsMiddleware mede cada requisição pelo template da rota
+(/api/lessons/{lesson_id}, não /api/lessons/42), e o InstrumentedClient
+(httpx) mede cada chamada ao Supabase por tabela/operação, inclusive as
+que terminam em timeout ou erro de transporte (label outcome).
+Tudo é exposto em GET /metrics (ver app.main).
+"""
+
+import asyncio
+import bisect
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple
+
+import httpx
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+LabelValues = Tuple[str, ...]
+
+# Latência em segundos (rotas em memória respondem em < 1 ms)
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: Sequence[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labelnames, labels)} {_number(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [contagem por bucket..., soma, total]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        state = self._values.get(labels)
+        if state is None:
+            state = self._values[labels] = [0] * (len(self.buckets) + 2)
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            state[index] += 1
+        state[-2] += value
+        state[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, state in sorted(self._values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = _labels(self.labelnames, labels, f'le="{_number(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _labels(self.labelnames, labels, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {int(state[-1])}")
+            label_text = _labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_number(state[-2])}")
+            lines.append(f"{self.name}_count{label_text} {int(state[-1])}")
+        return lines
+
+
+class Registry:
+    """Conjunto de métricas exportadas em /metrics"""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# ============================================
+# MÉTRICAS DA APLICAÇÃO
+# ============================================
+
+registry = Registry()
+
+http_requests = registry.register(Counter(
+    "http_requests_total", "Requisições HTTP atendidas",
+    ("method", "route", "status"),
+))
+# Só por método: a rota só é conhecida depois que o Router casa a requisição
+http_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "Requisições HTTP em andamento",
+    ("method",),
+))
+http_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "Latência das requisições HTTP",
+    ("method", "route"),
+))
+http_response_size = registry.register(Histogram(
+    "http_response_size_bytes", "Tamanho do corpo das respostas HTTP",
+    ("method", "route"), buckets=SIZE_BUCKETS,
+))
+# outcome: status HTTP da resposta, ou timeout / transport_error /
+# cancelled / error quando não houve resposta
+supabase_latency = registry.register(Histogram(
+    "supabase_request_duration_seconds", "Latência das chamadas ao Supabase",
+    ("table", "operation", "outcome"),
+))
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+# ============================================
+# MIDDLEWARE HTTP
+# ============================================
+
+class MetricsMiddleware:
+    """Middleware ASGI: contagem, em andamento, latência e tamanho por rota"""
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    def _route_template(self, scope: Scope) -> str:
+        # O FastAPI grava a rota casada em scope["route"]; usa o template
+        # para não criar uma série por id
+        route = scope.get("route")
+        if route is not None:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+        if "endpoint" not in scope:
+            return UNMATCHED_ROUTE
+        # Rotas do Starlette (ex: /docs) não gravam a rota: casa de novo
+        for route in scope["app"].router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return getattr(route, "path", UNMATCHED_ROUTE)
+        return UNMATCHED_ROUTE
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = "500"
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        http_in_flight.inc(method)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # O Router preenche o scope durante a chamada
+            route = self._route_template(scope)
+            http_latency.observe(time.perf_counter() - start, method, route)
+            http_in_flight.dec(method)
+            http_requests.inc(method, route, status)
+            http_response_size.observe(size, method, route)
+
+
+# ============================================
+# CHAMADAS AO SUPABASE
+# ============================================
+
+def _operation(request: httpx.Request) -> Tuple[str, str]:
+    """(tabela ou função, operação) de uma requisição ao PostgREST"""
+    path = request.url.path.split("/rest/v1/", 1)[-1].strip("/")
+    if path.startswith("rpc/"):
+        return path[4:], "rpc"
+    method = request.method
+    if method == "POST":
+        prefer = request.headers.get("prefer", "")
+        return path, "upsert" if "resolution=" in prefer else "insert"
+    return path, {
+        "GET": "select", "HEAD": "select", "PATCH": "update", "DELETE": "delete",
+    }.get(method, method.lower())
+
+
+def error_outcome(exc: BaseException) -> str:
+    """Label outcome de uma chamada que terminou sem resposta"""
+    if isinstance(exc, (httpx.TimeoutException, TimeoutError)):
+        return "timeout"
+    if isinstance(exc, httpx.TransportError):
+        return "transport_error"
+    if isinstance(exc, asyncio.CancelledError):
+        # ex: asyncio.wait_for do guarded_call esgotou o timeout
+        return "cancelled"
+    return "error"
+
+
+class InstrumentedClient(httpx.AsyncClient):
+    """httpx.AsyncClient que mede toda chamada ao Supabase, com ou sem resposta"""
+
+    async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        outcome = "error"
+        start = time.perf_counter()
+        try:
+            # Mede até os cabeçalhos (o corpo do PostgREST é pequeno)
+            response = await super().send(request, **kwargs)
+            outcome = str(response.status_code)
+            return response
+        except BaseException as e:
+            outcome = error_outcome(e)
+            raise
+        finally:
+            table, operation = _operation(request)
+            supabase_latency.observe(time.perf_counter() - start, table, operation, outcome)
+
+
+@contextmanager
+def observe_supabase(table: str, operation: str) -> Iterator[None]:
+    """Mede uma chamada ao Supabase feita fora do httpx (ex: Auth síncrono)"""
+    outcome = "ok"
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        outcome = error_outcome(e)
+        raise
+    finally:
+        supabase_latency.observe(time.perf_counter() - start, table, operation, outcome)
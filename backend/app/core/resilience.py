@@ -0,0 +1,238 @@
+"""
+Proteção contra um Supabase lento: timeouts, circuit breaker e retries
+
+Cada operação de upstream (ex: "users.get", "progress.upsert_many") tem
+seu próprio CircuitBreaker:
+
+- closed: chamadas passam; BREAKER_FAILURE_THRESHOLD falhas transitórias
+  seguidas abrem o circuito
+- open: chamadas falham na hora com CircuitOpenError (sem esperar o
+  upstream) durante BREAKER_RESET_TIMEOUT segundos
+- half-open: passado esse tempo, uma chamada de teste decide se fecha ou
+  reabre o circuito
+
+`guarded_call` junta timeout por tentativa, breaker e retries limitados
+com backoff exponencial e jitter total (só para falhas transitórias e só
+quando a operação é idempotente). Erros de cliente (ex: chave duplicada)
+não contam como falha do upstream.
+
+Com o circuito aberto os serviços podem servir o último valor conhecido
+do cache (TTLCache.get_stale), marcado como desatualizado.
+"""
+
+import asyncio
+import logging
+import random
+import sqlite3
+import time
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+import httpx
+from postgrest.exceptions import APIError
+
+from app.core.config import get_settings
+from app.core.metrics import Counter, Gauge, Histogram, registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Classes de erro do Postgres que indicam problema no servidor, não na
+# requisição: 08 conexão, 53 recursos, 57 intervenção (ex: statement timeout)
+_TRANSIENT_PG_CLASSES = ("08", "53", "57")
+# Erros do PostgREST sem conexão com o banco (PGRST000..PGRST003)
+_TRANSIENT_PGRST = ("PGRST000", "PGRST001", "PGRST002", "PGRST003")
+
+breaker_state = registry.register(Gauge(
+    "circuit_breaker_state", "Estado do circuit breaker (0 fechado, 1 meio-aberto, 2 aberto)",
+    ("operation",),
+))
+breaker_rejections = registry.register(Counter(
+    "circuit_breaker_rejections_total", "Chamadas recusadas com o circuito aberto",
+    ("operation",),
+))
+# Por tentativa; outcome: ok, rejected (circuito aberto), timeout,
+# transient, client_error ou cancelled
+upstream_latency = registry.register(Histogram(
+    "upstream_call_duration_seconds", "Latência das operações de upstream por tentativa",
+    ("operation", "outcome"),
+))
+upstream_retries = registry.register(Counter(
+    "upstream_retries_total", "Novas tentativas após falha transitória",
+    ("operation",),
+))
+stale_responses = registry.register(Counter(
+    "stale_responses_total", "Respostas servidas com o último valor conhecido do cache",
+    ("operation",),
+))
+
+
+class UpstreamUnavailable(Exception):
+    """O upstream não respondeu a tempo ou o circuito está aberto"""
+    pass
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    """Chamada recusada sem ir ao upstream (circuito aberto)"""
+
+    def __init__(self, operation: str, retry_after: float):
+        super().__init__(f"Circuito aberto para {operation}")
+        self.operation = operation
+        self.retry_after = retry_after
+
+
+def is_transient(exc: BaseException) -> bool:
+    """Falha do upstream (vale retry e conta para o breaker)?"""
+    if isinstance(exc, (asyncio.TimeoutError, httpx.TransportError, ConnectionError)):
+        return True
+    if isinstance(exc, sqlite3.OperationalError):  # ex: database is locked
+        return True
+    if isinstance(exc, APIError):
+        code = exc.code or ""
+        return code in _TRANSIENT_PGRST or code[:2] in _TRANSIENT_PG_CLASSES
+    return False
+
+
+class CircuitBreaker:
+    """Breaker de uma operação de upstream (tudo no event loop, sem travas)"""
+
+    def __init__(self, operation: str, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.operation = operation
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        breaker_state.inc(operation, amount=0)
+
+    def _set_state(self, state: str) -> None:
+        if state == self.state:
+            return
+        breaker_state.inc(
+            self.operation, amount=_STATE_VALUES[state] - _STATE_VALUES[self.state]
+        )
+        logger.warning("⚡ Circuit breaker mudou de estado", extra={
+            "operation": self.operation, "from": self.state, "to": state,
+        })
+        self.state = state
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def before_call(self) -> None:
+        """Levanta CircuitOpenError se a chamada não deve ir ao upstream"""
+        if self.state == OPEN:
+            if self.retry_after() > 0:
+                breaker_rejections.inc(self.operation)
+                raise CircuitOpenError(self.operation, self.retry_after())
+            self._set_state(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            if self._probe_in_flight:
+                breaker_rejections.inc(self.operation)
+                raise CircuitOpenError(self.operation, self.reset_timeout)
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        self._probe_in_flight = False
+        self.failures = 0
+        self._set_state(CLOSED)
+
+    def record_failure(self) -> None:
+        self._probe_in_flight = False
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+            self._set_state(OPEN)
+
+    def release(self) -> None:
+        """Chamada terminou sem veredito (erro de cliente ou cancelamento)"""
+        self._probe_in_flight = False
+
+
+_breakers: Dict[str, CircuitBreaker] = {}
+
+
+def breaker_for(operation: str) -> CircuitBreaker:
+    """Breaker da operação (criado no primeiro uso)"""
+    breaker = _breakers.get(operation)
+    if breaker is None:
+        settings = get_settings()
+        breaker = _breakers[operation] = CircuitBreaker(
+            operation,
+            failure_threshold=settings.breaker_failure_threshold,
+            reset_timeout=settings.breaker_reset_timeout,
+        )
+    return breaker
+
+
+async def _timed(operation: str, call: Awaitable[T]) -> T:
+    """Aguarda uma tentativa e registra a duração com o desfecho"""
+    outcome = "cancelled"
+    start = time.perf_counter()
+    try:
+        result = await call
+        outcome = "ok"
+        return result
+    except Exception as e:
+        if not is_transient(e):
+            outcome = "client_error"
+        elif isinstance(e, asyncio.TimeoutError):
+            outcome = "timeout"
+        else:
+            outcome = "transient"
+        raise
+    finally:
+        upstream_latency.observe(time.perf_counter() - start, operation, outcome)
+
+
+async def guarded_call(
+    operation: str,
+    fn: Callable[[], Awaitable[T]],
+    *,
+    timeout: Optional[float] = None,
+    retries: Optional[int] = None,
+    idempotent: bool = True,
+) -> T:
+    """
+    Chama o upstream com breaker, timeout por tentativa e retries com jitter
+
+    timeout=None usa UPSTREAM_TIMEOUT (0 desativa); retries só se idempotent.
+    Falhas transitórias esgotadas viram UpstreamUnavailable.
+    """
+    settings = get_settings()
+    if timeout is None:
+        timeout = settings.upstream_timeout
+    attempts = 1 + ((settings.upstream_retries if retries is None else retries)
+                    if idempotent else 0)
+    breaker = breaker_for(operation)
+
+    for attempt in range(attempts):
+        try:
+            breaker.before_call()
+        except CircuitOpenError:
+            upstream_latency.observe(0.0, operation, "rejected")
+            raise
+        try:
+            result = await _timed(
+                operation, asyncio.wait_for(fn(), timeout) if timeout else fn()
+            )
+        except Exception as e:
+            if not is_transient(e):
+                breaker.release()
+                raise
+            breaker.record_failure()
+            if attempt + 1 >= attempts or breaker.state == OPEN:
+                raise UpstreamUnavailable(f"{operation}: {e!r}") from e
+            upstream_retries.inc(operation)
+            # Backoff exponencial com jitter total
+            await asyncio.sleep(random.uniform(0, settings.upstream_backoff * 2 ** attempt))
+        except BaseException:
+            breaker.release()
+            raise
+        else:
+            breaker.record_success()
+            return result
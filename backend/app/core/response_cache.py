@@ -0,0 +1,155 @@
+"""
+Cache de respostas pré-serializadas com ETag forte
+
+Guarda os bytes JSON finais por (rota, chave) para que o conteúdo
+estático do catálogo seja serializado uma única vez por carga de
+conteúdo. Clientes que reenviam o ETag em If-None-Match recebem
+304 Not Modified sem corpo.
+
+Na mesma serialização o corpo é comprimido (gzip e, se disponível,
+brotli) e a variante aceita pelo cliente em Accept-Encoding é servida
+direto, sem recomprimir a cada requisição. Cada variante tem seu próprio
+ETag forte (o hash seguido da codificação), como pede a RFC 9110.
+
+O loader faz a busca do objeto (e levanta 404 se não existir): a
+geração do cache é lida antes dele, então um objeto buscado no catálogo
+antigo nunca fica guardado na geração de um recarregamento.
+"""
+
+import hashlib
+import inspect
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple, Optional, Tuple, Union
+
+import orjson
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+from app.core.compression import negotiate, precompress
+
+
+CACHE_CONTROL = "public, max-age=0, must-revalidate"
+
+Loader = Callable[[], Union[Any, Awaitable[Any]]]
+
+
+class CachedResponse(NamedTuple):
+    """Corpo JSON pronto, o ETag correspondente e as variantes comprimidas"""
+    body: bytes
+    etag: str
+    variants: Dict[str, bytes]
+
+    def representation(self, encoding: Optional[str]) -> Tuple[bytes, str]:
+        """(corpo, ETag) da variante pedida"""
+        if encoding is None:
+            return self.body, self.etag
+        return self.variants[encoding], variant_etag(self.etag, encoding)
+
+    def matches(self, if_none_match: str) -> bool:
+        """If-None-Match casa com qualquer variante (o conteúdo é o mesmo)"""
+        return any(
+            etag_matches(if_none_match, etag)
+            for etag in (self.etag, *(variant_etag(self.etag, e) for e in self.variants))
+        )
+
+
+def serialize(obj: Any) -> bytes:
+    """Serializa modelos pydantic, dicts já projetados ou listas deles"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump_json().encode()
+    if isinstance(obj, dict):
+        return orjson.dumps(obj)
+    if isinstance(obj, (list, tuple)):
+        return b"[" + b",".join(serialize(item) for item in obj) + b"]"
+    raise TypeError(f"Tipo não suportado pelo cache: {type(obj).__name__}")
+
+
+def make_etag(body: bytes) -> str:
+    """ETag forte derivado do conteúdo"""
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def variant_etag(etag: str, encoding: str) -> str:
+    """ETag da variante comprimida: '"hash"' -> '"hash-gzip"'"""
+    return f'{etag[:-1]}-{encoding}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Compara If-None-Match com o ETag (comparação fraca, RFC 9110)"""
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+class ResponseCache:
+    """Cache em memória de respostas JSON prontas"""
+
+    def __init__(self):
+        self._entries: Dict[Tuple[str, Hashable], CachedResponse] = {}
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    async def get(self, route: str, key: Hashable, loader: Loader) -> CachedResponse:
+        """Retorna a entrada do cache, buscando e serializando via loader na primeira vez"""
+        cache_key = (route, key)
+        entry = self._entries.get(cache_key)
+        if entry is not None:
+            return entry
+
+        # Antes da busca: um recarregamento no meio muda a geração
+        generation = self._generation
+        value = loader()
+        if inspect.isawaitable(value):
+            value = await value
+        body = serialize(value)
+        entry = CachedResponse(body=body, etag=make_etag(body), variants=precompress(body))
+        with self._lock:
+            # Não grava se o conteúdo foi recarregado durante a serialização
+            if generation == self._generation:
+                self._entries[cache_key] = entry
+        return entry
+
+    async def respond(
+        self,
+        request: Request,
+        route: str,
+        key: Hashable,
+        loader: Loader,
+    ) -> Response:
+        """Monta a resposta HTTP (200 com corpo ou 304) a partir do cache"""
+        entry = await self.get(route, key, loader)
+        encoding = negotiate(request.headers.get("accept-encoding"), entry.variants)
+        body, etag = entry.representation(encoding)
+        headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "Accept-Encoding"}
+        if encoding is not None:
+            headers["Content-Encoding"] = encoding
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and entry.matches(if_none_match):
+            headers.pop("Content-Encoding", None)
+            return Response(status_code=304, headers=headers)
+
+        return Response(
+            content=body,
+            media_type="application/json",
+            headers=headers
+        )
+
+    def invalidate(self) -> None:
+        """Descarta todas as entradas (chamado ao recarregar o conteúdo)"""
+        with self._lock:
+            self._generation += 1
+            self._entries = {}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Singleton instance
+response_cache = ResponseCache()
@@ -0,0 +1,29 @@
+"""
+Respostas JSON rápidas
+
+A API usa ORJSONResponse como classe padrão (ver app.main). Para objetos
+que o servidor já validou (os modelos congelados do catálogo e os que os
+serviços montam), TrustedJSONResponse serializa direto com o pydantic-core,
+sem passar pela revalidação do response_model nem pelo jsonable_encoder.
+O response_model continua declarado na rota, então o schema do OpenAPI
+não muda.
+
+    @router.get("/lessons/{lesson_id}/next", response_model=Lesson)
+    async def get_next_lesson(...):
+        return TrustedJSONResponse(await lesson_service.get_next_lesson(...))
+"""
+
+from typing import Any
+
+from fastapi import Response
+
+from app.core.response_cache import serialize
+
+
+class TrustedJSONResponse(Response):
+    """Resposta JSON para modelos já validados (ou listas/dicts deles)"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return serialize(content)
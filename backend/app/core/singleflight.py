@@ -0,0 +1,96 @@
+"""
+Single-flight: leituras idênticas e concorrentes compartilham uma chamada
+
+Quando várias requisições pedem a mesma chave ao mesmo tempo (ex: uma
+turma inteira abrindo o app no início da aula), só a primeira chama o
+backend; as demais esperam o mesmo resultado. Se a chamada falhar, todas
+recebem a mesma exceção.
+
+Escritas chamam forget(key) depois de gravar: a chamada em andamento
+sai do grupo e fica marcada como anterior à escrita. Quem estava
+esperando por ela (inclusive quem entrou durante a escrita) descarta o
+resultado e lê de novo, uma vez, numa chamada nova.
+
+O timeout é por chave: vale para a chamada compartilhada, então todas
+as requisições esperando aquela chave recebem o mesmo TimeoutError. O
+cancelamento de uma requisição (cliente desconectou) não cancela a
+chamada dos demais.
+
+    flight = SingleFlight("users")
+    row = await flight.do(("get", user_id), lambda: repo.get(user_id), timeout=5)
+
+Métrica: singleflight_calls_total{group, role} com role=leader (foi ao
+backend), coalesced (aproveitou uma chamada em andamento) ou reread
+(descartou uma chamada anterior a uma escrita).
+"""
+
+import asyncio
+import weakref
+from typing import Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+from app.core.metrics import Counter, registry
+
+T = TypeVar("T")
+
+singleflight_calls = registry.register(Counter(
+    "singleflight_calls_total", "Leituras por papel no single-flight",
+    ("group", "role"),
+))
+
+
+def _consume_exception(task: "asyncio.Task") -> None:
+    # Evita o aviso "exception was never retrieved" se todos desistiram
+    if not task.cancelled():
+        task.exception()
+
+
+class SingleFlight:
+    """Grupo de chamadas deduplicadas por chave"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: Dict[Hashable, "asyncio.Task"] = {}
+        # Chamadas esquecidas por uma escrita enquanto estavam em andamento
+        self._superseded: "weakref.WeakSet[asyncio.Task]" = weakref.WeakSet()
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[T]],
+        timeout: Optional[float] = None,
+    ) -> T:
+        """Executa fn() para a chave, ou espera a execução já em andamento"""
+        task = self._join(key, fn, timeout)
+        result = await asyncio.shield(task)
+        if task in self._superseded:
+            singleflight_calls.inc(self.name, "reread")
+            result = await asyncio.shield(self._join(key, fn, timeout))
+        return result
+
+    def _join(
+        self, key: Hashable, fn: Callable[[], Awaitable[T]], timeout: Optional[float]
+    ) -> "asyncio.Task":
+        task = self._calls.get(key)
+        if task is None:
+            awaitable = fn() if timeout is None else asyncio.wait_for(fn(), timeout)
+            task = asyncio.ensure_future(awaitable)
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+            singleflight_calls.inc(self.name, "leader")
+        else:
+            singleflight_calls.inc(self.name, "coalesced")
+        return task
+
+    def _finish(self, key: Hashable, task: "asyncio.Task") -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        _consume_exception(task)
+
+    def forget(self, key: Hashable) -> None:
+        """Depois de uma escrita: a chamada em andamento não serve mais a ninguém"""
+        task = self._calls.pop(key, None)
+        if task is not None and not task.done():
+            self._superseded.add(task)
+
+    def __len__(self) -> int:
+        return len(self._calls)
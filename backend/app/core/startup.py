@@ -0,0 +1,137 @@
+"""
+Relatório de tempo de inicialização
+
+Mede quanto cada módulo do pacote app leva para ser importado (tempo
+próprio, sem contar os submódulos que ele importa) e quanto cada fase
+do lifespan leva (replay do journal, warm start do leaderboard...).
+O main importa este módulo antes de tudo, para que o hook de import já
+esteja instalado quando as rotas e serviços forem carregados.
+"""
+
+import importlib.abc
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+class _TimedLoader(importlib.abc.Loader):
+    """Envolve o loader original e mede exec_module"""
+
+    def __init__(self, loader: importlib.abc.Loader, report: "StartupReport"):
+        self._loader = loader
+        self._report = report
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        self._report._enter()
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._report._exit(module.__name__, time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class _ImportTimer(importlib.abc.MetaPathFinder):
+    """Finder que só intercepta módulos com o prefixo dado"""
+
+    def __init__(self, report: "StartupReport", prefix: str):
+        self._report = report
+        self._prefix = prefix
+        self._resolving = False
+
+    def find_spec(self, fullname, path, target=None):
+        if self._resolving or not fullname.startswith(self._prefix):
+            return None
+        self._resolving = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self:
+                    continue
+                find_spec = getattr(finder, "find_spec", None)
+                spec = find_spec(fullname, path, target) if find_spec else None
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._resolving = False
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self._report)
+        return spec
+
+
+class StartupReport:
+    """Tempos de import por módulo e de cada fase do cold start"""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.imports: Dict[str, float] = {}  # módulo -> tempo próprio (s)
+        self.phases: List[Tuple[str, float]] = []
+        self._children: List[float] = []
+        self._finder: Optional[_ImportTimer] = None
+
+    def install(self, prefix: str = "app.") -> None:
+        """Passa a medir os imports de módulos com o prefixo"""
+        if self._finder is None:
+            self._finder = _ImportTimer(self, prefix)
+            sys.meta_path.insert(0, self._finder)
+
+    def uninstall(self) -> None:
+        if self._finder is not None:
+            sys.meta_path.remove(self._finder)
+            self._finder = None
+
+    def _enter(self) -> None:
+        self._children.append(0.0)
+
+    def _exit(self, name: str, elapsed: float) -> None:
+        nested = self._children.pop()
+        self.imports[name] = elapsed - nested
+        if self._children:
+            self._children[-1] += elapsed
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Mede uma fase da inicialização"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def as_dict(self, top: Optional[int] = None) -> dict:
+        imports = sorted(self.imports.items(), key=lambda item: item[1], reverse=True)
+        return {
+            "total_ms": round((time.perf_counter() - self.started_at) * 1000, 1),
+            "imports_ms": round(sum(self.imports.values()) * 1000, 1),
+            "slowest_imports": [
+                {"module": name, "ms": round(seconds * 1000, 2)}
+                for name, seconds in imports[:top]
+            ],
+            "phases": [
+                {"phase": name, "ms": round(seconds * 1000, 2)}
+                for name, seconds in self.phases
+            ],
+        }
+
+    def format(self, top: int = 10) -> str:
+        report = self.as_dict(top)
+        lines = [
+            f"⏱️ Inicialização: {report['total_ms']} ms "
+            f"(imports do app: {report['imports_ms']} ms)"
+        ]
+        for item in report["slowest_imports"]:
+            lines.append(f"   {item['ms']:>8.2f} ms  import {item['module']}")
+        for item in report["phases"]:
+            lines.append(f"   {item['ms']:>8.2f} ms  {item['phase']}")
+        return "\n".join(lines)
+
+
+# Singleton instance
+startup_report = StartupReport()
@@ -2,13 +2,105 @@
 Servidor principal da API DAXVengers
 """
 
+# Primeiro import: mede o custo de import dos módulos abaixo
+from app.core.startup import startup_report
+startup_report.install()
+
+import asyncio
+import logging
+import math
+import os
+from contextlib import asynccontextmanager, suppress
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
 import uvicorn
 
 # Importar rotas
+from app.api.events import router as events_router
 from app.api.lessons import router as lessons_router
+from app.api.users import router as users_router
+from app.core.compression import CompressionMiddleware
+from app.core.config import get_settings
+from app.core.database import db
+from app.core.log import setup_logging, shutdown_logging
+from app.core.metrics import MetricsMiddleware, registry
+from app.core.resilience import CircuitOpenError, UpstreamUnavailable
+from app.repositories import repositories
+from app.services.leaderboard import leaderboard
+from app.services.lesson_service import lesson_service
+from app.services.progress_journal import progress_journal
+
+startup_report.uninstall()
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Intervalo (segundos) para checar mudanças no conteúdo; 0 desativa
+CONTENT_RELOAD_INTERVAL = float(os.getenv("CONTENT_RELOAD_INTERVAL", "2"))
+
+
+# ============================================
+# STARTUP/SHUTDOWN (LIFESPAN)
+# ============================================
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicializa os recursos compartilhados e os libera no desligamento"""
+    settings = get_settings()
+    # Idempotente: reinstala o logging se um ciclo anterior o encerrou
+    setup_logging()
+    
+    with startup_report.phase("replay do journal de progresso"):
+        replayed = progress_journal.replay()
+    if replayed:
+        logger.info("📝 Progresso reaplicado do journal", extra={"updates": replayed})
+    progress_flusher = asyncio.create_task(progress_journal.run())
+    
+    try:
+        with startup_report.phase("warm start do leaderboard"):
+            players = await leaderboard.warm_start()
+        logger.info("🏆 Leaderboard carregado", extra={"players": players})
+    except Exception as e:
+        logger.error("❌ Erro ao carregar leaderboard", extra={"error": str(e)})
+    
+    content_watcher = None
+    if CONTENT_RELOAD_INTERVAL > 0:
+        content_watcher = asyncio.create_task(
+            lesson_service.watch_content(CONTENT_RELOAD_INTERVAL)
+        )
+    
+    # Cliente do banco compartilhado (o pool HTTP é aberto no primeiro uso)
+    app.state.db = db
+    app.state.repositories = repositories
+    app.state.startup_report = startup_report.as_dict(settings.startup_report_top)
+    
+    logger.info("🚀 DAXVengers API iniciada!", extra={
+        "storage": repositories.name,
+        "lessons": lesson_service.total_lessons,
+        "docs": "http://localhost:8000/docs",
+    })
+    if settings.startup_report:
+        logger.info(startup_report.format(settings.startup_report_top),
+                    extra={"startup": app.state.startup_report})
+    
+    try:
+        yield
+    finally:
+        if content_watcher:
+            content_watcher.cancel()
+        # Espera o flusher parar: um lote interrompido volta para a fila
+        # antes do flush final
+        progress_flusher.cancel()
+        with suppress(asyncio.CancelledError):
+            await progress_flusher
+        await progress_journal.close()
+        await repositories.close()
+        await db.close()
+        logger.info("👋 DAXVengers API encerrada")
+        shutdown_logging()
+
 
 # Criar app FastAPI
 app = FastAPI(
@@ -16,7 +108,9 @@ app = FastAPI(
     description="API para o jogo gamificado de aprendizado de Power BI e DAX",
     version="1.0.0",
     docs_url="/docs",  # Swagger UI
-    redoc_url="/redoc"  # ReDoc
+    redoc_url="/redoc",  # ReDoc
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Configurar CORS para permitir frontend
@@ -34,8 +128,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compressão das respostas dinâmicas (as do catálogo já vêm pré-comprimidas)
+app.add_middleware(CompressionMiddleware)
+
+# Métricas por rota (adicionado por último = camada mais externa)
+app.add_middleware(MetricsMiddleware)
+
 # Incluir rotas
 app.include_router(lessons_router)
+app.include_router(users_router)
+app.include_router(events_router)
 
 
 # ============================================
@@ -57,6 +159,19 @@ async def root():
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Métricas no formato texto do Prometheus
+    
+    Requisições, em andamento, latência e tamanho de resposta por rota,
+    e latência das chamadas ao Supabase por tabela/operação
+    """
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
 # ============================================
 # TRATAMENTO DE ERROS
 # ============================================
@@ -74,6 +189,20 @@ async def not_found_handler(request, exc):
     )
 
 
+@app.exception_handler(UpstreamUnavailable)
+async def upstream_unavailable_handler(request, exc):
+    """Supabase fora (timeout ou circuito aberto) e sem valor em cache: 503"""
+    retry_after = exc.retry_after if isinstance(exc, CircuitOpenError) else 5
+    return JSONResponse(
+        status_code=503,
+        content={
+            "error": "Service Unavailable",
+            "message": "Banco de dados temporariamente indisponível, tente novamente",
+        },
+        headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+    )
+
+
 @app.exception_handler(500)
 async def internal_error_handler(request, exc):
     """Handler para erros 500"""
@@ -87,25 +216,6 @@ async def internal_error_handler(request, exc):
     )
 
 
-# ============================================
-# STARTUP/SHUTDOWN EVENTS
-# ============================================
-
-@app.on_event("startup")
-async def startup_event():
-    """Executado quando o servidor inicia"""
-    print("🚀 DAXVengers API iniciada!")
-    print("📚 Lições carregadas com sucesso")
-    print("🌐 Servidor rodando em: http://localhost:8000")
-    print("📖 Documentação em: http://localhost:8000/docs")
-
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Executado quando o servidor desliga"""
-    print("👋 DAXVengers API encerrada")
-
-
 # ============================================
 # EXECUTAR SERVIDOR
 # ============================================
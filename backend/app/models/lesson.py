@@ -1,11 +1,19 @@
 """
 Modelos de dados para lições, missões e progresso do usuário
+
+Os modelos do catálogo (Exercise, Lesson, LessonSummary, Mission,
+MissionSummary) são congelados: são validados uma vez na carga do
+conteúdo e compartilhados entre requisições, então as rotas podem
+serializá-los direto (ver app.core.responses.TrustedJSONResponse).
 """
 
+import base64
 from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from typing import Iterable, List, Optional, Dict, Any
 from enum import Enum
 
+from app.models.user_models import UserResponse
+
 
 class ExerciseType(str, Enum):
     """Tipos de exercícios disponíveis"""
@@ -30,12 +38,15 @@ class Exercise(BaseModel):
     question: str
     options: Optional[List[str]] = None  # Para multiple choice
     correct: Optional[int] = None  # Índice da resposta correta
-    solution: Optional[str] = None  # Para exercícios de código
+    # Para exercícios de código; só o servidor usa (corrigido em
+    # /exercises/{i}/grade), nunca vai no JSON da lição
+    solution: Optional[str] = Field(default=None, exclude=True)
     hints: List[str] = Field(default_factory=list)
     explanation: str
     xp_reward: int = 10
 
     class Config:
+        frozen = True
         schema_extra = {
             "example": {
                 "type": "multiple_choice",
@@ -77,6 +88,7 @@ class Lesson(BaseModel):
     prerequisites: List[int] = Field(default_factory=list)
     
     class Config:
+        frozen = True
         schema_extra = {
             "example": {
                 "id": 1,
@@ -95,6 +107,26 @@ class Lesson(BaseModel):
         }
 
 
+class LessonSummary(BaseModel):
+    """Resumo leve de uma lição (sem teoria nem exercícios) para listas"""
+    id: int
+    title: str
+    icon: str
+    xp: int
+    type: LessonType = LessonType.THEORY
+    mission_id: str
+    order: int
+    estimated_time: int = 5
+    prerequisites: List[int] = Field(default_factory=list)
+
+    class Config:
+        frozen = True
+
+    @classmethod
+    def from_lesson(cls, lesson: "Lesson") -> "LessonSummary":
+        return cls(**lesson.model_dump(include=set(cls.model_fields)))
+
+
 class Mission(BaseModel):
     """Modelo de uma missão (conjunto de lições)"""
     id: str
@@ -108,6 +140,7 @@ class Mission(BaseModel):
     badge_reward: Optional[str] = None
     
     class Config:
+        frozen = True
         schema_extra = {
             "example": {
                 "id": "dax-basics",
@@ -123,16 +156,106 @@ class Mission(BaseModel):
         }
 
 
+class MissionSummary(BaseModel):
+    """Resumo leve de uma missão para listas"""
+    id: str
+    name: str
+    icon: str
+    total_lessons: int
+    total_xp: int
+    is_free: bool = True
+    order: int
+
+    class Config:
+        frozen = True
+
+    @classmethod
+    def from_mission(cls, mission: Mission) -> "MissionSummary":
+        return cls(**mission.model_dump(include=set(cls.model_fields)))
+
+
+class LessonBitmap(BaseModel):
+    """
+    Conjunto de lições em formato compacto
+    
+    O bit i (a partir de offset) representa a lição de id offset + i;
+    bits é o bitset em bytes little-endian codificado em base64. Uma
+    missão de 64 lições ocupa no máximo 12 caracteres, seja qual for o
+    número de lições completadas.
+    """
+    offset: int = 0
+    bits: str = ""
+    count: int = 0
+
+    @classmethod
+    def from_mask(cls, mask: int) -> "LessonBitmap":
+        """Converte um bitset (bit id = lição id) para o formato compacto"""
+        if not mask:
+            return cls()
+        # Offset alinhado ao byte da menor lição presente
+        offset = ((mask & -mask).bit_length() - 1) & ~7
+        shifted = mask >> offset
+        raw = shifted.to_bytes((shifted.bit_length() + 7) // 8, "little")
+        return cls(
+            offset=offset,
+            bits=base64.b64encode(raw).decode("ascii"),
+            count=mask.bit_count()
+        )
+
+    @classmethod
+    def from_ids(cls, lesson_ids: Iterable[int]) -> "LessonBitmap":
+        mask = 0
+        for lesson_id in lesson_ids:
+            mask |= 1 << lesson_id
+        return cls.from_mask(mask)
+
+    def to_mask(self) -> int:
+        """Bitset equivalente (bit id = lição id)"""
+        if not self.bits:
+            return 0
+        return int.from_bytes(base64.b64decode(self.bits), "little") << self.offset
+
+    def to_ids(self) -> List[int]:
+        mask = self.to_mask()
+        ids = []
+        while mask:
+            low = mask & -mask
+            ids.append(low.bit_length() - 1)
+            mask ^= low
+        return ids
+
+    class Config:
+        schema_extra = {
+            "example": {"offset": 0, "bits": "Dg==", "count": 3}
+        }
+
+
 class UserProgress(BaseModel):
     """Modelo de progresso do usuário"""
     user_id: str
     mission_id: str
-    completed_lessons: List[int] = Field(default_factory=list)
+    # None quando o progresso vem no formato bitmap
+    completed_lessons: Optional[List[int]] = Field(default_factory=list)
+    # Alternativa compacta a completed_lessons (GET ...?format=bitmap)
+    completed_bitmap: Optional[LessonBitmap] = None
     current_lesson: int = 1
     total_xp: int = 0
     streak_days: int = 0
     last_activity: Optional[str] = None
     
+    def completed_mask(self) -> int:
+        """Lições completadas como bitset, venha de qual formato vier"""
+        if self.completed_bitmap is not None:
+            return self.completed_bitmap.to_mask()
+        return LessonBitmap.from_ids(self.completed_lessons or ()).to_mask()
+    
+    def as_bitmap(self) -> "UserProgress":
+        """Cópia com completed_lessons trocado pelo bitmap compacto"""
+        return self.model_copy(update={
+            "completed_lessons": None,
+            "completed_bitmap": LessonBitmap.from_mask(self.completed_mask())
+        })
+    
     class Config:
         schema_extra = {
             "example": {
@@ -150,7 +273,7 @@ class UserProgress(BaseModel):
 class ProgressUpdate(BaseModel):
     """Modelo para atualizar progresso"""
     user_id: str
-    lesson_id: int
+    lesson_id: int = Field(..., ge=0)  # vira bit no LessonBitmap
     xp_earned: int
     completed: bool = True
     time_spent: Optional[int] = None  # segundos
@@ -167,6 +290,78 @@ class ProgressUpdate(BaseModel):
         }
 
 
+class UnlockedLessons(BaseModel):
+    """Lições liberadas para o usuário, segundo o grafo de pré-requisitos"""
+    user_id: str
+    mission_id: Optional[str] = None
+    completed: List[int] = Field(default_factory=list)
+    unlocked: List[int] = Field(default_factory=list)  # completadas + disponíveis
+    available: List[int] = Field(default_factory=list)  # liberadas e ainda não feitas
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "user_id": "user123",
+                "mission_id": "dax-basics",
+                "completed": [1, 2],
+                "unlocked": [1, 2, 3],
+                "available": [3]
+            }
+        }
+
+
+class ProgressBatch(BaseModel):
+    """Várias atualizações de progresso enviadas de uma vez (ex: após ficar offline)"""
+    updates: List[ProgressUpdate] = Field(..., min_length=1, max_length=500)
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "updates": [
+                    {"user_id": "user123", "lesson_id": 1, "xp_earned": 50, "completed": True},
+                    {"user_id": "user123", "lesson_id": 2, "xp_earned": 50, "completed": True}
+                ]
+            }
+        }
+
+
+class ProgressItemResult(BaseModel):
+    """Resultado de um item do lote de progresso"""
+    index: int
+    user_id: str
+    lesson_id: int
+    success: bool
+    status_code: int = 200
+    error: Optional[str] = None
+
+
+class ProgressBatchResult(BaseModel):
+    """Resposta do envio em lote de progresso"""
+    accepted: int
+    rejected: int
+    results: List[ProgressItemResult]
+
+
+class GradeRequest(BaseModel):
+    """Resposta enviada pelo aluno para correção"""
+    answer: str = Field(..., max_length=4000)
+
+    class Config:
+        schema_extra = {
+            "example": {
+                "answer": "Receita Total = SUM(Financeiro[Receita])"
+            }
+        }
+
+
+class GradeResult(BaseModel):
+    """Resultado da correção de um exercício"""
+    correct: bool
+    xp_reward: int = 0
+    explanation: Optional[str] = None
+    syntax_error: Optional[str] = None
+
+
 class Badge(BaseModel):
     """Modelo de badge/conquista"""
     id: str
@@ -212,4 +407,13 @@ class LeaderboardEntry(BaseModel):
                 "badges": ["iron_man", "captain_america"],
                 "rank": 1
             }
-        }
\ No newline at end of file
+        }
+
+
+class DashboardBootstrap(BaseModel):
+    """Tudo que o Dashboard precisa na primeira renderização, numa resposta só"""
+    user: Optional[UserResponse] = None  # None se o perfil ainda não existe
+    missions: List[Mission]
+    progress: UserProgress
+    leaderboard: List[LeaderboardEntry]
+    rank: Optional[LeaderboardEntry] = None  # posição do próprio usuário
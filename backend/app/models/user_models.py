@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Any, Dict, Optional
 from datetime import datetime
 
 class UserCreate(BaseModel):
@@ -28,4 +28,20 @@ class UserUpdate(BaseModel):
 
 class LoginRequest(BaseModel):
     email: str
-    password: str
\ No newline at end of file
+    password: str
+
+class AuthenticatedUser(BaseModel):
+    """Usuário de um access token do Supabase já verificado (ver app.core.auth)"""
+    user_id: str
+    email: Optional[str] = None
+    role: Optional[str] = None
+    expires_at: Optional[int] = None
+
+    @classmethod
+    def from_claims(cls, claims: Dict[str, Any]) -> "AuthenticatedUser":
+        return cls(
+            user_id=claims["sub"],
+            email=claims.get("email"),
+            role=claims.get("role"),
+            expires_at=claims.get("exp"),
+        )
\ No newline at end of file
@@ -0,0 +1,59 @@
+"""
+Camada de persistência plugável
+
+STORAGE_BACKEND escolhe a implementação:
+- supabase (padrão): tabelas do Supabase via PostgREST
+- sqlite: arquivo SQLite local (SQLITE_PATH), sem ida à rede
+
+Toda operação passa por timeout, circuit breaker e retries (ver
+app.repositories.guarded) e, com SINGLEFLIGHT_ENABLED (padrão), as
+leituras passam pelo single-flight (ver app.repositories.coalescing).
+
+    from app.repositories import repositories
+
+    user = await repositories.users.get(user_id)
+"""
+
+import os
+
+from app.core.config import get_settings
+from app.repositories.base import (
+    LeaderboardRepository, ProgressRepository, Repositories, RepositoryError,
+    UserRepository,
+)
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+
+
+def create_repositories(backend: str = STORAGE_BACKEND) -> Repositories:
+    """Instancia os repositórios do backend pedido"""
+    if backend == "supabase":
+        from app.repositories.supabase import SupabaseRepositories
+        selected: Repositories = SupabaseRepositories()
+    elif backend == "sqlite":
+        from app.repositories.sqlite import SQLiteRepositories
+        selected = SQLiteRepositories()
+    else:
+        raise ValueError(f"STORAGE_BACKEND inválido: {backend!r} (use 'supabase' ou 'sqlite')")
+    
+    # Coalescing por fora: N leituras idênticas = uma chamada protegida
+    from app.repositories.guarded import GuardedRepositories
+    selected = GuardedRepositories(selected)
+    if get_settings().singleflight_enabled:
+        from app.repositories.coalescing import CoalescingRepositories
+        return CoalescingRepositories(selected)
+    return selected
+
+
+# Singleton instance
+repositories = create_repositories()
+
+__all__ = [
+    "LeaderboardRepository",
+    "ProgressRepository",
+    "Repositories",
+    "RepositoryError",
+    "UserRepository",
+    "create_repositories",
+    "repositories",
+]
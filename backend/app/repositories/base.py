@@ -0,0 +1,78 @@
+"""
+Interfaces de persistência (usuários, progresso e leaderboard)
+
+Os serviços falam só com estas interfaces; a implementação concreta
+(Supabase ou SQLite) é escolhida por STORAGE_BACKEND em
+app.repositories. As linhas trafegam como dicts com as mesmas colunas
+das tabelas users e user_progress.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+Row = Dict[str, Any]
+
+
+class RepositoryError(Exception):
+    """Falha na camada de persistência (ex: chave duplicada)"""
+
+
+class UserRepository(ABC):
+    """Perfis da tabela users"""
+
+    @abstractmethod
+    async def get(self, user_id: str) -> Optional[Row]:
+        """Perfil do usuário, ou None se não existir"""
+
+    @abstractmethod
+    async def create(self, profile: Row) -> Row:
+        """Insere um perfil; RepositoryError se o id já existir"""
+
+    @abstractmethod
+    async def add_xp(self, user_id: str, xp: int, coins: int = 0) -> Optional[Row]:
+        """Incremento atômico de XP/moedas com recálculo do nível"""
+
+    @abstractmethod
+    async def count(self) -> int:
+        """Total de usuários"""
+
+
+class ProgressRepository(ABC):
+    """Linhas de user_progress, uma por (usuário, lição)"""
+
+    @abstractmethod
+    async def upsert_many(self, rows: List[Row]) -> None:
+        """Grava um lote numa única operação (upsert por user_id, lesson_id)"""
+
+    @abstractmethod
+    async def completed_lesson_ids(self, user_id: str) -> List[int]:
+        """Ids das lições completadas pelo usuário"""
+
+    @abstractmethod
+    async def delete(self, user_id: str, lesson_ids: List[int]) -> int:
+        """Apaga o progresso do usuário nessas lições; retorna quantas linhas"""
+
+
+class LeaderboardRepository(ABC):
+    """Leituras em massa para o warm start do leaderboard"""
+
+    @abstractmethod
+    async def players(self) -> List[Row]:
+        """id, username, xp e streak_days de todos os usuários, por XP decrescente"""
+
+    @abstractmethod
+    async def completed_lessons(self) -> List[Tuple[str, int]]:
+        """Todos os pares (user_id, lesson_id) completados"""
+
+
+class Repositories:
+    """Conjunto de repositórios de um backend de armazenamento"""
+
+    name = "base"
+
+    users: UserRepository
+    progress: ProgressRepository
+    leaderboard: LeaderboardRepository
+
+    async def close(self) -> None:
+        """Libera conexões e threads do backend (o cliente Supabase é fechado à parte)"""
@@ -0,0 +1,121 @@
+"""
+Repositórios com single-flight nas leituras
+
+Envolve os repositórios de qualquer backend: leituras idênticas e
+concorrentes (mesmo perfil, mesma contagem, mesmo conjunto de lições)
+viram uma única consulta (ver app.core.singleflight). Escritas passam
+direto e, ao terminar (com sucesso ou não, pois o banco pode ter
+gravado), descartam a leitura em andamento da mesma chave: quem estava
+esperando por ela lê de novo, e quem chegar depois da escrita não
+recebe um resultado anterior a ela.
+
+O resultado é compartilhado entre as requisições coalescidas: os
+serviços não devem mutar as linhas recebidas.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Hashable, List, Optional, Tuple, TypeVar
+
+from app.core.config import get_settings
+from app.core.resilience import UpstreamUnavailable
+from app.core.singleflight import SingleFlight
+from app.repositories.base import (
+    LeaderboardRepository, ProgressRepository, Repositories, Row, UserRepository,
+)
+
+T = TypeVar("T")
+
+
+async def _shared(flight: SingleFlight, key: Hashable, fn: Callable[[], Awaitable[T]],
+                  timeout: Optional[float] = None) -> T:
+    """flight.do, com o timeout da chave tratado como upstream indisponível"""
+    try:
+        return await flight.do(key, fn, timeout)
+    except asyncio.TimeoutError as e:
+        raise UpstreamUnavailable(f"{flight.name} {key}: timeout") from e
+
+
+class CoalescingUserRepository(UserRepository):
+
+    def __init__(self, inner: UserRepository, timeout: Optional[float]):
+        self.inner = inner
+        self.timeout = timeout
+        self.flight = SingleFlight("users")
+
+    async def get(self, user_id: str) -> Optional[Row]:
+        return await _shared(
+            self.flight, ("get", user_id), lambda: self.inner.get(user_id), self.timeout
+        )
+
+    async def create(self, profile: Row) -> Row:
+        try:
+            return await self.inner.create(profile)
+        finally:
+            self.flight.forget(("get", profile.get("id")))
+            self.flight.forget(("count",))
+
+    async def add_xp(self, user_id: str, xp: int, coins: int = 0) -> Optional[Row]:
+        try:
+            return await self.inner.add_xp(user_id, xp, coins)
+        finally:
+            self.flight.forget(("get", user_id))
+
+    async def count(self) -> int:
+        return await _shared(self.flight, ("count",), self.inner.count, self.timeout)
+
+
+class CoalescingProgressRepository(ProgressRepository):
+
+    def __init__(self, inner: ProgressRepository, timeout: Optional[float]):
+        self.inner = inner
+        self.timeout = timeout
+        self.flight = SingleFlight("progress")
+
+    async def upsert_many(self, rows: List[Row]) -> None:
+        try:
+            await self.inner.upsert_many(rows)
+        finally:
+            for user_id in {row["user_id"] for row in rows}:
+                self.flight.forget(("completed", user_id))
+
+    async def completed_lesson_ids(self, user_id: str) -> List[int]:
+        return await _shared(
+            self.flight, ("completed", user_id),
+            lambda: self.inner.completed_lesson_ids(user_id),
+            self.timeout,
+        )
+
+    async def delete(self, user_id: str, lesson_ids: List[int]) -> int:
+        try:
+            return await self.inner.delete(user_id, lesson_ids)
+        finally:
+            self.flight.forget(("completed", user_id))
+
+
+class CoalescingLeaderboardRepository(LeaderboardRepository):
+    """Leituras em massa: sem timeout (a paginação pode levar mais tempo)"""
+
+    def __init__(self, inner: LeaderboardRepository):
+        self.inner = inner
+        self.flight = SingleFlight("leaderboard")
+
+    async def players(self) -> List[Row]:
+        return await _shared(self.flight, ("players",), self.inner.players)
+
+    async def completed_lessons(self) -> List[Tuple[str, int]]:
+        return await _shared(self.flight, ("completed",), self.inner.completed_lessons)
+
+
+class CoalescingRepositories(Repositories):
+    """Mesmo backend, com single-flight nas leituras"""
+
+    def __init__(self, inner: Repositories):
+        timeout = get_settings().singleflight_timeout or None
+        self.inner = inner
+        self.name = inner.name
+        self.users = CoalescingUserRepository(inner.users, timeout)
+        self.progress = CoalescingProgressRepository(inner.progress, timeout)
+        self.leaderboard = CoalescingLeaderboardRepository(inner.leaderboard)
+
+    async def close(self) -> None:
+        await self.inner.close()
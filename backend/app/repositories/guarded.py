@@ -0,0 +1,90 @@
+"""
+Repositórios protegidos por timeout, circuit breaker e retries
+
+Cada método vira uma operação com breaker próprio (ver
+app.core.resilience): um Supabase lento esgota o timeout, abre o
+circuito daquela operação e as chamadas seguintes falham na hora com
+UpstreamUnavailable, em vez de acumular requisições esperando.
+
+Só as operações idempotentes têm retry: create e add_xp não são
+repetidas (um timeout pode ter gravado do outro lado).
+"""
+
+from typing import List, Optional, Tuple
+
+from app.core.resilience import guarded_call
+from app.repositories.base import (
+    LeaderboardRepository, ProgressRepository, Repositories, Row, UserRepository,
+)
+
+
+class GuardedUserRepository(UserRepository):
+
+    def __init__(self, inner: UserRepository):
+        self.inner = inner
+
+    async def get(self, user_id: str) -> Optional[Row]:
+        return await guarded_call("users.get", lambda: self.inner.get(user_id))
+
+    async def create(self, profile: Row) -> Row:
+        return await guarded_call(
+            "users.create", lambda: self.inner.create(profile), idempotent=False
+        )
+
+    async def add_xp(self, user_id: str, xp: int, coins: int = 0) -> Optional[Row]:
+        return await guarded_call(
+            "users.add_xp", lambda: self.inner.add_xp(user_id, xp, coins), idempotent=False
+        )
+
+    async def count(self) -> int:
+        return await guarded_call("users.count", self.inner.count)
+
+
+class GuardedProgressRepository(ProgressRepository):
+
+    def __init__(self, inner: ProgressRepository):
+        self.inner = inner
+
+    async def upsert_many(self, rows: List[Row]) -> None:
+        # Upsert por (user_id, lesson_id): repetir é seguro
+        await guarded_call("progress.upsert_many", lambda: self.inner.upsert_many(rows))
+
+    async def completed_lesson_ids(self, user_id: str) -> List[int]:
+        return await guarded_call(
+            "progress.completed_lesson_ids", lambda: self.inner.completed_lesson_ids(user_id)
+        )
+
+    async def delete(self, user_id: str, lesson_ids: List[int]) -> int:
+        # Apagar de novo não muda nada: repetir é seguro
+        return await guarded_call(
+            "progress.delete", lambda: self.inner.delete(user_id, lesson_ids)
+        )
+
+
+class GuardedLeaderboardRepository(LeaderboardRepository):
+    """Leituras em massa paginadas: breaker e retries, sem timeout total"""
+
+    def __init__(self, inner: LeaderboardRepository):
+        self.inner = inner
+
+    async def players(self) -> List[Row]:
+        return await guarded_call("leaderboard.players", self.inner.players, timeout=0)
+
+    async def completed_lessons(self) -> List[Tuple[str, int]]:
+        return await guarded_call(
+            "leaderboard.completed_lessons", self.inner.completed_lessons, timeout=0
+        )
+
+
+class GuardedRepositories(Repositories):
+    """Mesmo backend, com timeout, breaker e retries por operação"""
+
+    def __init__(self, inner: Repositories):
+        self.inner = inner
+        self.name = inner.name
+        self.users = GuardedUserRepository(inner.users)
+        self.progress = GuardedProgressRepository(inner.progress)
+        self.leaderboard = GuardedLeaderboardRepository(inner.leaderboard)
+
+    async def close(self) -> None:
+        await self.inner.close()
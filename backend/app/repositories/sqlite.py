@@ -0,0 +1,267 @@
+"""
+Repositórios sobre um SQLite embutido
+
+Para deploys de um nó só (sem ida à rede por consulta) e para testes de
+carga determinísticos. O banco roda em modo WAL: leituras não bloqueiam
+a escrita, e cada thread do pool tem sua própria conexão. As escritas
+passam por uma trava única (o SQLite aceita um escritor por vez). As
+consultas são strings constantes, então o cache de statements de cada
+conexão as prepara uma vez só. Lotes de progresso vão num único
+executemany dentro de uma transação.
+
+    STORAGE_BACKEND=sqlite SQLITE_PATH=data/daxvengers.db uvicorn app.main:app
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Tuple, TypeVar
+
+from app.repositories.base import (
+    LeaderboardRepository, ProgressRepository, Repositories, RepositoryError, Row,
+    UserRepository,
+)
+
+T = TypeVar("T")
+
+DEFAULT_SQLITE_PATH = Path(__file__).resolve().parents[2] / "data" / "daxvengers.db"
+SQLITE_THREADS = int(os.getenv("SQLITE_THREADS", "4"))
+SQLITE_BUSY_TIMEOUT = float(os.getenv("SQLITE_BUSY_TIMEOUT", "5"))
+SQLITE_STATEMENT_CACHE = 256
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    id          TEXT PRIMARY KEY,
+    username    TEXT NOT NULL,
+    email       TEXT NOT NULL,
+    xp          INTEGER NOT NULL DEFAULT 0,
+    coins       INTEGER NOT NULL DEFAULT 0,
+    level       INTEGER NOT NULL DEFAULT 1,
+    streak_days INTEGER NOT NULL DEFAULT 0,
+    is_premium  INTEGER NOT NULL DEFAULT 0,
+    created_at  TEXT
+);
+CREATE INDEX IF NOT EXISTS users_ranking ON users (xp DESC, id);
+
+CREATE TABLE IF NOT EXISTS user_progress (
+    user_id      TEXT NOT NULL,
+    lesson_id    INTEGER NOT NULL,
+    completed    INTEGER NOT NULL DEFAULT 0,
+    xp_earned    INTEGER NOT NULL DEFAULT 0,
+    time_spent   INTEGER,
+    completed_at TEXT,
+    PRIMARY KEY (user_id, lesson_id)
+) WITHOUT ROWID;
+"""
+
+USER_COLUMNS = ("id", "username", "email", "xp", "coins", "level",
+                "streak_days", "is_premium", "created_at")
+USER_DEFAULTS = {"xp": 0, "coins": 0, "level": 1, "streak_days": 0, "is_premium": False}
+PROGRESS_COLUMNS = ("user_id", "lesson_id", "completed", "xp_earned",
+                    "time_spent", "completed_at")
+
+SQL_GET_USER = "SELECT * FROM users WHERE id = ?"
+SQL_INSERT_USER = (
+    f"INSERT INTO users ({', '.join(USER_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(USER_COLUMNS))}) RETURNING *"
+)
+# Mesma fórmula de sql/add_user_xp.sql (1 nível a cada 1000 XP)
+SQL_ADD_XP = (
+    "UPDATE users SET xp = xp + ?1, coins = coins + ?2, "
+    "level = max(1, (xp + ?1) / 1000 + 1) WHERE id = ?3 RETURNING *"
+)
+SQL_COUNT_USERS = "SELECT count(*) FROM users"
+# Monotônico como sql/upsert_user_progress.sql: completada continua completada
+SQL_UPSERT_PROGRESS = (
+    f"INSERT INTO user_progress ({', '.join(PROGRESS_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(PROGRESS_COLUMNS))}) "
+    "ON CONFLICT (user_id, lesson_id) DO UPDATE SET "
+    "completed = completed OR excluded.completed, "
+    "xp_earned = max(xp_earned, excluded.xp_earned), "
+    "time_spent = coalesce(excluded.time_spent, time_spent), "
+    "completed_at = CASE WHEN completed THEN completed_at ELSE excluded.completed_at END"
+)
+SQL_COMPLETED_FOR_USER = (
+    "SELECT lesson_id FROM user_progress WHERE user_id = ? AND completed = 1"
+)
+SQL_DELETE_PROGRESS = "DELETE FROM user_progress WHERE user_id = ? AND lesson_id = ?"
+SQL_PLAYERS = "SELECT id, username, xp, streak_days FROM users ORDER BY xp DESC, id"
+SQL_ALL_COMPLETED = (
+    "SELECT user_id, lesson_id FROM user_progress WHERE completed = 1 "
+    "ORDER BY user_id, lesson_id"
+)
+
+
+def _user_row(row: sqlite3.Row) -> Row:
+    user = dict(row)
+    user["is_premium"] = bool(user["is_premium"])
+    return user
+
+
+class SQLiteDatabase:
+    """Conexões por thread, trava de escrita e pool de threads próprio"""
+
+    def __init__(self, path: Optional[Path] = None, threads: int = SQLITE_THREADS):
+        self.path = Path(path or os.getenv("SQLITE_PATH") or DEFAULT_SQLITE_PATH)
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._threads = threads
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self.path,
+                timeout=SQLITE_BUSY_TIMEOUT,
+                check_same_thread=False,
+                cached_statements=SQLITE_STATEMENT_CACHE,
+                isolation_level=None,  # transações explícitas
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+            if not self._initialized:
+                with self._write_lock:
+                    conn.executescript(SCHEMA)
+                    self._initialized = True
+        return conn
+
+    def read(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        return fn(self._connect())
+
+    def write(self, fn: Callable[[sqlite3.Connection], T]) -> T:
+        """Executa fn numa transação, com um escritor por vez"""
+        conn = self._connect()
+        with self._write_lock:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(conn)
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+            return result
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Roda uma operação bloqueante no pool de threads do SQLite"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._threads, thread_name_prefix="sqlite"
+            )
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(fn, *args))
+
+    def close(self) -> None:
+        # O pool volta no próximo run(), como em Database.close
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+
+class SQLiteUserRepository(UserRepository):
+
+    def __init__(self, database: SQLiteDatabase):
+        self.database = database
+
+    async def get(self, user_id: str) -> Optional[Row]:
+        def query(conn: sqlite3.Connection) -> Optional[Row]:
+            row = conn.execute(SQL_GET_USER, (user_id,)).fetchone()
+            return _user_row(row) if row else None
+        return await self.database.run(self.database.read, query)
+
+    async def create(self, profile: Row) -> Row:
+        values = {**USER_DEFAULTS, "created_at": datetime.now().isoformat(), **profile}
+        params = tuple(values.get(c) for c in USER_COLUMNS)
+
+        def insert(conn: sqlite3.Connection) -> Row:
+            try:
+                return _user_row(conn.execute(SQL_INSERT_USER, params).fetchone())
+            except sqlite3.IntegrityError as e:
+                raise RepositoryError(str(e)) from e
+        return await self.database.run(self.database.write, insert)
+
+    async def add_xp(self, user_id: str, xp: int, coins: int = 0) -> Optional[Row]:
+        def update(conn: sqlite3.Connection) -> Optional[Row]:
+            row = conn.execute(SQL_ADD_XP, (xp, coins, user_id)).fetchone()
+            return _user_row(row) if row else None
+        return await self.database.run(self.database.write, update)
+
+    async def count(self) -> int:
+        return await self.database.run(
+            self.database.read, lambda conn: conn.execute(SQL_COUNT_USERS).fetchone()[0]
+        )
+
+
+class SQLiteProgressRepository(ProgressRepository):
+
+    def __init__(self, database: SQLiteDatabase):
+        self.database = database
+
+    async def upsert_many(self, rows: List[Row]) -> None:
+        params = [tuple(row.get(c) for c in PROGRESS_COLUMNS) for row in rows]
+        await self.database.run(
+            self.database.write, lambda conn: conn.executemany(SQL_UPSERT_PROGRESS, params)
+        )
+
+    async def completed_lesson_ids(self, user_id: str) -> List[int]:
+        def query(conn: sqlite3.Connection) -> List[int]:
+            return [row[0] for row in conn.execute(SQL_COMPLETED_FOR_USER, (user_id,))]
+        return await self.database.run(self.database.read, query)
+
+    async def delete(self, user_id: str, lesson_ids: List[int]) -> int:
+        params = [(user_id, lesson_id) for lesson_id in lesson_ids]
+        return await self.database.run(
+            self.database.write,
+            lambda conn: conn.executemany(SQL_DELETE_PROGRESS, params).rowcount
+        )
+
+
+class SQLiteLeaderboardRepository(LeaderboardRepository):
+
+    def __init__(self, database: SQLiteDatabase):
+        self.database = database
+
+    async def players(self) -> List[Row]:
+        return await self.database.run(
+            self.database.read,
+            lambda conn: [dict(row) for row in conn.execute(SQL_PLAYERS)]
+        )
+
+    async def completed_lessons(self) -> List[Tuple[str, int]]:
+        return await self.database.run(
+            self.database.read,
+            lambda conn: [(row[0], row[1]) for row in conn.execute(SQL_ALL_COMPLETED)]
+        )
+
+
+class SQLiteRepositories(Repositories):
+    """Backend embutido: um arquivo SQLite local"""
+
+    name = "sqlite"
+
+    def __init__(self, path: Optional[Path] = None):
+        self.database = SQLiteDatabase(path)
+        self.users = SQLiteUserRepository(self.database)
+        self.progress = SQLiteProgressRepository(self.database)
+        self.leaderboard = SQLiteLeaderboardRepository(self.database)
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self.database.close)
@@ -0,0 +1,113 @@
+"""
+Repositórios sobre o Supabase (PostgREST via app.core.database.db)
+"""
+
+from typing import Any, List, Optional, Tuple
+
+from app.core.database import db
+from app.repositories.base import (
+    LeaderboardRepository, ProgressRepository, Repositories, RepositoryError, Row,
+    UserRepository,
+)
+
+PAGE_SIZE = 1000
+
+
+async def _fetch_all(table: str, columns: str, *order: str, **eq: Any) -> List[Row]:
+    """Lê uma tabela inteira em páginas de PAGE_SIZE ('-coluna' = decrescente)"""
+    rows: List[Row] = []
+    start = 0
+    while True:
+        query = db.from_(table).select(columns)
+        for column, value in eq.items():
+            query = query.eq(column, value)
+        for column in order:
+            query = query.order(column.lstrip("-"), desc=column.startswith("-"))
+        response = await query\
+            .limit(PAGE_SIZE)\
+            .offset(start)\
+            .execute()
+        rows.extend(response.data)
+        if len(response.data) < PAGE_SIZE:
+            break
+        start += PAGE_SIZE
+    return rows
+
+
+class SupabaseUserRepository(UserRepository):
+
+    async def get(self, user_id: str) -> Optional[Row]:
+        response = await db.from_("users")\
+            .select("*")\
+            .eq("id", user_id)\
+            .execute()
+        return response.data[0] if response.data else None
+
+    async def create(self, profile: Row) -> Row:
+        response = await db.from_("users").insert(profile).execute()
+        if not response.data:
+            raise RepositoryError(f"Perfil {profile.get('id')} não foi criado")
+        return response.data[0]
+
+    async def add_xp(self, user_id: str, xp: int, coins: int = 0) -> Optional[Row]:
+        # Incremento atômico no banco (sql/add_user_xp.sql): soma XP e
+        # moedas e recalcula o nível (1 a cada 1000 XP) numa única ida
+        response = await db.rpc("add_user_xp", {
+            "p_user_id": user_id,
+            "p_xp": xp,
+            "p_coins": coins
+        }).execute()
+        return response.data[0] if response.data else None
+
+    async def count(self) -> int:
+        response = await db.from_("users").select("id", count="exact").limit(1).execute()
+        return response.count or 0
+
+
+class SupabaseProgressRepository(ProgressRepository):
+
+    async def upsert_many(self, rows: List[Row]) -> None:
+        # Upsert monotônico no banco (sql/upsert_user_progress.sql): uma
+        # lição completada não volta a incompleta num lote posterior
+        await db.rpc("upsert_user_progress", {"p_rows": rows}).execute()
+
+    async def completed_lesson_ids(self, user_id: str) -> List[int]:
+        response = await db.from_("user_progress")\
+            .select("lesson_id")\
+            .eq("user_id", user_id)\
+            .eq("completed", True)\
+            .execute()
+        return [row["lesson_id"] for row in response.data]
+
+    async def delete(self, user_id: str, lesson_ids: List[int]) -> int:
+        if not lesson_ids:
+            return 0
+        response = await db.from_("user_progress")\
+            .delete()\
+            .eq("user_id", user_id)\
+            .in_("lesson_id", lesson_ids)\
+            .execute()
+        return len(response.data)
+
+
+class SupabaseLeaderboardRepository(LeaderboardRepository):
+
+    async def players(self) -> List[Row]:
+        return await _fetch_all("users", "id,username,xp,streak_days", "-xp", "id")
+
+    async def completed_lessons(self) -> List[Tuple[str, int]]:
+        rows = await _fetch_all(
+            "user_progress", "user_id,lesson_id", "user_id", "lesson_id", completed=True
+        )
+        return [(str(row["user_id"]), row["lesson_id"]) for row in rows]
+
+
+class SupabaseRepositories(Repositories):
+    """Backend padrão: tabelas do Supabase"""
+
+    name = "supabase"
+
+    def __init__(self):
+        self.users = SupabaseUserRepository()
+        self.progress = SupabaseProgressRepository()
+        self.leaderboard = SupabaseLeaderboardRepository()
@@ -0,0 +1,95 @@
+"""
+Índice imutável do catálogo de lições
+
+Construído uma única vez a cada carga de conteúdo, responde em O(1)
+às consultas de navegação (lições de uma missão, posição de uma lição,
+próxima/anterior) sem varrer nem reordenar o catálogo a cada requisição.
+"""
+
+from types import MappingProxyType
+from typing import Dict, Iterable, Mapping, NamedTuple, Optional, Protocol, Tuple
+
+
+class CatalogEntry(Protocol):
+    """Qualquer objeto com id, missão e ordem (Lesson ou resumo)"""
+    id: int
+    mission_id: str
+    order: int
+
+
+class LessonPosition(NamedTuple):
+    """Localização de uma lição dentro da sua missão"""
+    mission_id: str
+    position: int
+    previous_id: Optional[int]
+    next_id: Optional[int]
+
+
+class CatalogIndex:
+    """Índice somente-leitura: missão → lições ordenadas, lição → posição"""
+
+    __slots__ = ("_by_mission", "_positions")
+
+    def __init__(
+        self,
+        by_mission: Mapping[str, Tuple[int, ...]],
+        positions: Mapping[int, LessonPosition],
+    ):
+        self._by_mission = by_mission
+        self._positions = positions
+
+    @classmethod
+    def build(cls, lessons: Iterable[CatalogEntry]) -> "CatalogIndex":
+        """Monta o índice a partir das lições carregadas"""
+        grouped: Dict[str, list] = {}
+        for lesson in lessons:
+            grouped.setdefault(lesson.mission_id, []).append(lesson)
+
+        by_mission: Dict[str, Tuple[int, ...]] = {}
+        positions: Dict[int, LessonPosition] = {}
+        for mission_id, items in grouped.items():
+            items.sort(key=lambda l: (l.order, l.id))
+            ids = tuple(l.id for l in items)
+            by_mission[mission_id] = ids
+            last = len(ids) - 1
+            for i, lesson_id in enumerate(ids):
+                positions[lesson_id] = LessonPosition(
+                    mission_id=mission_id,
+                    position=i,
+                    previous_id=ids[i - 1] if i > 0 else None,
+                    next_id=ids[i + 1] if i < last else None,
+                )
+
+        return cls(MappingProxyType(by_mission), MappingProxyType(positions))
+
+    def lesson_ids(self, mission_id: str) -> Tuple[int, ...]:
+        """IDs das lições da missão, já ordenados"""
+        return self._by_mission.get(mission_id, ())
+
+    def position(self, lesson_id: int) -> Optional[LessonPosition]:
+        """Missão, posição e vizinhos de uma lição"""
+        return self._positions.get(lesson_id)
+
+    def next_id(self, lesson_id: int, mission_id: Optional[str] = None) -> Optional[int]:
+        """ID da próxima lição (None se for a última ou de outra missão)"""
+        pos = self._positions.get(lesson_id)
+        if pos is None or (mission_id is not None and pos.mission_id != mission_id):
+            return None
+        return pos.next_id
+
+    def previous_id(self, lesson_id: int, mission_id: Optional[str] = None) -> Optional[int]:
+        """ID da lição anterior (None se for a primeira ou de outra missão)"""
+        pos = self._positions.get(lesson_id)
+        if pos is None or (mission_id is not None and pos.mission_id != mission_id):
+            return None
+        return pos.previous_id
+
+    @property
+    def mission_ids(self) -> Tuple[str, ...]:
+        return tuple(self._by_mission)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, lesson_id: object) -> bool:
+        return lesson_id in self._positions
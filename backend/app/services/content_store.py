@@ -0,0 +1,286 @@
+"""
+Armazenamento de conteúdo baseado em arquivos (pacotes de lições)
+
+Cada missão vive em um arquivo próprio dentro do diretório de conteúdo:
+
+    content/missions/<mission_id>.json      (ou .msgpack, se disponível)
+    {"mission": {...}, "lessons": [{...}, ...]}
+
+Na inicialização só o índice leve é montado (missões e resumos das
+lições). Esse índice fica salvo em disco (CONTENT_INDEX_PATH) por
+pacote, junto com o mtime e o tamanho do arquivo: só os pacotes que
+mudaram desde a última carga são lidos por inteiro, então o custo de
+subir não cresce com o número de lições.
+
+O corpo completo das lições (teoria, exercícios) é lido do disco apenas
+no primeiro acesso àquela missão, fora do event loop, e os pacotes
+carregados ficam num LRU limitado para manter a memória estável. Cada
+snapshot guarda o mtime e o tamanho dos pacotes de que foi montado: se o
+arquivo mudou (ou sumiu) desde então, a leitura tardia levanta
+StaleContentError em vez de misturar versões, e o LessonService recarrega
+o catálogo.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.models.lesson import Lesson, LessonSummary, Mission
+
+try:
+    import msgpack
+except ImportError:  # pacotes .msgpack são opcionais
+    msgpack = None
+
+
+DEFAULT_CONTENT_DIR = Path(__file__).resolve().parents[2] / "content" / "missions"
+DEFAULT_INDEX_PATH = Path(__file__).resolve().parents[2] / "data" / "content-index.json"
+PACK_SUFFIXES = (".json", ".msgpack")
+MAX_LOADED_PACKS = int(os.getenv("CONTENT_MAX_LOADED_PACKS", "32"))
+PACK_READ_ATTEMPTS = 3
+
+# (mtime_ns, tamanho) de um pacote
+PackStat = Tuple[int, int]
+# (nome do arquivo, mtime_ns, tamanho) de cada pacote
+Signature = Tuple[Tuple[str, int, int], ...]
+
+logger = logging.getLogger(__name__)
+
+
+class ContentError(Exception):
+    """Pacote de conteúdo inválido ou inconsistente"""
+
+
+class StaleContentError(ContentError):
+    """O pacote no disco não é mais o da carga do snapshot"""
+
+
+def _read_pack(path: Path) -> Dict[str, Any]:
+    """Lê um pacote de missão do disco"""
+    if path.suffix == ".msgpack":
+        if msgpack is None:
+            raise ContentError(f"{path.name}: instale 'msgpack' para ler pacotes .msgpack")
+        with open(path, "rb") as f:
+            return msgpack.unpackb(f.read(), raw=False)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _stat(path: Path) -> PackStat:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _read_pinned(path: Path) -> Tuple[Dict[str, Any], PackStat]:
+    """Lê o pacote e o (mtime, tamanho) da versão lida"""
+    for _ in range(PACK_READ_ATTEMPTS):
+        before = _stat(path)
+        data = _read_pack(path)
+        # Arquivo reescrito no meio da leitura: lê de novo
+        if _stat(path) == before:
+            return data, before
+    raise ContentError(f"{path.name}: pacote mudando durante a leitura")
+
+
+def _pack_paths(content_dir: Path) -> List[Path]:
+    return sorted(
+        p for p in content_dir.iterdir()
+        if p.is_file() and p.suffix in PACK_SUFFIXES
+    )
+
+
+def directory_signature(content_dir: Path) -> Signature:
+    """Assinatura barata (stat) do diretório para detectar mudanças"""
+    return tuple((path.name, *_stat(path)) for path in _pack_paths(content_dir))
+
+
+class ContentSnapshot:
+    """Visão imutável de uma carga do diretório de conteúdo"""
+
+    def __init__(
+        self,
+        missions: Dict[str, Mission],
+        summaries: Dict[int, LessonSummary],
+        pack_paths: Dict[str, Path],
+        pack_stats: Dict[str, PackStat],
+        signature: Signature,
+        max_loaded_packs: int = MAX_LOADED_PACKS,
+    ):
+        self.missions = missions
+        self.summaries = summaries
+        self.signature = signature
+        self._pack_paths = pack_paths
+        self._pack_stats = pack_stats
+        self._loaded: "OrderedDict[str, Dict[int, Lesson]]" = OrderedDict()
+        self._max_loaded = max(1, max_loaded_packs)
+        self._lock = threading.Lock()
+
+    async def get_lessons(self, lesson_ids: Iterable[int]) -> List[Lesson]:
+        """Lições completas, lendo do disco (fora do event loop) os pacotes que faltam"""
+        lessons = []
+        packs: Dict[str, Dict[int, Lesson]] = {}
+        for lesson_id in lesson_ids:
+            summary = self.summaries.get(lesson_id)
+            if summary is None:
+                continue
+            pack = packs.get(summary.mission_id)
+            if pack is None:
+                pack = self._resident(summary.mission_id)
+                if pack is None:
+                    pack = await asyncio.to_thread(self._load_pack, summary.mission_id)
+                packs[summary.mission_id] = pack
+            lessons.append(pack[lesson_id])
+        return lessons
+
+    def _resident(self, mission_id: str) -> Optional[Dict[int, Lesson]]:
+        with self._lock:
+            pack = self._loaded.get(mission_id)
+            if pack is not None:
+                self._loaded.move_to_end(mission_id)
+            return pack
+
+    def _load_pack(self, mission_id: str) -> Dict[int, Lesson]:
+        pack = self._resident(mission_id)
+        if pack is not None:
+            return pack
+
+        path = self._pack_paths[mission_id]
+        try:
+            data, stat = _read_pinned(path)
+        except FileNotFoundError:
+            raise StaleContentError(f"{path.name}: pacote removido após a carga")
+        if stat != self._pack_stats[mission_id]:
+            raise StaleContentError(f"{path.name}: pacote alterado após a carga")
+
+        pack = {
+            raw["id"]: Lesson(**raw)
+            for raw in data.get("lessons", [])
+            if raw.get("id") in self.summaries
+        }
+        missing = [
+            lesson_id for lesson_id, summary in self.summaries.items()
+            if summary.mission_id == mission_id and lesson_id not in pack
+        ]
+        if missing:
+            raise ContentError(f"{path.name}: lições {missing} do índice ausentes no pacote")
+
+        with self._lock:
+            self._loaded[mission_id] = pack
+            self._loaded.move_to_end(mission_id)
+            while len(self._loaded) > self._max_loaded:
+                self._loaded.popitem(last=False)
+        return pack
+
+    @property
+    def loaded_packs(self) -> int:
+        return len(self._loaded)
+
+
+class ContentStore:
+    """Lê os pacotes de missão do disco e monta snapshots do catálogo"""
+
+    def __init__(self, content_dir: Optional[Path] = None, index_path: Optional[Path] = None):
+        self.content_dir = Path(
+            content_dir or os.getenv("CONTENT_DIR") or DEFAULT_CONTENT_DIR
+        )
+        self.index_path = Path(
+            index_path or os.getenv("CONTENT_INDEX_PATH") or DEFAULT_INDEX_PATH
+        )
+
+    def signature(self) -> Signature:
+        return directory_signature(self.content_dir)
+
+    # ------------------------------------------------------------
+    # Índice leve em disco
+    # ------------------------------------------------------------
+
+    def _read_index(self) -> Dict[str, Dict[str, Any]]:
+        """Entradas do índice salvo (vazio se não existe, é inválido ou de outro diretório)"""
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(saved, dict) or saved.get("content_dir") != str(self.content_dir):
+            return {}
+        return saved.get("packs", {})
+
+    def _write_index(self, packs: Dict[str, Dict[str, Any]]) -> None:
+        try:
+            self.index_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"content_dir": str(self.content_dir), "packs": packs}, f,
+                          ensure_ascii=False)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            # Sem o índice salvo a próxima carga só lê os pacotes de novo
+            logger.warning("⚠️ Não foi possível salvar o índice de conteúdo",
+                           extra={"path": str(self.index_path), "error": str(e)})
+
+    def _index_entry(self, path: Path, saved: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Missão e resumos de um pacote: do índice salvo, se o arquivo não mudou"""
+        entry = saved.get(path.name)
+        if entry is not None and tuple(entry["stat"]) == _stat(path):
+            return entry
+
+        data, stat = _read_pinned(path)
+        if "mission" not in data:
+            raise ContentError(f"{path.name}: campo 'mission' ausente")
+        return {
+            "stat": list(stat),
+            "mission": data["mission"],
+            "lessons": [
+                {k: raw[k] for k in LessonSummary.model_fields if k in raw}
+                for raw in data.get("lessons", [])
+            ],
+        }
+
+    # ------------------------------------------------------------
+    # Carga
+    # ------------------------------------------------------------
+
+    def load(self) -> ContentSnapshot:
+        """Monta o índice leve (sem corpos de lição), relendo só os pacotes alterados"""
+        if not self.content_dir.is_dir():
+            raise ContentError(f"Diretório de conteúdo não encontrado: {self.content_dir}")
+
+        saved = self._read_index()
+        entries: Dict[str, Dict[str, Any]] = {}
+        missions: Dict[str, Mission] = {}
+        summaries: Dict[int, LessonSummary] = {}
+        pack_paths: Dict[str, Path] = {}
+        pack_stats: Dict[str, PackStat] = {}
+
+        for path in _pack_paths(self.content_dir):
+            entry = entries[path.name] = self._index_entry(path, saved)
+
+            mission = Mission(**entry["mission"])
+            if mission.id in missions:
+                raise ContentError(f"{path.name}: missão duplicada '{mission.id}'")
+            missions[mission.id] = mission
+            pack_paths[mission.id] = path
+            pack_stats[mission.id] = tuple(entry["stat"])
+
+            for raw in entry["lessons"]:
+                summary = LessonSummary(**raw)
+                if summary.mission_id != mission.id:
+                    raise ContentError(
+                        f"{path.name}: lição {summary.id} pertence a '{summary.mission_id}'"
+                    )
+                if summary.id in summaries:
+                    raise ContentError(f"{path.name}: lição duplicada {summary.id}")
+                summaries[summary.id] = summary
+
+        if entries != saved:
+            self._write_index(entries)
+
+        signature = tuple(
+            (name, *entry["stat"]) for name, entry in sorted(entries.items())
+        )
+        return ContentSnapshot(missions, summaries, pack_paths, pack_stats, signature)
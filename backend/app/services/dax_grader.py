@@ -0,0 +1,188 @@
+"""
+Correção de exercícios de código DAX
+
+A resposta do aluno e a solução de referência são tokenizadas e
+canonicalizadas antes da comparação, então diferenças que não mudam o
+significado da fórmula não contam como erro:
+
+- espaços, quebras de linha e comentários (//, --, /* */)
+- maiúsculas/minúsculas em funções, tabelas e colunas (DAX ignora caixa)
+- tabela com ou sem aspas simples: 'Vendas'[Valor] == Vendas[Valor]
+- ':=' ou '=' na definição da medida, ';' ou ',' entre argumentos
+- números equivalentes (1000, 1000.0, 1E3) e TRUE() == TRUE
+
+Literais de texto ("RJ") são comparados exatamente. As soluções de
+referência compiladas ficam em cache por exercício e as respostas
+normalizadas são memorizadas (LRU). Uma solução de referência que não
+tokeniza é erro de conteúdo: é registrada no log e o exercício cai na
+comparação de texto com espaços e caixa normalizados.
+"""
+
+import logging
+import re
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from app.models.lesson import Exercise
+
+
+NORMALIZE_CACHE_SIZE = 4096
+
+logger = logging.getLogger(__name__)
+
+
+class Token(NamedTuple):
+    kind: str
+    value: str
+
+
+TokenStream = Tuple[Token, ...]
+
+
+class DaxSyntaxError(ValueError):
+    """Fórmula que não pôde ser tokenizada"""
+
+
+_TOKEN_RE = re.compile(r"""
+    (?P<ws>\s+)
+  | (?P<comment>//[^\n]*|--[^\n]*|/\*.*?\*/)
+  | (?P<string>"(?:[^"]|"")*")
+  | (?P<table>'(?:[^']|'')*')
+  | (?P<column>\[(?:[^\]]|\]\])*\])
+  | (?P<number>(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)
+  | (?P<ident>[^\W\d][\w.]*)
+  | (?P<op>:=|==|<=|>=|<>|&&|\|\||[=<>+\-*/^&(),;{}])
+""", re.VERBOSE | re.DOTALL)
+
+
+def tokenize(formula: str) -> List[Token]:
+    """Quebra a fórmula em tokens brutos (sem espaços nem comentários)"""
+    tokens: List[Token] = []
+    pos = 0
+    while pos < len(formula):
+        match = _TOKEN_RE.match(formula, pos)
+        if match is None:
+            raise DaxSyntaxError(f"Caractere inesperado na posição {pos}: {formula[pos]!r}")
+        kind = match.lastgroup
+        if kind not in ("ws", "comment"):
+            tokens.append(Token(kind, match.group()))
+        pos = match.end()
+    return tokens
+
+
+def _canonical_number(text: str) -> str:
+    try:
+        value = Decimal(text).normalize()
+    except InvalidOperation:
+        return text
+    # normalize() pode gerar expoente (1E+3); formata sem notação científica
+    return format(value, "f")
+
+
+def canonicalize(tokens: List[Token]) -> TokenStream:
+    """Aplica as regras de equivalência e devolve a sequência canônica"""
+    out: List[Token] = []
+    i = 0
+    while i < len(tokens):
+        kind, value = tokens[i]
+
+        if kind == "ident":
+            name = value.upper()
+            # TRUE() / FALSE() equivalem às constantes TRUE / FALSE
+            if (
+                name in ("TRUE", "FALSE")
+                and i + 2 < len(tokens)
+                and tokens[i + 1].value == "("
+                and tokens[i + 2].value == ")"
+            ):
+                i += 2
+            out.append(Token("ident", name))
+        elif kind == "table":
+            # 'Vendas' -> VENDAS (mesmo token de uma tabela sem aspas)
+            out.append(Token("ident", value[1:-1].replace("''", "'").upper()))
+        elif kind == "column":
+            out.append(Token("column", value[1:-1].replace("]]", "]").strip().upper()))
+        elif kind == "number":
+            out.append(Token("number", _canonical_number(value)))
+        elif kind == "op":
+            if value == ":=":
+                value = "="
+            elif value == ";":
+                value = ","
+            out.append(Token("op", value))
+        else:
+            out.append(Token(kind, value))
+        i += 1
+    return tuple(out)
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize(formula: str) -> TokenStream:
+    """Tokeniza e canonicaliza (memorizado por texto de fórmula)"""
+    return canonicalize(tokenize(formula.strip()))
+
+
+def render(stream: TokenStream) -> str:
+    """Forma textual canônica (útil para logs e depuração)"""
+    return " ".join(f"[{t.value}]" if t.kind == "column" else t.value for t in stream)
+
+
+def normalize_text(formula: str) -> str:
+    """Comparação de reserva: só espaços e caixa"""
+    return " ".join(formula.split()).upper()
+
+
+class GradeOutcome(NamedTuple):
+    correct: bool
+    syntax_error: Optional[str] = None
+
+
+class DaxGrader:
+    """Compara respostas com as soluções de referência dos exercícios"""
+
+    def __init__(self):
+        # Sequência canônica, ou o texto normalizado se a solução não tokeniza
+        self._references: Dict[Tuple[int, int], Union[TokenStream, str]] = {}
+
+    def reference(
+        self, lesson_id: int, exercise_index: int, exercise: Exercise
+    ) -> Union[TokenStream, str]:
+        """Solução de referência compilada (cache por exercício)"""
+        key = (lesson_id, exercise_index)
+        compiled = self._references.get(key)
+        if compiled is None:
+            solution = exercise.solution or ""
+            try:
+                compiled = canonicalize(tokenize(solution))
+            except DaxSyntaxError as e:
+                logger.error("❌ Solução de referência inválida", extra={
+                    "lesson_id": lesson_id, "exercise_index": exercise_index, "error": str(e),
+                })
+                compiled = normalize_text(solution)
+            self._references[key] = compiled
+        return compiled
+
+    def grade(
+        self,
+        lesson_id: int,
+        exercise_index: int,
+        exercise: Exercise,
+        answer: str,
+    ) -> GradeOutcome:
+        expected = self.reference(lesson_id, exercise_index, exercise)
+        if isinstance(expected, str):
+            return GradeOutcome(correct=normalize_text(answer) == expected)
+        try:
+            submitted = normalize(answer)
+        except DaxSyntaxError as e:
+            return GradeOutcome(correct=False, syntax_error=str(e))
+        return GradeOutcome(correct=submitted == expected)
+
+    def clear(self) -> None:
+        """Descarta as referências compiladas (conteúdo recarregado)"""
+        self._references = {}
+
+
+# Singleton instance
+dax_grader = DaxGrader()
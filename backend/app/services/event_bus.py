@@ -0,0 +1,123 @@
+"""
+Pub/sub em processo para empurrar mudanças aos clientes (SSE)
+
+Cada assinante tem uma fila limitada que *coalesce* por tipo de evento:
+se o cliente ainda não consumiu um "leaderboard", um novo "leaderboard"
+substitui o anterior em vez de enfileirar outro, e eventos de dados
+(ex: XP do usuário) são mesclados campo a campo. Assim um assinante lento
+nunca acumula mais que um evento por tipo, e rajadas de atualizações
+viram uma única entrega.
+
+Os assinantes são indexados por tópico; publicar num tópico sem ninguém
+ouvindo é só uma consulta a dict. Um cliente parado fica esperando num
+asyncio.Event, sem consumir CPU.
+
+Tudo roda no event loop (publish é chamado pelos serviços, dentro das
+rotas), então não há travas.
+"""
+
+import asyncio
+import os
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.core.metrics import Counter, Gauge, registry
+
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "16"))
+
+LEADERBOARD_TOPIC = "leaderboard"
+
+Event = Tuple[str, Optional[Dict[str, Any]]]
+
+subscribers_gauge = registry.register(Gauge(
+    "event_subscribers", "Assinantes conectados ao stream de eventos",
+))
+events_coalesced = registry.register(Counter(
+    "events_coalesced_total", "Eventos mesclados com um pendente do mesmo tipo",
+    ("event",),
+))
+events_dropped = registry.register(Counter(
+    "events_dropped_total", "Eventos descartados com a fila do assinante cheia",
+    ("event",),
+))
+
+
+def user_topic(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+class Subscription:
+    """Fila limitada e coalescente de um assinante"""
+
+    def __init__(self, topics: Iterable[str], maxsize: int = EVENT_QUEUE_SIZE):
+        self.topics = tuple(topics)
+        self.maxsize = maxsize
+        self._pending: "OrderedDict[str, Optional[Dict[str, Any]]]" = OrderedDict()
+        self._ready = asyncio.Event()
+
+    def offer(self, event: str, data: Optional[Dict[str, Any]] = None) -> None:
+        """Enfileira sem bloquear, mesclando com um evento pendente do mesmo tipo"""
+        if event in self._pending:
+            pending = self._pending[event]
+            if pending is not None and data is not None:
+                pending.update(data)
+            else:
+                self._pending[event] = dict(data) if data is not None else None
+            events_coalesced.inc(event)
+        else:
+            if len(self._pending) >= self.maxsize:
+                dropped, _ = self._pending.popitem(last=False)
+                events_dropped.inc(dropped)
+            self._pending[event] = dict(data) if data is not None else None
+        self._ready.set()
+
+    async def get(self, timeout: Optional[float] = None) -> List[Event]:
+        """Espera e devolve todos os eventos pendentes ([] se der timeout)"""
+        if not self._pending:
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return []
+        events = list(self._pending.items())
+        self._pending.clear()
+        self._ready.clear()
+        return events
+
+
+class EventBus:
+    """Distribui eventos aos assinantes de cada tópico"""
+
+    def __init__(self):
+        self._topics: Dict[str, Set[Subscription]] = {}
+
+    def subscribe(self, *topics: str) -> Subscription:
+        subscription = Subscription(topics)
+        for topic in topics:
+            self._topics.setdefault(topic, set()).add(subscription)
+        subscribers_gauge.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        for topic in subscription.topics:
+            subscribers = self._topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[topic]
+        subscribers_gauge.dec()
+
+    def publish(self, topic: str, event: str, data: Optional[Dict[str, Any]] = None) -> int:
+        """Entrega a todos os assinantes do tópico; retorna quantos receberam"""
+        subscribers = self._topics.get(topic)
+        if not subscribers:
+            return 0
+        for subscription in subscribers:
+            subscription.offer(event, data)
+        return len(subscribers)
+
+    def subscriber_count(self, topic: str) -> int:
+        return len(self._topics.get(topic, ()))
+
+
+# Singleton instance
+event_bus = EventBus()
@@ -0,0 +1,311 @@
+"""
+Leaderboard em memória com atualizações e consultas de rank em O(log n)
+
+Os jogadores ficam numa skip list indexável (cada link guarda quantos
+elementos ele pula), ordenada por (-total_xp, seq, user_id): mais XP
+primeiro e, no empate, quem chegou àquele XP antes. Com isso top-K,
+"meu rank" e "jogadores ao meu redor" custam O(log n + K), sem ordenar
+a tabela de usuários a cada requisição.
+
+Toda mudança incrementa `version` e publica "leaderboard" no event_bus
+(os streams SSE recalculam o delta só quando há mudança).
+"""
+
+import itertools
+import random
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.models.lesson import LeaderboardEntry
+from app.repositories import repositories
+from app.services.event_bus import LEADERBOARD_TOPIC, event_bus
+
+
+MAX_LEVEL = 24  # suficiente para ~16 milhões de jogadores
+
+RankKey = Tuple[int, int, str]
+
+
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key: Optional[RankKey], level: int):
+        self.key = key
+        self.next: List[Optional["_Node"]] = [None] * level
+        self.width: List[int] = [1] * level
+
+
+class IndexableSkipList:
+    """Skip list ordenada com acesso por posição (rank) em O(log n)"""
+
+    def __init__(self):
+        self._head = _Node(None, MAX_LEVEL)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _random_level() -> int:
+        level = 1
+        while level < MAX_LEVEL and random.random() < 0.5:
+            level += 1
+        return level
+
+    @classmethod
+    def from_sorted(cls, keys: Iterable[RankKey]) -> "IndexableSkipList":
+        """Monta a lista em O(n) a partir de chaves já ordenadas"""
+        skiplist = cls()
+        last: List[_Node] = [skiplist._head] * MAX_LEVEL
+        last_position = [-1] * MAX_LEVEL
+        size = 0
+        for position, key in enumerate(keys):
+            node = _Node(key, cls._random_level())
+            for level in range(len(node.next)):
+                last[level].next[level] = node
+                last[level].width[level] = position - last_position[level]
+                last[level] = node
+                last_position[level] = position
+            size = position + 1
+        for level in range(MAX_LEVEL):
+            last[level].width[level] = size - last_position[level]
+        skiplist._size = size
+        return skiplist
+
+    def insert(self, key: RankKey) -> None:
+        chain: List[_Node] = [self._head] * MAX_LEVEL
+        steps_at_level = [0] * MAX_LEVEL
+        node = self._head
+        for level in reversed(range(MAX_LEVEL)):
+            nxt = node.next[level]
+            while nxt is not None and nxt.key <= key:
+                steps_at_level[level] += node.width[level]
+                node = nxt
+                nxt = node.next[level]
+            chain[level] = node
+
+        height = self._random_level()
+        new_node = _Node(key, height)
+        steps = 0
+        for level in range(height):
+            prev = chain[level]
+            new_node.next[level] = prev.next[level]
+            prev.next[level] = new_node
+            new_node.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(height, MAX_LEVEL):
+            chain[level].width[level] += 1
+        self._size += 1
+
+    def remove(self, key: RankKey) -> None:
+        chain: List[_Node] = [self._head] * MAX_LEVEL
+        node = self._head
+        for level in reversed(range(MAX_LEVEL)):
+            nxt = node.next[level]
+            while nxt is not None and nxt.key < key:
+                node = nxt
+                nxt = node.next[level]
+            chain[level] = node
+
+        target = chain[0].next[0]
+        if target is None or target.key != key:
+            raise KeyError(key)
+
+        for level in range(len(target.next)):
+            prev = chain[level]
+            prev.width[level] += target.width[level] - 1
+            prev.next[level] = target.next[level]
+        for level in range(len(target.next), MAX_LEVEL):
+            chain[level].width[level] -= 1
+        self._size -= 1
+
+    def index(self, key: RankKey) -> Optional[int]:
+        """Posição (0 = primeiro) de uma chave, ou None se não existir"""
+        node = self._head
+        position = 0
+        for level in reversed(range(MAX_LEVEL)):
+            nxt = node.next[level]
+            while nxt is not None and nxt.key < key:
+                position += node.width[level]
+                node = nxt
+                nxt = node.next[level]
+        target = node.next[0]
+        if target is None or target.key != key:
+            return None
+        return position
+
+    def iter_from(self, start: int) -> Iterator[RankKey]:
+        """Itera as chaves a partir da posição start"""
+        if start < 0 or start >= self._size:
+            return
+        node = self._head
+        remaining = start + 1
+        for level in reversed(range(MAX_LEVEL)):
+            while node.next[level] is not None and node.width[level] <= remaining:
+                remaining -= node.width[level]
+                node = node.next[level]
+        while node is not None:
+            yield node.key
+            node = node.next[0]
+
+
+class _Player:
+    __slots__ = ("user_id", "username", "total_xp", "completed",
+                 "streak_days", "badges", "key")
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.username = user_id
+        self.total_xp = 0
+        self.completed = 0  # bitset de lições completadas (bit id = lição id)
+        self.streak_days = 0
+        self.badges: List[str] = []
+        self.key: Optional[RankKey] = None
+
+
+class Leaderboard:
+    """Ranking de jogadores por XP total"""
+
+    def __init__(self):
+        self._ranking = IndexableSkipList()
+        self._players: Dict[str, _Player] = {}
+        self._seq = itertools.count()
+        self.version = 0
+
+    def __len__(self) -> int:
+        return len(self._players)
+
+    def _changed(self) -> None:
+        self.version += 1
+        event_bus.publish(LEADERBOARD_TOPIC, "leaderboard")
+
+    def update(
+        self,
+        user_id: str,
+        total_xp: Optional[int] = None,
+        *,
+        username: Optional[str] = None,
+        completed: Optional[int] = None,
+        streak_days: Optional[int] = None,
+        badges: Optional[List[str]] = None,
+    ) -> None:
+        """Cria ou atualiza um jogador; reposiciona só se o XP mudou"""
+        player = self._players.get(user_id)
+        if player is None:
+            player = self._players[user_id] = _Player(user_id)
+
+        if username is not None:
+            player.username = username
+        if completed is not None:
+            player.completed = completed
+        if streak_days is not None:
+            player.streak_days = streak_days
+        if badges is not None:
+            player.badges = list(badges)
+
+        if player.key is None or (total_xp is not None and total_xp != player.total_xp):
+            if player.key is not None:
+                self._ranking.remove(player.key)
+            if total_xp is not None:
+                player.total_xp = total_xp
+            player.key = (-player.total_xp, next(self._seq), user_id)
+            self._ranking.insert(player.key)
+        self._changed()
+
+    def mark_completed(self, user_id: str, lessons: int) -> None:
+        """Soma lições (bitset) às completadas de um jogador já no ranking"""
+        player = self._players.get(user_id)
+        if player is not None and lessons & ~player.completed:
+            player.completed |= lessons
+            self._changed()
+
+    def unmark_completed(self, user_id: str, lessons: int) -> None:
+        """Tira lições (bitset) das completadas de um jogador (reset de progresso)"""
+        player = self._players.get(user_id)
+        if player is not None and lessons & player.completed:
+            player.completed &= ~lessons
+            self._changed()
+
+    def remove(self, user_id: str) -> None:
+        player = self._players.pop(user_id, None)
+        if player is not None and player.key is not None:
+            self._ranking.remove(player.key)
+            self._changed()
+
+    def _entry(self, key: RankKey, rank: int) -> LeaderboardEntry:
+        player = self._players[key[2]]
+        return LeaderboardEntry(
+            user_id=player.user_id,
+            username=player.username,
+            total_xp=player.total_xp,
+            completed_lessons=player.completed.bit_count(),
+            streak_days=player.streak_days,
+            badges=player.badges,
+            rank=rank
+        )
+
+    def _slice(self, start: int, count: int) -> List[LeaderboardEntry]:
+        keys = itertools.islice(self._ranking.iter_from(start), count)
+        return [self._entry(key, start + i + 1) for i, key in enumerate(keys)]
+
+    def top(self, limit: int = 10) -> List[LeaderboardEntry]:
+        """Os primeiros colocados"""
+        return self._slice(0, max(0, limit))
+
+    def rank(self, user_id: str) -> Optional[int]:
+        """Posição do jogador (1 = primeiro), ou None se não estiver no ranking"""
+        player = self._players.get(user_id)
+        if player is None or player.key is None:
+            return None
+        return self._ranking.index(player.key) + 1
+
+    def entry(self, user_id: str) -> Optional[LeaderboardEntry]:
+        rank = self.rank(user_id)
+        if rank is None:
+            return None
+        return self._entry(self._players[user_id].key, rank)
+
+    def around(self, user_id: str, radius: int = 5) -> List[LeaderboardEntry]:
+        """Jogadores imediatamente acima e abaixo do usuário"""
+        rank = self.rank(user_id)
+        if rank is None:
+            return []
+        start = max(0, rank - 1 - radius)
+        return self._slice(start, rank - start + radius)
+
+    def load(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        completed: Optional[Dict[str, int]] = None,
+    ) -> int:
+        """Carga em lote (warm start): substitui o ranking atual em O(n log n)"""
+        completed = completed or {}
+        players: Dict[str, _Player] = {}
+        for row in rows:
+            player = _Player(str(row["id"]))
+            player.total_xp = row.get("xp") or 0
+            player.username = row.get("username") or player.user_id
+            player.streak_days = row.get("streak_days") or 0
+            player.completed = completed.get(player.user_id, 0)
+            players[player.user_id] = player
+
+        ordered = sorted(players.values(), key=lambda p: (-p.total_xp, p.user_id))
+        for player in ordered:
+            player.key = (-player.total_xp, next(self._seq), player.user_id)
+
+        self._ranking = IndexableSkipList.from_sorted(p.key for p in ordered)
+        self._players = players
+        self._changed()
+        return len(players)
+
+    async def warm_start(self) -> int:
+        """Carrega todos os usuários (e as lições completadas) do armazenamento"""
+        rows = await repositories.leaderboard.players()
+        completed: Dict[str, int] = {}
+        for user_id, lesson_id in await repositories.leaderboard.completed_lessons():
+            completed[user_id] = completed.get(user_id, 0) | (1 << lesson_id)
+        return self.load(rows, completed)
+
+
+# Singleton instance
+leaderboard = Leaderboard()
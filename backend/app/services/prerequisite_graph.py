@@ -0,0 +1,179 @@
+"""
+Grafo de pré-requisitos das lições, compilado a cada carga de conteúdo
+
+Cada lição ocupa o bit de número igual ao seu id, então um conjunto de
+lições é um int do Python (bitset). Na carga o grafo calcula, por lição,
+o fecho transitivo dos pré-requisitos (tudo o que precisa estar
+completo antes dela) e dos dependentes (tudo o que ela bloqueia); com o
+conjunto de lições completadas do usuário também como bitset, saber se
+uma lição está liberada é só `required & ~completed == 0`.
+
+As lições liberadas de uma missão saem por eliminação: a missão menos
+os dependentes das lições pendentes. O laço é só sobre os
+pré-requisitos ainda não completados da missão, e cada pendente já
+bloqueado por outro é descartado junto, então o custo acompanha a
+fronteira do aluno, não o tamanho do catálogo.
+
+A carga valida o grafo: pré-requisito inexistente ou ciclo gera
+ContentError (e o catálogo anterior é mantido no recarregamento).
+"""
+
+import heapq
+from types import MappingProxyType
+from typing import Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from app.models.lesson import LessonSummary
+from app.services.content_store import ContentError
+
+
+def bit(lesson_id: int) -> int:
+    """Bit que representa a lição no bitset"""
+    return 1 << lesson_id
+
+
+def mask_of(lesson_ids: Iterable[int]) -> int:
+    """Converte uma coleção de ids em bitset"""
+    mask = 0
+    for lesson_id in lesson_ids:
+        mask |= 1 << lesson_id
+    return mask
+
+
+def ids_of(mask: int) -> Iterator[int]:
+    """Ids presentes no bitset, em ordem crescente"""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class PrerequisiteGraph:
+    """DAG somente-leitura de pré-requisitos com fechos transitivos e máscaras por missão"""
+
+    __slots__ = ("_required", "_dependents", "_mission_masks", "_mission_ancestors",
+                 "_all_mask", "_all_ancestors")
+
+    def __init__(
+        self,
+        required: Mapping[int, int],
+        dependents: Mapping[int, int],
+        mission_masks: Mapping[str, int],
+        mission_ancestors: Mapping[str, int],
+    ):
+        self._required = required
+        self._dependents = dependents
+        self._mission_masks = mission_masks
+        self._mission_ancestors = mission_ancestors
+        self._all_mask = mask_of(required)
+        self._all_ancestors = 0
+        for mask in mission_ancestors.values():
+            self._all_ancestors |= mask
+
+    @classmethod
+    def build(cls, lessons: Iterable[LessonSummary]) -> "PrerequisiteGraph":
+        """Valida o grafo e calcula os fechos transitivos e as máscaras por missão"""
+        lessons = list(lessons)
+        known = {lesson.id for lesson in lessons}
+
+        direct: Dict[int, Tuple[int, ...]] = {}
+        children: Dict[int, List[int]] = {lesson.id: [] for lesson in lessons}
+        in_degree: Dict[int, int] = {}
+        for lesson in lessons:
+            prerequisites = set(lesson.prerequisites)
+            missing = prerequisites - known
+            if missing:
+                raise ContentError(
+                    f"Lição {lesson.id}: pré-requisitos inexistentes {sorted(missing)}"
+                )
+            direct[lesson.id] = tuple(prerequisites)
+            in_degree[lesson.id] = len(prerequisites)
+            for prerequisite in prerequisites:
+                children[prerequisite].append(lesson.id)
+
+        # Kahn: no empate, menor id primeiro (ordem estável entre cargas)
+        ready = [lesson_id for lesson_id, degree in in_degree.items() if degree == 0]
+        heapq.heapify(ready)
+        order: List[int] = []
+        while ready:
+            lesson_id = heapq.heappop(ready)
+            order.append(lesson_id)
+            for child in children[lesson_id]:
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    heapq.heappush(ready, child)
+
+        if len(order) < len(lessons):
+            cycle = sorted(lesson_id for lesson_id, degree in in_degree.items() if degree > 0)
+            raise ContentError(f"Ciclo nos pré-requisitos envolvendo as lições {cycle}")
+
+        # Fechos: em ordem topológica os pré-requisitos já estão prontos;
+        # na ordem inversa, os dependentes
+        required: Dict[int, int] = {}
+        for lesson_id in order:
+            mask = 0
+            for prerequisite in direct[lesson_id]:
+                mask |= required[prerequisite] | 1 << prerequisite
+            required[lesson_id] = mask
+        dependents: Dict[int, int] = {}
+        for lesson_id in reversed(order):
+            mask = 0
+            for child in children[lesson_id]:
+                mask |= dependents[child] | 1 << child
+            dependents[lesson_id] = mask
+
+        mission_masks: Dict[str, int] = {}
+        mission_ancestors: Dict[str, int] = {}
+        for lesson in lessons:
+            mission_masks[lesson.mission_id] = (
+                mission_masks.get(lesson.mission_id, 0) | 1 << lesson.id
+            )
+            mission_ancestors[lesson.mission_id] = (
+                mission_ancestors.get(lesson.mission_id, 0) | required[lesson.id]
+            )
+
+        return cls(
+            MappingProxyType(required),
+            MappingProxyType(dependents),
+            MappingProxyType(mission_masks),
+            MappingProxyType(mission_ancestors),
+        )
+
+    def required(self, lesson_id: int) -> int:
+        """Máscara de todos os pré-requisitos (diretos e indiretos) de uma lição"""
+        return self._required.get(lesson_id, 0)
+
+    def dependents(self, lesson_id: int) -> int:
+        """Máscara de todas as lições que dependem (direta ou indiretamente) da lição"""
+        return self._dependents.get(lesson_id, 0)
+
+    def mission_mask(self, mission_id: Optional[str] = None) -> int:
+        """Bitset com todas as lições da missão (ou do catálogo, se None)"""
+        if mission_id is None:
+            return self._all_mask
+        return self._mission_masks.get(mission_id, 0)
+
+    def is_unlocked(self, lesson_id: int, completed: int) -> bool:
+        return lesson_id in self._required and not self._required[lesson_id] & ~completed
+
+    def unlocked(self, completed: int, mission_id: Optional[str] = None) -> int:
+        """Bitset das lições liberadas (inclui as já completadas)"""
+        if mission_id is None:
+            scope, ancestors = self._all_mask, self._all_ancestors
+        else:
+            scope = self._mission_masks.get(mission_id, 0)
+            ancestors = self._mission_ancestors.get(mission_id, 0)
+
+        # Pré-requisitos da missão ainda pendentes: cada um bloqueia seus
+        # dependentes, que saem da fila (já estão bloqueados)
+        pending = ancestors & ~completed
+        blocked = 0
+        dependents = self._dependents
+        while pending:
+            low = pending & -pending
+            closure = dependents[low.bit_length() - 1]
+            blocked |= closure
+            pending &= ~(closure | low)
+        return scope & ~blocked
+
+    def __len__(self) -> int:
+        return len(self._required)
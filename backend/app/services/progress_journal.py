@@ -0,0 +1,332 @@
+"""
+Journal de progresso com escrita adiada (write-behind)
+
+POST /api/progress só grava uma linha num arquivo append-only e responde.
+As atualizações ficam coalescidas em memória por (usuário, lição) e são
+enviadas ao banco em lotes quando o lote enche ou o intervalo expira.
+Se o processo cair, o journal é reaplicado na próxima inicialização.
+
+Ciclo de um flush:
+    progress.journal  --rotate-->  progress.journal.flushing  --upsert-->  (apagado)
+Se o upsert falhar ou for cancelado, o lote volta para a fila e o
+.flushing fica no disco; a próxima rotação junta o journal novo a ele.
+
+O arquivo só é tocado por uma thread dedicada (append, fsync, rotação),
+na ordem em que as operações foram pedidas: o event loop não bloqueia
+em disco, e toda linha pedida antes de uma rotação cai no arquivo
+rotacionado, junto com o lote em memória que a acompanha.
+
+Uma lição completada não volta a ficar incompleta: o upsert no banco é
+monotônico (completed = completed OR novo, mantendo o completed_at da
+primeira conclusão), também entre lotes diferentes. A única exceção é
+reset(), que apaga as linhas no banco e descarta as pendentes, com o
+flush travado para nenhum lote antigo regravar depois.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+from app.models.lesson import ProgressUpdate
+from app.repositories import repositories
+
+
+DEFAULT_JOURNAL_PATH = Path(__file__).resolve().parents[2] / "data" / "progress.journal"
+FLUSH_BATCH_SIZE = int(os.getenv("PROGRESS_FLUSH_BATCH_SIZE", "500"))
+FLUSH_INTERVAL = float(os.getenv("PROGRESS_FLUSH_INTERVAL", "1.0"))
+JOURNAL_FSYNC = os.getenv("PROGRESS_JOURNAL_FSYNC", "false").lower() == "true"
+
+ProgressKey = Tuple[str, int]
+T = TypeVar("T")
+
+logger = logging.getLogger(__name__)
+
+
+def _merge(current: Optional[dict], entry: dict) -> dict:
+    """
+    Coalesce duas atualizações da mesma (usuário, lição)
+
+    Mesmas regras do upsert no banco: conclusão monotônica, maior XP e o
+    time_spent mais recente informado, então o resultado não depende de
+    quando o flush acontece.
+    """
+    if current is None:
+        return entry
+    completed = current["completed"] or entry["completed"]
+    # Mantém a data da primeira conclusão
+    if current["completed"]:
+        completed_at = current["completed_at"]
+    else:
+        completed_at = entry["completed_at"]
+    return {
+        "user_id": entry["user_id"],
+        "lesson_id": entry["lesson_id"],
+        "completed": completed,
+        "xp_earned": max(current["xp_earned"], entry["xp_earned"]),
+        "time_spent": (
+            entry["time_spent"] if entry["time_spent"] is not None else current["time_spent"]
+        ),
+        "completed_at": completed_at,
+    }
+
+
+class ProgressJournal:
+    """Fila durável de progresso com flush em lote para o banco"""
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        batch_size: int = FLUSH_BATCH_SIZE,
+        flush_interval: float = FLUSH_INTERVAL,
+        fsync: bool = JOURNAL_FSYNC,
+    ):
+        self.path = Path(path or os.getenv("PROGRESS_JOURNAL_PATH") or DEFAULT_JOURNAL_PATH)
+        self.flushing_path = self.path.with_name(self.path.name + ".flushing")
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._pending: Dict[ProgressKey, dict] = {}
+        # Lote sendo enviado ao banco (ainda não confirmado)
+        self._flushing: Dict[ProgressKey, dict] = {}
+        self._file = None
+        # Uma única thread: as operações no arquivo ficam em ordem
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="journal")
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+    # ------------------------------------------------------------
+    # Escrita
+    # ------------------------------------------------------------
+
+    def _io(self, fn: Callable[..., T], *args: Any) -> "asyncio.Future[T]":
+        """
+        Enfileira uma operação de arquivo na thread do journal
+
+        A operação é submetida já na chamada (não no await), então a ordem
+        das chamadas é a ordem em que rodam no arquivo.
+        """
+        loop = asyncio.get_running_loop()
+        return loop.run_in_executor(self._executor, partial(fn, *args))
+
+    def _open(self):
+        if self._file is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._file = open(self.path, "a", encoding="utf-8")
+        return self._file
+
+    def _append(self, entries: List[dict]) -> None:
+        f = self._open()
+        f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries))
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+
+    def _close_file(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _rotate(self) -> None:
+        self._close_file()
+        if not self.path.exists():
+            return
+        if not self.flushing_path.exists():
+            os.replace(self.path, self.flushing_path)
+            return
+        # Sobrou o arquivo de um flush que não terminou: o lote dele voltou
+        # para a fila, então junta o journal atual a ele em vez de sobrescrever
+        with open(self.path, "r", encoding="utf-8") as src, \
+                open(self.flushing_path, "a", encoding="utf-8") as dst:
+            dst.write(src.read())
+            dst.flush()
+            if self.fsync:
+                os.fsync(dst.fileno())
+        self.path.unlink()
+
+    def _discard_flushing(self) -> None:
+        self.flushing_path.unlink(missing_ok=True)
+
+    def _compact(self, entries: List[dict]) -> None:
+        """Reescreve o journal só com estas entradas (a fila, que inclui o .flushing)"""
+        self._close_file()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+        self._discard_flushing()
+
+    def _enqueue(self, entries: List[dict]) -> None:
+        for entry in entries:
+            key = (entry["user_id"], entry["lesson_id"])
+            self._pending[key] = _merge(self._pending.get(key), entry)
+        if self._wakeup is not None and len(self._pending) >= self.batch_size:
+            self._wakeup.set()
+
+    async def record(self, progress: ProgressUpdate) -> None:
+        """Registra uma atualização (append no journal + fila em memória)"""
+        await self.record_many([progress])
+
+    async def record_many(self, updates: List[ProgressUpdate]) -> None:
+        """Registra várias atualizações com uma única escrita no journal"""
+        now = datetime.now().isoformat()
+        entries = [
+            {
+                "user_id": p.user_id,
+                "lesson_id": p.lesson_id,
+                "completed": p.completed,
+                "xp_earned": p.xp_earned,
+                "time_spent": p.time_spent,
+                "completed_at": now if p.completed else None,
+            }
+            for p in updates
+        ]
+        # Submete o append e enfileira sem await no meio: fica do mesmo
+        # lado de uma rotação que a fila; responde depois da escrita
+        written = self._io(self._append, entries)
+        self._enqueue(entries)
+        await written
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def pending_for(self, user_id: str) -> List[dict]:
+        """Atualizações do usuário que ainda não chegaram ao banco (inclui o lote em envio)"""
+        entries = {key: entry for key, entry in self._flushing.items() if key[0] == user_id}
+        for key, entry in self._pending.items():
+            if key[0] == user_id:
+                entries[key] = _merge(entries.get(key), entry)
+        return list(entries.values())
+
+    # ------------------------------------------------------------
+    # Replay
+    # ------------------------------------------------------------
+
+    def replay(self) -> int:
+        """Recarrega o journal (e um flush interrompido) após reinício"""
+        # O arquivo é a fonte: descarta o que estiver na fila para não
+        # coalescer as mesmas linhas duas vezes
+        self._pending = {}
+        entries = []
+        for path in (self.flushing_path, self.path):
+            if not path.exists():
+                continue
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        # Última linha truncada por uma queda no meio da escrita
+                        logger.warning("⚠️ Linha inválida ignorada no journal",
+                                       extra={"line": line[:80]})
+
+        self._enqueue(entries)
+
+        # Reescreve um journal compacto com a fila coalescida
+        self._compact(list(self._pending.values()))
+
+        return len(self._pending)
+
+    # ------------------------------------------------------------
+    # Flush
+    # ------------------------------------------------------------
+
+    async def _write_batch(self, rows: List[dict]) -> None:
+        """Grava um lote no banco (um upsert por lote)"""
+        await repositories.progress.upsert_many(rows)
+
+    def _lock(self) -> asyncio.Lock:
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        return self._flush_lock
+
+    async def flush(self) -> int:
+        """Envia tudo que está pendente ao banco; retorna quantas linhas"""
+        async with self._lock():
+            if not self._pending:
+                return 0
+
+            # Troca de fila e submete a rotação sem await no meio (_io
+            # submete na chamada): appends pedidos antes dela caem no arquivo
+            # rotacionado com este lote; os seguintes, num journal novo
+            batch, self._pending = self._pending, {}
+            self._flushing = batch
+            rotated = self._io(self._rotate)
+
+            rows = list(batch.values())
+            try:
+                await rotated
+                for i in range(0, len(rows), self.batch_size):
+                    await self._write_batch(rows[i:i + self.batch_size])
+            except BaseException as e:
+                # Erro ou cancelamento (ex: desligamento): o lote volta para
+                # a fila, sem await, e o .flushing fica no disco até a
+                # próxima rotação juntá-lo ao journal
+                for key, entry in batch.items():
+                    newer = self._pending.get(key)
+                    self._pending[key] = _merge(entry, newer) if newer else entry
+                self._flushing = {}
+                if not isinstance(e, Exception):
+                    raise
+                logger.error("❌ Erro ao gravar progresso em lote",
+                             extra={"rows": len(rows), "error": str(e)})
+                return 0
+
+            self._flushing = {}
+            await self._io(self._discard_flushing)
+            return len(rows)
+
+    # ------------------------------------------------------------
+    # Reset
+    # ------------------------------------------------------------
+
+    async def reset(self, user_id: str, lesson_ids: List[int]) -> int:
+        """
+        Apaga o progresso do usuário nessas lições, no banco e na fila
+
+        Roda com o flush travado: nenhum lote com as linhas antigas está
+        em envio nem começa durante o reset. Se o banco falhar, a fila
+        fica intacta e o erro propaga. Retorna quantas linhas o banco apagou.
+        """
+        async with self._lock():
+            deleted = await repositories.progress.delete(user_id, lesson_ids)
+
+            keys = {(user_id, lesson_id) for lesson_id in lesson_ids}
+            if keys.isdisjoint(self._pending):
+                return deleted
+            # Tira da fila e do arquivo (senão um replay as traria de volta);
+            # pede a reescrita sem await no meio, antes de novos appends
+            self._pending = {k: e for k, e in self._pending.items() if k not in keys}
+            await self._io(self._compact, list(self._pending.values()))
+            return deleted
+
+    async def run(self) -> None:
+        """Loop de flush: dispara por tamanho do lote ou por intervalo"""
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def close(self) -> None:
+        """Flush final e fechamento do arquivo"""
+        await self.flush()
+        await self._io(self._close_file)
+
+
+# Singleton instance
+progress_journal = ProgressJournal()
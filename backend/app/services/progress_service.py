@@ -0,0 +1,106 @@
+"""
+Serviço de progresso: conjunto de lições completadas por usuário
+
+O conjunto é um bitset (ver prerequisite_graph) montado a partir de
+user_progress mais o que ainda está no journal esperando flush. Fica em
+cache e é atualizado pelas próprias gravações, então consultas como
+"o que está liberado para mim?" não vão ao banco a cada requisição.
+Com o banco fora, o último bitset conhecido (mais o journal) é usado.
+"""
+
+import logging
+import os
+from typing import List
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.resilience import UpstreamUnavailable, stale_responses
+from app.models.lesson import ProgressUpdate
+from app.repositories import repositories
+from app.services.leaderboard import leaderboard
+from app.services.prerequisite_graph import bit, mask_of
+from app.services.progress_journal import progress_journal
+
+PROGRESS_CACHE_MAXSIZE = int(os.getenv("PROGRESS_CACHE_MAXSIZE", "10000"))
+PROGRESS_CACHE_TTL = float(os.getenv("PROGRESS_CACHE_TTL", "300"))
+
+logger = logging.getLogger(__name__)
+
+
+class ProgressService:
+    """Gravação de progresso e leitura do conjunto de lições completadas"""
+
+    def __init__(self):
+        # user_id -> bitset de lições completadas
+        self.cache: TTLCache[int] = TTLCache(
+            maxsize=PROGRESS_CACHE_MAXSIZE, ttl=PROGRESS_CACHE_TTL,
+            stale_ttl=get_settings().stale_ttl
+        )
+
+    async def record_many(self, updates: List[ProgressUpdate]) -> None:
+        """Grava no journal (uma escrita) e atualiza os bitsets em cache"""
+        await progress_journal.record_many(updates)
+        for progress in updates:
+            if not progress.completed:
+                continue
+            leaderboard.mark_completed(progress.user_id, bit(progress.lesson_id))
+            # Atualiza quem já está em cache; para os demais, invalidar
+            # descarta um read-through em andamento (ver completed_mask)
+            completed = self.cache.get(progress.user_id)
+            if completed is not None:
+                self.cache.set(progress.user_id, completed | bit(progress.lesson_id))
+            else:
+                self.cache.invalidate(progress.user_id)
+
+    async def record(self, progress: ProgressUpdate) -> None:
+        await self.record_many([progress])
+
+    async def reset(self, user_id: str, lesson_ids: List[int]) -> int:
+        """Apaga o progresso nessas lições (banco e journal); retorna quantas linhas"""
+        try:
+            deleted = await progress_journal.reset(user_id, lesson_ids)
+        finally:
+            # O banco pode ter apagado mesmo com erro: relê na próxima consulta
+            self.cache.invalidate(user_id)
+        leaderboard.unmark_completed(user_id, mask_of(lesson_ids))
+        logger.info("🧹 Progresso resetado", extra={
+            "user_id": user_id, "lessons": len(lesson_ids), "deleted": deleted,
+        })
+        return deleted
+
+    async def completed_mask(self, user_id: str) -> int:
+        """Bitset das lições completadas (read-through). Erros do banco propagam."""
+        completed = self.cache.get(user_id)
+        if completed is not None:
+            return completed
+
+        # O journal é lido depois do banco: o que foi enviado durante a
+        # leitura ainda está na fila ou no lote em envio. Uma conclusão
+        # gravada durante a leitura invalida o resultado para o cache.
+        generation = self.cache.generation()
+        try:
+            completed = mask_of(await repositories.progress.completed_lesson_ids(user_id))
+        except UpstreamUnavailable:
+            stale = self.cache.get_stale(user_id)
+            if stale is None:
+                raise
+            stale_responses.inc("progress.completed_lesson_ids")
+            logger.warning("🕰️ Servindo progresso desatualizado", extra={"user_id": user_id})
+            # Não regrava o cache: a próxima consulta tenta o banco de novo
+            return stale | self._pending_mask(user_id)
+        completed |= self._pending_mask(user_id)
+        self.cache.set(user_id, completed, generation=generation)
+        return completed
+
+    @staticmethod
+    def _pending_mask(user_id: str) -> int:
+        """Conclusões do usuário no journal que ainda não chegaram ao banco"""
+        return mask_of(
+            entry["lesson_id"]
+            for entry in progress_journal.pending_for(user_id)
+            if entry["completed"]
+        )
+
+
+# Singleton instance
+progress_service = ProgressService()
@@ -1,125 +1,187 @@
-from app.core.supabase_fixed import supabase
+import logging
+import os
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.database import db
+from app.core.resilience import UpstreamUnavailable, guarded_call, stale_responses
+from app.repositories import repositories
+from app.services.event_bus import event_bus, user_topic
+from app.services.leaderboard import leaderboard
 from app.models.user_models import UserCreate, UserResponse, UserUpdate
-from typing import Optional, List
+from typing import Optional, List, Tuple
+
+USER_CACHE_MAXSIZE = int(os.getenv("USER_CACHE_MAXSIZE", "10000"))
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "60"))
+
+logger = logging.getLogger(__name__)
 
 class UserService:
-    
+
+    # Perfis lidos recentemente; atualizado pelos caminhos de escrita
+    # (com o Supabase fora, perfis vencidos ainda servem de fallback)
+    cache: TTLCache[UserResponse] = TTLCache(
+        maxsize=USER_CACHE_MAXSIZE, ttl=USER_CACHE_TTL, stale_ttl=get_settings().stale_ttl
+    )
+
     @staticmethod
     async def create_user(user_data: UserCreate) -> Optional[UserResponse]:
         try:
-            print(f"📝 Criando usuário: {user_data.username}")
-            
-            # Criar usuário no Supabase Auth
-            auth_response = supabase.auth.sign_up({
-                "email": user_data.email,
-                "password": user_data.password
-            })
-            
-            if auth_response.user:
-                print(f"✅ Usuário auth criado: {auth_response.user.id}")
-                
-                # Criar perfil na tabela users
-                profile_data = {
-                    "id": auth_response.user.id,
-                    "username": user_data.username,
+            logger.info("📝 Criando usuário", extra={"username": user_data.username})
+
+            # Criar usuário no Supabase Auth (API síncrona, roda no pool de threads)
+            auth_response = await guarded_call(
+                "auth.sign_up",
+                lambda: db.run_auth("sign_up", {
                     "email": user_data.email,
-                    "xp": 0,
-                    "coins": 0,
-                    "level": 1,
-                    "streak_days": 0,
-                    "is_premium": False
-                }
-                
-                response = supabase.from_("users").insert(profile_data).execute()
-                
-                if response.data:
-                    print(f"✅ Perfil criado na tabela users")
-                    return UserResponse(**response.data[0])
-            
+                    "password": user_data.password
+                }),
+                idempotent=False
+            )
+
+            if auth_response.user:
+                logger.info("✅ Usuário auth criado", extra={"user_id": auth_response.user.id})
+
+                return await UserService.manual_create_user(
+                    auth_response.user.id, user_data.username, user_data.email
+                )
+
             return None
-            
+
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
-            print(f"❌ Error creating user: {e}")
+            logger.error("❌ Erro ao criar usuário", extra={"error": str(e)})
             return None
-    
+
     @staticmethod
-    async def login_user(email: str, password: str) -> Optional[dict]:
+    async def manual_create_user(user_id: str, username: str, email: str) -> Optional[UserResponse]:
         try:
-            print(f"🔐 Tentando login: {email}")
-            
-            response = supabase.auth.sign_in_with_password({
+            # Criar perfil na tabela users
+            profile_data = {
+                "id": user_id,
+                "username": username,
                 "email": email,
-                "password": password
-            })
-            
+                "xp": 0,
+                "coins": 0,
+                "level": 1,
+                "streak_days": 0,
+                "is_premium": False
+            }
+
+            row = await repositories.users.create(profile_data)
+
+            logger.info("✅ Perfil criado na tabela users", extra={"user_id": user_id})
+            user = UserResponse(**row)
+            UserService.cache.set(user.id, user)
+            leaderboard.update(user.id, user.xp, username=user.username)
+            return user
+
+        except Exception as e:
+            logger.error("❌ Erro ao criar perfil", extra={"user_id": user_id, "error": str(e)})
+            return None
+
+    @staticmethod
+    async def login_user(email: str, password: str) -> Optional[dict]:
+        try:
+            logger.debug("🔐 Tentando login", extra={"email": email})
+
+            response = await guarded_call(
+                "auth.sign_in",
+                lambda: db.run_auth("sign_in_with_password", {
+                    "email": email,
+                    "password": password
+                }),
+                idempotent=False
+            )
+
             if response.user:
-                print(f"✅ Login bem-sucedido: {response.user.id}")
-                
+                logger.info("✅ Login bem-sucedido", extra={"user_id": response.user.id})
+
                 # Buscar dados do usuário
-                user_data = supabase.from_("users")\
-                    .select("*")\
-                    .eq("id", response.user.id)\
-                    .execute()
-                
-                if user_data.data:
+                user = await UserService.get_user(response.user.id)
+                if user:
                     return {
-                        "user": UserResponse(**user_data.data[0]),
+                        "user": user,
                         "session": response.session
                     }
-            
+
             return None
-            
+
+        except UpstreamUnavailable:
+            raise
         except Exception as e:
-            print(f"❌ Error logging in: {e}")
+            logger.warning("❌ Falha no login", extra={"error": str(e)})
             return None
-    
+
     @staticmethod
     async def get_user(user_id: str) -> Optional[UserResponse]:
+        """Busca o perfil (read-through no cache). Erros do banco propagam."""
+        user, _ = await UserService.get_user_with_status(user_id)
+        return user
+
+    @staticmethod
+    async def get_user_with_status(user_id: str) -> Tuple[Optional[UserResponse], bool]:
+        """
+        Como get_user, mas indica se o perfil veio do fallback desatualizado
+
+        Se o Supabase estiver fora (timeout ou circuito aberto), devolve o
+        último perfil conhecido do cache com stale=True; sem ele, propaga
+        UpstreamUnavailable.
+        """
+        user = UserService.cache.get(user_id)
+        if user is not None:
+            return user, False
+
+        # Um update_user_xp durante a leitura invalida a linha lida
+        generation = UserService.cache.generation()
         try:
-            response = supabase.from_("users")\
-                .select("*")\
-                .eq("id", user_id)\
-                .execute()
-            
-            if response.data:
-                return UserResponse(**response.data[0])
-            return None
-            
-        except Exception as e:
-            print(f"❌ Error getting user: {e}")
-            return None
-    
+            row = await repositories.users.get(user_id)
+        except UpstreamUnavailable:
+            stale = UserService.cache.get_stale(user_id)
+            if stale is None:
+                raise
+            stale_responses.inc("users.get")
+            logger.warning("🕰️ Servindo perfil desatualizado", extra={"user_id": user_id})
+            return stale, True
+
+        if row:
+            user = UserResponse(**row)
+            UserService.cache.set(user_id, user, generation=generation)
+            return user, False
+        return None, False
+
     @staticmethod
     async def update_user_xp(user_id: str, xp_earned: int, coins_earned: int = 0) -> Optional[UserResponse]:
+        """Soma XP e moedas. None se o usuário não existe; erros do banco propagam."""
+        logger.debug("🎯 Adicionando XP", extra={"user_id": user_id, "xp": xp_earned})
+
         try:
-            print(f"🎯 Adicionando XP: {xp_earned} para usuário {user_id}")
-            
-            # Primeiro buscar usuário atual
-            current_user = await UserService.get_user(user_id)
-            if not current_user:
-                return None
-            
-            # Calcular novo nível (1 nível a cada 1000 XP)
-            new_xp = current_user.xp + xp_earned
-            new_coins = current_user.coins + coins_earned
-            new_level = max(1, new_xp // 1000 + 1)
-            
-            print(f"📊 Novo status - XP: {new_xp}, Moedas: {new_coins}, Nível: {new_level}")
-            
-            # Atualizar no banco
-            response = supabase.from_("users")\
-                .update({
-                    "xp": new_xp,
-                    "coins": new_coins,
-                    "level": new_level
-                })\
-                .eq("id", user_id)\
-                .execute()
-            
-            if response.data:
-                return UserResponse(**response.data[0])
-            return None
-            
+            # Incremento atômico no banco: soma XP e moedas e recalcula o
+            # nível (1 a cada 1000 XP) numa única operação
+            row = await repositories.users.add_xp(user_id, xp_earned, coins_earned)
         except Exception as e:
-            print(f"❌ Error updating user XP: {e}")
-            return None
\ No newline at end of file
+            logger.error("❌ Erro ao atualizar XP", extra={"user_id": user_id, "error": str(e)})
+            # O resultado do incremento é incerto: não servir o perfil antigo
+            UserService.cache.invalidate(user_id)
+            raise
+
+        if not row:
+            return None
+
+        user = UserResponse(**row)
+        logger.info("📊 XP atualizado", extra={
+            "user_id": user.id, "xp": user.xp, "coins": user.coins, "user_level": user.level
+        })
+        UserService.cache.set(user.id, user)
+        leaderboard.update(
+            user.id, user.xp, username=user.username, streak_days=user.streak_days
+        )
+        event_bus.publish(user_topic(user.id), "user", {
+            "xp": user.xp, "level": user.level, "coins": user.coins
+        })
+        return user
+
+
+# Singleton instance
+user_service = UserService()
@@ -0,0 +1,3 @@
+"""
+Benchmarks da API (rodam em processo, sem rede)
+"""
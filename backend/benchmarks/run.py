@@ -0,0 +1,492 @@
+"""
+Benchmark em processo de todas as rotas da API
+
+Sobe app.main:app dentro do próprio processo (httpx.ASGITransport) com o
+LocalSupabase no lugar do banco (ou um SQLite temporário, com
+STORAGE_BACKEND=sqlite), dispara requisições concorrentes em
+cada rota de app/api/lessons.py e app/api/users.py e mede vazão e
+latência (p50/p95/p99). O resultado vai para um JSON que pode ser
+comparado com uma execução anterior.
+
+Uso (a partir de backend/):
+
+    python -m benchmarks.run
+    python -m benchmarks.run --concurrency 1,16,64 --payload-sizes 1,100,500
+    python -m benchmarks.run --route leaderboard --requests 2000
+    STORAGE_BACKEND=sqlite python -m benchmarks.run
+    python -m benchmarks.run --compare benchmarks/results/baseline.json --max-regression 0.15
+
+Com --compare, o processo sai com código 1 se o p95 de alguma rota
+piorar mais que --max-regression (útil antes de um deploy).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+# Configuração que precisa existir antes de importar o app
+_TMP_DIR = tempfile.mkdtemp(prefix="daxvengers-bench-")
+os.environ.setdefault("PROGRESS_JOURNAL_PATH", str(Path(_TMP_DIR) / "progress.journal"))
+os.environ.setdefault("SQLITE_PATH", str(Path(_TMP_DIR) / "bench.db"))
+os.environ.setdefault("CONTENT_RELOAD_INTERVAL", "0")
+
+import httpx  # noqa: E402
+
+from app.core.database import db  # noqa: E402
+from app.core.local_supabase import LocalSupabase  # noqa: E402
+
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+BENCHMARKED_MODULES = ("app.api.lessons", "app.api.users")
+
+# Rotas que dependem do Supabase Auth (sem equivalente local)
+SKIPPED_ROUTES = {
+    ("POST", "/users/register"): "requer Supabase Auth",
+    ("POST", "/users/login"): "requer Supabase Auth",
+    ("GET", "/users/me"): "requer access token do Supabase Auth",
+}
+
+
+class Context(NamedTuple):
+    """Dados semeados que os cenários usam para montar as requisições"""
+    user_ids: List[str]
+    lesson_ids: List[int]
+    lesson_xp: Dict[int, int]
+    mission_ids: List[str]
+    code_exercise: Tuple[int, int, str]  # (lição, índice, solução)
+
+
+class Request(NamedTuple):
+    url: str
+    json: Any = None
+
+
+# Cenário: (contexto, tamanho do payload ou None, rng) -> requisição
+Scenario = Callable[[Context, Optional[int], random.Random], Request]
+
+
+class Route(NamedTuple):
+    method: str
+    path: str
+    scenario: Scenario
+    sized: bool = False  # True se o payload varia com --payload-sizes
+
+
+def _progress_item(ctx: Context, rng: random.Random) -> Dict[str, Any]:
+    lesson_id = rng.choice(ctx.lesson_ids)
+    return {
+        "user_id": rng.choice(ctx.user_ids),
+        "lesson_id": lesson_id,
+        "xp_earned": ctx.lesson_xp[lesson_id],
+        "completed": True,
+        "time_spent": rng.randint(30, 600),
+    }
+
+
+def _grade_answer(ctx: Context, size: Optional[int]) -> str:
+    """Solução correta, com comentário de preenchimento até ~size caracteres"""
+    solution = ctx.code_exercise[2]
+    padding = max(0, min(size or 0, 3900) - len(solution))
+    return solution + (" // " + "x" * padding if padding else "")
+
+
+ROUTES: List[Route] = [
+    # Catálogo
+    Route("GET", "/api/missions", lambda c, s, r: Request("/api/missions")),
+    Route("GET", "/api/missions/{mission_id}",
+          lambda c, s, r: Request(f"/api/missions/{r.choice(c.mission_ids)}")),
+    Route("GET", "/api/missions/{mission_id}/lessons",
+          lambda c, s, r: Request(f"/api/missions/{r.choice(c.mission_ids)}/lessons")),
+    Route("GET", "/api/lessons/{lesson_id}",
+          lambda c, s, r: Request(f"/api/lessons/{r.choice(c.lesson_ids)}")),
+    Route("GET", "/api/lessons/{lesson_id}/next",
+          lambda c, s, r: Request(
+              f"/api/lessons/{c.lesson_ids[0]}/next?mission_id={c.mission_ids[0]}")),
+    Route("GET", "/api/lessons/{lesson_id}/previous",
+          lambda c, s, r: Request(
+              f"/api/lessons/{c.lesson_ids[1]}/previous?mission_id={c.mission_ids[0]}")),
+    Route("POST", "/api/lessons/{lesson_id}/exercises/{exercise_index}/grade",
+          lambda c, s, r: Request(
+              f"/api/lessons/{c.code_exercise[0]}/exercises/{c.code_exercise[1]}/grade",
+              {"answer": _grade_answer(c, s)}),
+          sized=True),
+    # Progresso
+    Route("GET", "/api/progress/{user_id}",
+          lambda c, s, r: Request(f"/api/progress/{r.choice(c.user_ids)}")),
+    Route("GET", "/api/progress/{user_id}/unlocked",
+          lambda c, s, r: Request(f"/api/progress/{r.choice(c.user_ids)}/unlocked")),
+    Route("POST", "/api/progress",
+          lambda c, s, r: Request("/api/progress", _progress_item(c, r))),
+    Route("POST", "/api/progress/batch",
+          lambda c, s, r: Request(
+              "/api/progress/batch",
+              {"updates": [_progress_item(c, r) for _ in range(s or 1)]}),
+          sized=True),
+    Route("POST", "/api/progress/reset/{user_id}",
+          lambda c, s, r: Request(f"/api/progress/reset/{r.choice(c.user_ids)}")),
+    # Leaderboard
+    Route("GET", "/api/leaderboard",
+          lambda c, s, r: Request(f"/api/leaderboard?limit={min(s or 10, 100)}"),
+          sized=True),
+    Route("GET", "/api/leaderboard/{user_id}/rank",
+          lambda c, s, r: Request(f"/api/leaderboard/{r.choice(c.user_ids)}/rank")),
+    Route("GET", "/api/leaderboard/{user_id}/around",
+          lambda c, s, r: Request(f"/api/leaderboard/{r.choice(c.user_ids)}/around")),
+    Route("GET", "/api/bootstrap/{user_id}",
+          lambda c, s, r: Request(f"/api/bootstrap/{r.choice(c.user_ids)}")),
+    Route("GET", "/api/health", lambda c, s, r: Request("/api/health")),
+    # Usuários
+    Route("GET", "/users/{user_id}",
+          lambda c, s, r: Request(f"/users/{r.choice(c.user_ids)}")),
+    Route("POST", "/users/{user_id}/add-xp",
+          lambda c, s, r: Request(
+              f"/users/{r.choice(c.user_ids)}/add-xp?xp_earned=10&coins_earned=1")),
+    Route("GET", "/users/check/connection",
+          lambda c, s, r: Request("/users/check/connection")),
+    Route("GET", "/users/check/cache", lambda c, s, r: Request("/users/check/cache")),
+    Route("POST", "/users/manual-create",
+          lambda c, s, r: Request(
+              f"/users/manual-create?username=bench{r.randrange(10**9)}"
+              f"&email=bench{r.randrange(10**9)}@example.com")),
+]
+
+
+# ============================================
+# DADOS E APP
+# ============================================
+
+def seed(local: LocalSupabase, users: int, progress_per_user: int, rng: random.Random) -> None:
+    """Popula users e user_progress no backend de armazenamento ativo"""
+    user_rows = [
+        {
+            "id": f"user-{i}",
+            "username": f"player{i}",
+            "email": f"player{i}@example.com",
+            "xp": rng.randint(0, 50_000),
+            "coins": 0,
+            "level": 1,
+            "streak_days": rng.randint(0, 30),
+            "is_premium": False,
+        }
+        for i in range(users)
+    ]
+    from app.services.lesson_service import lesson_service
+
+    lesson_ids = [
+        lesson_id
+        for mission_id in lesson_service.index.mission_ids
+        for lesson_id in lesson_service.index.lesson_ids(mission_id)
+    ]
+    count = min(progress_per_user, len(lesson_ids))
+    progress_rows = [
+        {
+            "user_id": f"user-{i}",
+            "lesson_id": lesson_id,
+            "completed": True,
+            "xp_earned": 10,
+            "time_spent": 120,
+            "completed_at": None,
+        }
+        for i in range(users)
+        for lesson_id in lesson_ids[:count]
+    ]
+
+    from app.repositories import repositories
+
+    if repositories.name == "sqlite":
+        from app.repositories.sqlite import SQL_UPSERT_PROGRESS, PROGRESS_COLUMNS, USER_COLUMNS
+
+        insert_users = (
+            f"INSERT OR REPLACE INTO users ({', '.join(USER_COLUMNS)}) "
+            f"VALUES ({', '.join('?' * len(USER_COLUMNS))})"
+        )
+
+        def write(conn):
+            conn.executemany(insert_users, [
+                tuple(row.get(c) for c in USER_COLUMNS) for row in user_rows
+            ])
+            conn.executemany(SQL_UPSERT_PROGRESS, [
+                tuple(row.get(c) for c in PROGRESS_COLUMNS) for row in progress_rows
+            ])
+
+        backend = repositories
+        while hasattr(backend, "inner"):  # coalescing/guarded por fora
+            backend = backend.inner
+        backend.database.write(write)
+    else:
+        local.seed("users", user_rows)
+        local.seed("user_progress", progress_rows)
+
+
+async def build_context(users: int) -> Context:
+    from app.services.lesson_service import lesson_service
+
+    mission_ids = [m.id for m in lesson_service.get_all_missions()]
+    lesson_ids = [
+        lesson_id
+        for mission_id in mission_ids
+        for lesson_id in lesson_service.index.lesson_ids(mission_id)
+    ]
+    lesson_xp = {i: lesson_service.get_lesson_summary(i).xp for i in lesson_ids}
+
+    code_exercise = None
+    for lesson_id in lesson_ids:
+        lesson = await lesson_service.get_lesson(lesson_id)
+        for index, exercise in enumerate(lesson.exercises):
+            if exercise.solution:
+                code_exercise = (lesson_id, index, exercise.solution)
+                break
+        if code_exercise:
+            break
+    if code_exercise is None:
+        raise SystemExit("Nenhum exercício de código no catálogo")
+
+    return Context(
+        user_ids=[f"user-{i}" for i in range(users)],
+        lesson_ids=lesson_ids,
+        lesson_xp=lesson_xp,
+        mission_ids=mission_ids,
+        code_exercise=code_exercise,
+    )
+
+
+def check_coverage(app) -> List[Tuple[str, str]]:
+    """Rotas da API sem cenário de benchmark (nem motivo para pular)"""
+    from fastapi.routing import APIRoute
+
+    known = {(r.method, r.path) for r in ROUTES} | set(SKIPPED_ROUTES)
+    missing = []
+    for route in app.routes:
+        if isinstance(route, APIRoute) and route.endpoint.__module__ in BENCHMARKED_MODULES:
+            for method in route.methods:
+                if (method, route.path) not in known:
+                    missing.append((method, route.path))
+    return missing
+
+
+# ============================================
+# MEDIÇÃO
+# ============================================
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p
+    lower = int(k)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (k - lower)
+
+
+async def bench_route(
+    client: httpx.AsyncClient,
+    route: Route,
+    ctx: Context,
+    size: Optional[int],
+    concurrency: int,
+    total: int,
+    warmup: int,
+    rng: random.Random,
+) -> Dict[str, Any]:
+    """Roda total requisições da rota com concurrency workers"""
+    requests = [route.scenario(ctx, size, rng) for _ in range(total + warmup)]
+    for req in requests[:warmup]:
+        await client.request(route.method, req.url, json=req.json)
+
+    latencies: List[float] = []
+    statuses: Dict[int, int] = {}
+    queue = iter(requests[warmup:])
+
+    async def worker():
+        for req in queue:
+            start = time.perf_counter()
+            response = await client.request(route.method, req.url, json=req.json)
+            latencies.append(time.perf_counter() - start)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    ms = [v * 1000 for v in latencies]
+    return {
+        "route": f"{route.method} {route.path}",
+        "method": route.method,
+        "path": route.path,
+        "concurrency": concurrency,
+        "payload_size": size,
+        "requests": len(latencies),
+        "errors": sum(n for code, n in statuses.items() if code >= 400),
+        "statuses": {str(code): n for code, n in sorted(statuses.items())},
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(ms, 0.50), 3),
+            "p95": round(percentile(ms, 0.95), 3),
+            "p99": round(percentile(ms, 0.99), 3),
+            "mean": round(sum(ms) / len(ms), 3) if ms else 0.0,
+            "max": round(ms[-1], 3) if ms else 0.0,
+        },
+    }
+
+
+def result_key(result: Dict[str, Any]) -> Tuple[str, int, Optional[int]]:
+    return (result["route"], result["concurrency"], result["payload_size"])
+
+
+def compare(current: List[Dict[str, Any]], baseline_path: Path, max_regression: float) -> bool:
+    """Imprime a variação de p95 contra a execução base; False se regrediu"""
+    baseline = {
+        result_key(r): r for r in json.loads(baseline_path.read_text())["results"]
+    }
+    ok = True
+    print(f"\nComparação com {baseline_path} (p95, limite +{max_regression:.0%}):")
+    for result in current:
+        before = baseline.get(result_key(result))
+        if before is None:
+            continue
+        old, new = before["latency_ms"]["p95"], result["latency_ms"]["p95"]
+        change = (new - old) / old if old else 0.0
+        flag = ""
+        if change > max_regression:
+            flag = "  ⚠️ REGRESSÃO"
+            ok = False
+        print(f"  {_label(result):<72} {old:>9.3f} -> {new:>9.3f} ms ({change:+.1%}){flag}")
+    return ok
+
+
+def _label(result: Dict[str, Any]) -> str:
+    label = f"{result['route']} c={result['concurrency']}"
+    if result["payload_size"] is not None:
+        label += f" n={result['payload_size']}"
+    return label
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# ============================================
+# EXECUÇÃO
+# ============================================
+
+def _int_list(value: str) -> List[int]:
+    return [int(v) for v in value.split(",") if v.strip()]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark em processo da API DAXVengers")
+    parser.add_argument("--requests", type=int, default=500,
+                        help="requisições medidas por rota/configuração (padrão: 500)")
+    parser.add_argument("--warmup", type=int, default=20,
+                        help="requisições de aquecimento descartadas (padrão: 20)")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 16],
+                        help="níveis de concorrência, separados por vírgula (padrão: 1,16)")
+    parser.add_argument("--payload-sizes", type=_int_list, default=[1, 50, 500],
+                        help="tamanhos de payload para rotas que variam: itens do lote de "
+                             "progresso, limit do leaderboard, caracteres da resposta "
+                             "(padrão: 1,50,500)")
+    parser.add_argument("--users", type=int, default=10_000,
+                        help="usuários semeados no banco local (padrão: 10000)")
+    parser.add_argument("--progress-per-user", type=int, default=3,
+                        help="lições completadas semeadas por usuário (padrão: 3)")
+    parser.add_argument("--route", default=None,
+                        help="regex para filtrar rotas (ex: 'leaderboard|progress')")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, default=None,
+                        help="arquivo JSON de saída (padrão: benchmarks/results/<data>.json)")
+    parser.add_argument("--compare", type=Path, default=None,
+                        help="JSON de uma execução anterior para comparar")
+    parser.add_argument("--max-regression", type=float, default=0.20,
+                        help="piora máxima aceita no p95 com --compare (padrão: 0.20)")
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> int:
+    rng = random.Random(args.seed)
+    local = LocalSupabase()
+    db.use_transport(local)
+    seed(local, args.users, args.progress_per_user, rng)
+
+    from app.main import app
+
+    missing = check_coverage(app)
+    if missing:
+        for method, path in missing:
+            print(f"⚠️ Rota sem cenário de benchmark: {method} {path}")
+
+    ctx = await build_context(args.users)
+    pattern = re.compile(args.route) if args.route else None
+    routes = [r for r in ROUTES if pattern is None or pattern.search(f"{r.method} {r.path}")]
+
+    results: List[Dict[str, Any]] = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for route in routes:
+                for size in (args.payload_sizes if route.sized else [None]):
+                    for concurrency in args.concurrency:
+                        result = await bench_route(
+                            client, route, ctx, size, concurrency,
+                            args.requests, args.warmup, rng,
+                        )
+                        results.append(result)
+                        latency = result["latency_ms"]
+                        print(
+                            f"{_label(result):<72} {result['throughput_rps']:>9.1f} req/s  "
+                            f"p50 {latency['p50']:>8.3f}  p95 {latency['p95']:>8.3f}  "
+                            f"p99 {latency['p99']:>8.3f} ms"
+                            + (f"  ({result['errors']} erros)" if result["errors"] else "")
+                        )
+
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "meta": {
+            "timestamp": datetime.now().isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "payload_sizes": args.payload_sizes,
+            "users": args.users,
+            "progress_per_user": args.progress_per_user,
+            "seed": args.seed,
+            "storage": os.getenv("STORAGE_BACKEND", "supabase"),
+            "skipped": [
+                {"route": f"{method} {path}", "reason": reason}
+                for (method, path), reason in SKIPPED_ROUTES.items()
+            ],
+        },
+        "results": results,
+    }, indent=2, ensure_ascii=False))
+    print(f"\n💾 Resultados salvos em {output}")
+
+    if args.compare and not compare(results, args.compare, args.max_regression):
+        return 1
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    return asyncio.run(run(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
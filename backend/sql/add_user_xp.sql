@@ -0,0 +1,23 @@
+-- Incremento atômico de XP/moedas com cálculo de nível no servidor.
+-- Substitui o SELECT + UPDATE feito pela API: uma única ida ao banco,
+-- sem perder atualizações concorrentes.
+--
+-- Chamada via PostgREST: POST /rest/v1/rpc/add_user_xp
+--   {"p_user_id": "...", "p_xp": 100, "p_coins": 10}
+
+create or replace function public.add_user_xp(
+    p_user_id uuid,
+    p_xp integer,
+    p_coins integer default 0
+)
+returns setof public.users
+language sql
+volatile
+as $$
+    update public.users
+       set xp    = xp + p_xp,
+           coins = coins + p_coins,
+           level = greatest(1, (xp + p_xp) / 1000 + 1)
+     where id = p_user_id
+ returning *;
+$$;
@@ -0,0 +1,27 @@
+-- Upsert em lote do progresso, monotônico na conclusão.
+-- Usado pelo flush do journal de progresso: uma lição já completada
+-- continua completada (e com a data da primeira conclusão) mesmo que
+-- um lote posterior traga completed = false para a mesma lição.
+-- time_spent fica com o último valor informado (null não apaga o anterior),
+-- a mesma regra que o journal usa ao coalescer a fila.
+--
+-- Chamada via PostgREST: POST /rest/v1/rpc/upsert_user_progress
+--   {"p_rows": [{"user_id": "...", "lesson_id": 1, "completed": true,
+--                "xp_earned": 50, "time_spent": 180, "completed_at": "..."}]}
+
+create or replace function public.upsert_user_progress(p_rows jsonb)
+returns void
+language sql
+volatile
+as $$
+    insert into public.user_progress as p
+           (user_id, lesson_id, completed, xp_earned, time_spent, completed_at)
+    select user_id, lesson_id, completed, xp_earned, time_spent, completed_at
+      from jsonb_populate_recordset(null::public.user_progress, p_rows)
+        on conflict (user_id, lesson_id) do update
+       set completed    = p.completed or excluded.completed,
+           xp_earned    = greatest(p.xp_earned, excluded.xp_earned),
+           time_spent   = coalesce(excluded.time_spent, p.time_spent),
+           completed_at = case when p.completed then p.completed_at
+                               else excluded.completed_at end;
+$$;
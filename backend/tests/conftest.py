@@ -0,0 +1,21 @@
+"""
+Configuração comum dos testes
+
+Os singletons (journal de progresso, índice de conteúdo) leem o caminho
+do ambiente na importação: aponta tudo para um diretório temporário
+antes de importar o app, para os testes nunca tocarem em backend/data.
+
+    cd backend && python -m pytest -q
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+_TMP = Path(tempfile.mkdtemp(prefix="daxvengers-tests-"))
+os.environ.setdefault("PROGRESS_JOURNAL_PATH", str(_TMP / "progress.journal"))
+os.environ.setdefault("CONTENT_INDEX_PATH", str(_TMP / "content-index.json"))
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
@@ -0,0 +1,67 @@
+"""Verificação local de access tokens (HS256)"""
+
+import asyncio
+import base64
+import time
+
+import pytest
+from jose import jwt
+
+from app.core.auth import AuthError, SigningKeys, TokenVerifier
+
+SECRET = "segredo-de-teste"
+
+
+def _verifier(**kwargs) -> TokenVerifier:
+    keys = SigningKeys("http://jwks.invalid/.well-known/jwks.json", secret=SECRET)
+    return TokenVerifier(keys, audience="authenticated", **kwargs)
+
+
+def _token(secret: str = SECRET, **claims) -> str:
+    payload = {"sub": "u1", "aud": "authenticated", "exp": int(time.time()) + 600, **claims}
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+def test_valid_token_returns_claims_and_is_cached():
+    verifier = _verifier()
+    token = _token(email="a@b.c")
+    claims = asyncio.run(verifier.verify(token))
+    assert claims["sub"] == "u1" and claims["email"] == "a@b.c"
+    assert len(verifier.cache) == 1
+    assert asyncio.run(verifier.verify(token)) == claims
+    assert verifier.cache.hits == 1
+
+
+@pytest.mark.parametrize("token", [
+    _token(secret="outro-segredo"),
+    _token(exp=int(time.time()) - 3600),
+    _token(aud="anon"),
+    "nao-e-um-jwt",
+])
+def test_invalid_tokens_are_rejected(token):
+    verifier = _verifier()
+    with pytest.raises(AuthError):
+        asyncio.run(verifier.verify(token))
+    assert len(verifier.cache) == 0
+
+
+def test_unsigned_token_is_rejected():
+    # Mesmo payload, com alg=none e sem assinatura
+    _, payload, _ = _token().split(".")
+    header = base64.urlsafe_b64encode(b'{"alg":"none","typ":"JWT"}').rstrip(b"=").decode()
+    with pytest.raises(AuthError):
+        asyncio.run(_verifier().verify(f"{header}.{payload}."))
+
+
+def test_hs256_without_secret_is_rejected():
+    keys = SigningKeys("http://jwks.invalid/.well-known/jwks.json", secret="")
+    with pytest.raises(AuthError, match="SUPABASE_JWT_SECRET"):
+        asyncio.run(TokenVerifier(keys).verify(_token()))
+
+
+def test_issuer_is_checked_when_configured():
+    verifier = _verifier(issuer="https://projeto.supabase.co/auth/v1")
+    with pytest.raises(AuthError):
+        asyncio.run(verifier.verify(_token(iss="https://outro.supabase.co/auth/v1")))
+    claims = asyncio.run(verifier.verify(_token(iss="https://projeto.supabase.co/auth/v1")))
+    assert claims["sub"] == "u1"
@@ -0,0 +1,66 @@
+"""TTLCache: expiração, LRU e gravações de read-through por geração"""
+
+from app.core import cache as cache_module
+from app.core.cache import TTLCache
+
+
+def test_read_through_is_skipped_after_a_write():
+    cache = TTLCache(maxsize=10, ttl=60)
+    generation = cache.generation()
+    cache.set("u1", "novo")  # escrita durante a leitura
+    assert cache.set("u1", "antigo", generation=generation) is False
+    assert cache.get("u1") == "novo"
+
+
+def test_read_through_is_skipped_after_invalidate_and_clear():
+    cache = TTLCache(maxsize=10, ttl=60)
+    generation = cache.generation()
+    cache.invalidate("u1")
+    assert cache.set("u1", "antigo", generation=generation) is False
+
+    generation = cache.generation()
+    cache.clear()
+    assert cache.set("u2", "antigo", generation=generation) is False
+
+
+def test_writes_to_other_keys_do_not_block_read_through():
+    cache = TTLCache(maxsize=10, ttl=60)
+    generation = cache.generation()
+    cache.set("outro", 1)
+    assert cache.set("u1", "lido", generation=generation) is True
+    assert cache.get("u1") == "lido"
+
+
+def test_forgotten_writes_still_block_older_reads():
+    cache = TTLCache(maxsize=2, ttl=60)
+    generation = cache.generation()
+    cache.invalidate("u1")
+    # u1 sai do registro de escritas, mas continua "escrita depois" da geração
+    cache.invalidate("a")
+    cache.invalidate("b")
+    assert cache.set("u1", "antigo", generation=generation) is False
+
+
+def test_expired_entries_are_served_only_as_stale(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl=1, stale_ttl=5)
+    cache.set("k", "v")
+
+    now[0] += 2
+    assert cache.get("k") is None
+    assert cache.get_stale("k") == "v"
+
+    now[0] += 5
+    assert cache.get_stale("k") is None
+
+
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.evictions == 1
@@ -0,0 +1,73 @@
+"""Correção de exercícios de código DAX"""
+
+import pytest
+
+from app.models.lesson import Exercise
+from app.services.dax_grader import DaxGrader, DaxSyntaxError, normalize, tokenize
+
+SOLUTION = "Receita Total = SUM('Financeiro'[Receita])"
+
+
+def _exercise(solution: str = SOLUTION) -> Exercise:
+    return Exercise(type="code", question="?", solution=solution, explanation="ok")
+
+
+@pytest.mark.parametrize("answer", [
+    "Receita Total = SUM('Financeiro'[Receita])",
+    "receita total := sum(Financeiro[receita])",
+    "Receita Total =\n    SUM ( Financeiro[ Receita ] )  // soma",
+    "Receita Total = /* bloco */ SUM(Financeiro[Receita]) -- fim",
+])
+def test_equivalent_answers_are_accepted(answer):
+    assert DaxGrader().grade(1, 0, _exercise(), answer).correct
+
+
+@pytest.mark.parametrize("answer", [
+    "Receita Total = SUM(Financeiro[Custo])",
+    "Receita Total = AVERAGE(Financeiro[Receita])",
+    "Receita Total = SUM(Financeiro[Receita]) + 1",
+    "",
+])
+def test_different_answers_are_rejected(answer):
+    assert not DaxGrader().grade(1, 0, _exercise(), answer).correct
+
+
+def test_separators_numbers_and_booleans_are_canonical():
+    assert normalize("IF(x; 1000; TRUE())") == normalize("if(X, 1E3, true)")
+    assert normalize("x = 1.50") == normalize("x = 1.5")
+
+
+def test_string_literals_are_case_sensitive():
+    assert normalize('x = "RJ"') != normalize('x = "rj"')
+
+
+def test_quoted_table_with_escaped_quote():
+    assert normalize("SUM('Vendas''s'[Valor])") == normalize("sum('VENDAS''S'[valor])")
+
+
+def test_unknown_character_in_answer_is_a_syntax_error():
+    outcome = DaxGrader().grade(1, 0, _exercise(), "Receita = SUM(Financeiro[Receita]) ¤")
+    assert not outcome.correct
+    assert outcome.syntax_error
+
+
+def test_invalid_reference_solution_falls_back_to_text_comparison():
+    grader = DaxGrader()
+    exercise = _exercise("Total = SUM(Vendas[Valor]) ¤")
+    with pytest.raises(DaxSyntaxError):
+        tokenize(exercise.solution)
+
+    assert grader.grade(7, 0, exercise, "total =  sum(vendas[valor]) ¤").correct
+    assert not grader.grade(7, 0, exercise, "Total = SUM(Vendas[Valor])").correct
+
+
+def test_reference_cache_is_per_exercise_and_cleared_on_reload():
+    grader = DaxGrader()
+    grader.grade(1, 0, _exercise("x = 1"), "x = 1")
+    assert grader.grade(1, 0, _exercise("x = 2"), "x = 1").correct  # referência em cache
+    grader.clear()
+    assert not grader.grade(1, 0, _exercise("x = 2"), "x = 1").correct
+
+
+def test_solution_is_not_serialized():
+    assert "solution" not in _exercise().model_dump_json()
@@ -0,0 +1,72 @@
+"""Skip list indexável e leaderboard em memória"""
+
+import random
+
+from app.services.leaderboard import IndexableSkipList, Leaderboard
+
+
+def test_skip_list_matches_a_sorted_list():
+    rng = random.Random(7)
+    skip = IndexableSkipList()
+    reference = []
+    for step in range(2000):
+        if reference and rng.random() < 0.4:
+            key = reference.pop(rng.randrange(len(reference)))
+            skip.remove(key)
+        else:
+            key = (-rng.randrange(500), step, f"u{step}")
+            skip.insert(key)
+            reference.append(key)
+            reference.sort()
+    assert len(skip) == len(reference)
+    assert list(skip.iter_from(0)) == reference
+    for position, key in enumerate(reference):
+        assert skip.index(key) == position
+    assert list(skip.iter_from(len(reference) // 2)) == reference[len(reference) // 2:]
+    assert skip.index((1, -1, "ausente")) is None
+
+
+def test_from_sorted_builds_the_same_ordering():
+    keys = sorted((-x, i, f"u{i}") for i, x in enumerate([30, 10, 20, 10, 50]))
+    skip = IndexableSkipList.from_sorted(keys)
+    assert list(skip.iter_from(0)) == keys
+    assert [skip.index(k) for k in keys] == list(range(len(keys)))
+
+
+def test_ranking_ties_keep_who_reached_the_xp_first():
+    board = Leaderboard()
+    board.update("a", 100, username="A")
+    board.update("b", 200, username="B")
+    board.update("c", 100, username="C")
+    assert [e.user_id for e in board.top(3)] == ["b", "a", "c"]
+
+    board.update("c", 300)
+    assert board.rank("c") == 1
+    assert [e.user_id for e in board.around("b", radius=1)] == ["c", "b", "a"]
+
+
+def test_completed_lessons_marks_and_reset():
+    board = Leaderboard()
+    board.update("a", 10)
+    version = board.version
+    board.mark_completed("a", 0b1110)
+    assert board.entry("a").completed_lessons == 3
+    board.unmark_completed("a", 0b0110)
+    assert board.entry("a").completed_lessons == 1
+    assert board.version == version + 2
+
+    # Sem mudança real, sem nova versão
+    board.unmark_completed("a", 0b0110)
+    assert board.version == version + 2
+
+
+def test_load_replaces_the_ranking():
+    board = Leaderboard()
+    board.update("velho", 999)
+    board.load(
+        [{"id": "x", "xp": 5, "username": "X"}, {"id": "y", "xp": 50, "username": "Y"}],
+        {"x": 0b10},
+    )
+    assert board.rank("velho") is None
+    assert [e.user_id for e in board.top(10)] == ["y", "x"]
+    assert board.entry("x").completed_lessons == 1
@@ -0,0 +1,65 @@
+"""Grafo de pré-requisitos: fechos transitivos, liberação e validação"""
+
+import random
+
+import pytest
+
+from app.models.lesson import LessonSummary
+from app.services.content_store import ContentError
+from app.services.prerequisite_graph import PrerequisiteGraph, ids_of, mask_of
+
+
+def _lesson(lesson_id, prerequisites=(), mission_id="m1"):
+    return LessonSummary(
+        id=lesson_id, title=f"L{lesson_id}", icon="📘", xp=10,
+        mission_id=mission_id, order=lesson_id, prerequisites=list(prerequisites),
+    )
+
+
+def test_closures_are_transitive():
+    graph = PrerequisiteGraph.build([
+        _lesson(1), _lesson(2, [1]), _lesson(3, [2]), _lesson(4, [1]),
+    ])
+    assert set(ids_of(graph.required(3))) == {1, 2}
+    assert set(ids_of(graph.dependents(1))) == {2, 3, 4}
+    assert graph.is_unlocked(3, mask_of([1, 2]))
+    assert not graph.is_unlocked(3, mask_of([2]))
+
+
+def test_unlocked_across_missions():
+    graph = PrerequisiteGraph.build([
+        _lesson(1), _lesson(2, [1]),
+        _lesson(3, [2], mission_id="m2"), _lesson(4, mission_id="m2"),
+    ])
+    assert set(ids_of(graph.unlocked(0, "m2"))) == {4}
+    assert set(ids_of(graph.unlocked(mask_of([1, 2]), "m2"))) == {3, 4}
+    assert graph.unlocked(0, "inexistente") == 0
+
+
+def test_unlocked_matches_brute_force_on_random_dags():
+    rng = random.Random(3)
+    for _ in range(50):
+        lessons = [
+            _lesson(i, rng.sample(range(1, i), rng.randint(0, min(3, i - 1))),
+                    mission_id=rng.choice(["a", "b"]))
+            for i in range(1, 25)
+        ]
+        graph = PrerequisiteGraph.build(lessons)
+        completed = mask_of(rng.sample(range(1, 25), rng.randint(0, 24)))
+        for mission in ("a", "b", None):
+            expected = {
+                lesson.id for lesson in lessons
+                if mission in (None, lesson.mission_id)
+                and not graph.required(lesson.id) & ~completed
+            }
+            assert set(ids_of(graph.unlocked(completed, mission))) == expected
+
+
+def test_missing_prerequisite_is_a_content_error():
+    with pytest.raises(ContentError, match="inexistentes"):
+        PrerequisiteGraph.build([_lesson(1, [9])])
+
+
+def test_cycle_is_a_content_error():
+    with pytest.raises(ContentError, match="Ciclo"):
+        PrerequisiteGraph.build([_lesson(1, [3]), _lesson(2, [1]), _lesson(3, [2]), _lesson(4)])
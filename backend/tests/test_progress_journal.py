@@ -0,0 +1,190 @@
+"""Journal de progresso: replay após queda, flush em lote, falhas e reset"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.models.lesson import ProgressUpdate
+from app.repositories.sqlite import SQLiteRepositories
+from app.services import progress_journal as journal_module
+from app.services.progress_journal import ProgressJournal
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    repos = SQLiteRepositories(tmp_path / "progress.db")
+    monkeypatch.setattr(journal_module, "repositories", repos)
+    yield repos
+    asyncio.run(repos.close())
+
+
+def _journal(tmp_path) -> ProgressJournal:
+    return ProgressJournal(tmp_path / "progress.journal", batch_size=100, flush_interval=60)
+
+
+def _update(
+    lesson_id: int, completed: bool = True, user_id: str = "u1", time_spent=None
+) -> ProgressUpdate:
+    return ProgressUpdate(
+        user_id=user_id, lesson_id=lesson_id, completed=completed, xp_earned=10,
+        time_spent=time_spent,
+    )
+
+
+def _lines(path):
+    return [json.loads(line) for line in path.read_text().splitlines() if line.strip()]
+
+
+def test_replay_after_crash_recovers_journal_and_interrupted_flush(tmp_path, storage):
+    journal = _journal(tmp_path)
+
+    async def before_crash():
+        await journal.record_many([_update(1), _update(2)])
+        # Queda no meio de um flush: o lote rotacionado ficou em .flushing
+        journal._rotate()
+        await journal.record(_update(3))
+        journal._close_file()
+
+    asyncio.run(before_crash())
+    assert journal.flushing_path.exists()
+    # Última linha truncada pela queda
+    with open(journal.path, "a", encoding="utf-8") as f:
+        f.write('{"user_id": "u1", "lesson_')
+
+    restarted = _journal(tmp_path)
+    assert restarted.replay() == 3
+    assert not restarted.flushing_path.exists()
+    assert sorted(e["lesson_id"] for e in _lines(restarted.path)) == [1, 2, 3]
+
+    assert asyncio.run(restarted.flush()) == 3
+    ids = asyncio.run(storage.progress.completed_lesson_ids("u1"))
+    assert sorted(ids) == [1, 2, 3]
+    assert not restarted.path.exists() and not restarted.flushing_path.exists()
+
+
+def test_completion_is_monotonic_across_batches(tmp_path, storage):
+    journal = _journal(tmp_path)
+
+    async def scenario():
+        await journal.record(_update(1, completed=True))
+        await journal.flush()
+        await journal.record(_update(1, completed=False))
+        await journal.flush()
+        return await storage.progress.completed_lesson_ids("u1")
+
+    assert asyncio.run(scenario()) == [1]
+
+
+def test_time_spent_does_not_depend_on_flush_timing(tmp_path, storage):
+    def stored(lesson_id):
+        return storage.database.read(lambda conn: conn.execute(
+            "SELECT time_spent FROM user_progress WHERE lesson_id = ?", (lesson_id,)
+        ).fetchone()[0])
+
+    times = [30, 45, None]
+
+    async def scenario():
+        journal = _journal(tmp_path)
+        # Lição 1: tudo num lote; lição 2: um flush por atualização
+        for seconds in times:
+            await journal.record(_update(1, time_spent=seconds))
+        await journal.flush()
+        for seconds in times:
+            await journal.record(_update(2, time_spent=seconds))
+            await journal.flush()
+        await journal.close()
+
+    asyncio.run(scenario())
+    assert stored(1) == stored(2) == 45
+
+
+def test_failed_flush_keeps_updates_pending_and_journaled(tmp_path, storage, monkeypatch):
+    journal = _journal(tmp_path)
+
+    async def failing(rows):
+        raise ConnectionError("banco fora")
+
+    async def scenario():
+        await journal.record(_update(1))
+        monkeypatch.setattr(journal, "_write_batch", failing)
+        assert await journal.flush() == 0
+        assert journal.pending == 1
+        assert [e["lesson_id"] for e in journal.pending_for("u1")] == [1]
+        journal._close_file()
+
+    asyncio.run(scenario())
+    # O lote fica no .flushing até a próxima rotação juntá-lo ao journal
+    assert [e["lesson_id"] for e in _lines(journal.flushing_path)] == [1]
+    assert not journal.path.exists()
+
+
+def test_cancelled_flush_is_not_lost_on_close(tmp_path, storage, monkeypatch):
+    journal = _journal(tmp_path)
+    write_batch = journal._write_batch
+    started = asyncio.Event()
+
+    async def hanging(rows):
+        started.set()
+        await asyncio.sleep(60)
+
+    async def scenario():
+        await journal.record(_update(1))
+        monkeypatch.setattr(journal, "_write_batch", hanging)
+        flusher = asyncio.create_task(journal.flush())
+        await started.wait()
+        await journal.record(_update(2))
+        # Desligamento no meio do envio
+        flusher.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await flusher
+        assert journal.pending == 2
+
+        # A próxima rotação junta o journal ao .flushing em vez de sobrescrevê-lo
+        await journal.record(_update(3))
+        journal._rotate()
+        assert sorted(e["lesson_id"] for e in _lines(journal.flushing_path)) == [1, 2, 3]
+
+        monkeypatch.setattr(journal, "_write_batch", write_batch)
+        await journal.close()
+
+    asyncio.run(scenario())
+    ids = asyncio.run(storage.progress.completed_lesson_ids("u1"))
+    assert sorted(ids) == [1, 2, 3]
+    assert not journal.path.exists() and not journal.flushing_path.exists()
+
+
+def test_pending_for_includes_the_batch_being_flushed(tmp_path, storage, monkeypatch):
+    journal = _journal(tmp_path)
+    seen = []
+
+    async def slow_write(rows):
+        # Durante o envio o lote já saiu da fila, mas ainda não está no banco
+        seen.extend(e["lesson_id"] for e in journal.pending_for("u1"))
+
+    monkeypatch.setattr(journal, "_write_batch", slow_write)
+
+    async def scenario():
+        await journal.record(_update(4))
+        await journal.flush()
+
+    asyncio.run(scenario())
+    assert seen == [4]
+
+
+def test_reset_deletes_rows_and_drops_pending_lines(tmp_path, storage):
+    journal = _journal(tmp_path)
+
+    async def scenario():
+        await journal.record_many([_update(1), _update(2)])
+        await journal.flush()
+        await journal.record_many([_update(3), _update(1, user_id="u2")])
+        deleted = await journal.reset("u1", [1, 2, 3])
+        journal._close_file()
+        return deleted
+
+    assert asyncio.run(scenario()) == 2
+    assert asyncio.run(storage.progress.completed_lesson_ids("u1")) == []
+    # O que era de outro usuário continua na fila e no arquivo
+    assert [(e["user_id"], e["lesson_id"]) for e in _lines(journal.path)] == [("u2", 1)]
+    assert journal.pending_for("u1") == []
@@ -0,0 +1,67 @@
+"""Repositórios de progresso: mesmo contrato no Supabase (LocalSupabase) e no SQLite"""
+
+import asyncio
+
+import pytest
+
+from app.core.database import db
+from app.core.local_supabase import LocalSupabase
+from app.repositories.sqlite import SQLiteRepositories
+from app.repositories.supabase import SupabaseRepositories
+
+
+@pytest.fixture(params=["supabase", "sqlite"])
+def repos(request, tmp_path):
+    if request.param == "supabase":
+        db.use_transport(LocalSupabase())
+        yield SupabaseRepositories()
+        asyncio.run(db.close())
+    else:
+        repos = SQLiteRepositories(tmp_path / "repos.db")
+        yield repos
+        asyncio.run(repos.close())
+
+
+def _row(lesson_id, completed, xp=10, completed_at=None, user_id="u1", time_spent=30):
+    return {
+        "user_id": user_id, "lesson_id": lesson_id, "completed": completed,
+        "xp_earned": xp, "time_spent": time_spent, "completed_at": completed_at,
+    }
+
+
+def test_upsert_is_monotonic(repos):
+    async def scenario():
+        await repos.progress.upsert_many([_row(1, True, 20, "2025-01-01T10:00:00")])
+        await repos.progress.upsert_many([_row(1, False, 5), _row(2, False)])
+        return await repos.progress.completed_lesson_ids("u1")
+
+    assert sorted(asyncio.run(scenario())) == [1]
+
+
+def test_delete_only_touches_the_given_user_and_lessons(repos):
+    async def scenario():
+        await repos.progress.upsert_many([
+            _row(1, True), _row(2, True), _row(3, True), _row(1, True, user_id="u2"),
+        ])
+        deleted = await repos.progress.delete("u1", [1, 2, 9])
+        return (
+            deleted,
+            await repos.progress.completed_lesson_ids("u1"),
+            await repos.progress.completed_lesson_ids("u2"),
+        )
+
+    deleted, remaining, other = asyncio.run(scenario())
+    assert deleted == 2
+    assert remaining == [3]
+    assert other == [1]
+
+
+def test_repositories_can_be_reused_after_close(repos):
+    # Um segundo lifespan (ex: reload, testes) reabre os recursos fechados
+    async def scenario():
+        await repos.progress.upsert_many([_row(1, True)])
+        await repos.close()
+        await repos.progress.upsert_many([_row(2, True)])
+        return await repos.progress.completed_lesson_ids("u1")
+
+    assert sorted(asyncio.run(scenario())) == [1, 2]
@@ -0,0 +1,142 @@
+"""Circuit breaker e guarded_call"""
+
+import asyncio
+
+import pytest
+
+from app.core import resilience
+from app.core.resilience import (
+    CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, UpstreamUnavailable,
+    guarded_call,
+)
+
+
+class Clock:
+    """time.monotonic controlado pelo teste"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+
+def test_opens_after_threshold_and_rejects(clock):
+    breaker = CircuitBreaker("test.open", failure_threshold=3, reset_timeout=30)
+    for _ in range(3):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == OPEN
+
+    with pytest.raises(CircuitOpenError) as info:
+        breaker.before_call()
+    assert info.value.retry_after == pytest.approx(30)
+
+
+def test_success_resets_failure_count(clock):
+    breaker = CircuitBreaker("test.reset", failure_threshold=2)
+    breaker.before_call()
+    breaker.record_failure()
+    breaker.before_call()
+    breaker.record_success()
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == CLOSED
+
+
+def test_half_open_allows_a_single_probe(clock):
+    breaker = CircuitBreaker("test.probe", failure_threshold=1, reset_timeout=10)
+    breaker.before_call()
+    breaker.record_failure()
+
+    clock.now += 10
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+    # Enquanto a sonda não volta, as demais chamadas são recusadas
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    breaker.record_success()
+    assert breaker.state == CLOSED
+    breaker.before_call()
+
+
+def test_failed_probe_reopens(clock):
+    breaker = CircuitBreaker("test.reopen", failure_threshold=1, reset_timeout=10)
+    breaker.before_call()
+    breaker.record_failure()
+
+    clock.now += 10
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_released_probe_frees_the_slot(clock):
+    breaker = CircuitBreaker("test.release", failure_threshold=1, reset_timeout=10)
+    breaker.before_call()
+    breaker.record_failure()
+
+    clock.now += 10
+    breaker.before_call()
+    breaker.release()  # ex: erro de cliente, sem veredito
+    breaker.before_call()
+    assert breaker.state == HALF_OPEN
+
+
+def test_guarded_call_retries_transient_errors(monkeypatch):
+    monkeypatch.setattr(resilience.random, "uniform", lambda a, b: 0)
+    calls = []
+
+    async def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise ConnectionError("reset")
+        return "ok"
+
+    result = asyncio.run(guarded_call("test.retry", flaky, timeout=0, retries=2))
+    assert result == "ok"
+    assert len(calls) == 3
+
+
+def test_guarded_call_times_out_as_upstream_unavailable():
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(UpstreamUnavailable):
+        asyncio.run(guarded_call("test.timeout", slow, timeout=0.01, retries=0))
+
+
+def test_client_errors_are_not_retried_nor_counted():
+    calls = []
+
+    async def bad_request():
+        calls.append(1)
+        raise ValueError("entrada inválida")
+
+    for _ in range(10):
+        with pytest.raises(ValueError):
+            asyncio.run(guarded_call("test.client", bad_request, timeout=0, retries=3))
+    assert len(calls) == 10
+    assert resilience.breaker_for("test.client").state == CLOSED
+
+
+def test_non_idempotent_calls_are_not_retried():
+    calls = []
+
+    async def write():
+        calls.append(1)
+        raise ConnectionError("reset")
+
+    with pytest.raises(UpstreamUnavailable):
+        asyncio.run(guarded_call("test.write", write, timeout=0, retries=3, idempotent=False))
+    assert len(calls) == 1
@@ -0,0 +1,160 @@
+"""Rotas HTTP de ponta a ponta (ASGI em processo, Supabase em memória)"""
+
+import asyncio
+
+import httpx
+import pytest
+
+from app.core.database import db
+from app.core.local_supabase import LocalSupabase
+from app.main import app
+from app.models.lesson import LessonBitmap
+from app.services.prerequisite_graph import mask_of
+
+USERS = [
+    {"id": f"u{i}", "username": f"jogador{i}", "email": f"u{i}@teste.dev", "xp": i * 100,
+     "coins": 0, "level": 1, "streak_days": 0, "is_premium": False}
+    for i in range(1, 4)
+]
+
+
+@pytest.fixture
+def local():
+    local = LocalSupabase()
+    local.seed("users", USERS)
+    db.use_transport(local)
+    return local
+
+
+def _serve(scenario):
+    """Roda scenario(client) dentro do lifespan do app"""
+    async def main():
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://teste") as client:
+                return await scenario(client)
+    return asyncio.run(main())
+
+
+def test_catalog_etag_and_304(local):
+    # Lista completa: grande o bastante para ter variante comprimida
+    path = "/api/missions/dax-basics/lessons"
+
+    async def scenario(client):
+        plain = {"Accept-Encoding": "identity"}
+        first = await client.get(path, headers=plain)
+        again = await client.get(path, headers={**plain, "If-None-Match": first.headers["etag"]})
+        gzipped = await client.get(path, headers={"Accept-Encoding": "gzip"})
+        variant = await client.get(path, headers={
+            "Accept-Encoding": "gzip", "If-None-Match": gzipped.headers["etag"],
+        })
+        return first, again, gzipped, variant
+
+    first, again, gzipped, variant = _serve(scenario)
+    assert first.status_code == 200 and first.json()
+    assert "content-encoding" not in first.headers
+    assert again.status_code == 304 and again.content == b""
+    assert again.headers["etag"] == first.headers["etag"]
+    assert gzipped.headers["content-encoding"] == "gzip"
+    assert gzipped.headers["etag"] != first.headers["etag"]
+    assert gzipped.json() == first.json()
+    assert variant.status_code == 304
+
+
+def test_progress_batch_rejects_items_individually(local):
+    async def scenario(client):
+        response = await client.post("/api/progress/batch", json={"updates": [
+            {"user_id": "u1", "lesson_id": 1, "xp_earned": 10},
+            {"user_id": "u1", "lesson_id": 9999, "xp_earned": 10},
+            {"user_id": "u1", "lesson_id": 2, "xp_earned": 100000},
+            {"user_id": "u1", "lesson_id": 2, "xp_earned": 10},
+        ]})
+        progress = await client.get("/api/progress/u1")
+        return response, progress
+
+    response, progress = _serve(scenario)
+    assert response.status_code == 200
+    body = response.json()
+    assert (body["accepted"], body["rejected"]) == (2, 2)
+    assert [r["status_code"] for r in body["results"] if not r["success"]] == [404, 400]
+    # Aceitos já contam antes do flush do journal
+    assert {1, 2} <= set(progress.json()["completed_lessons"])
+    # O flush do encerramento grava no banco
+    assert {(r["user_id"], r["lesson_id"]) for r in local.tables["user_progress"].values()} \
+        >= {("u1", 1), ("u1", 2)}
+
+
+def test_progress_batch_validates_size(local):
+    async def scenario(client):
+        return await client.post("/api/progress/batch", json={"updates": []})
+
+    assert _serve(scenario).status_code == 422
+
+
+def test_negative_lesson_id_is_rejected(local):
+    update = {"user_id": "u1", "lesson_id": -1, "xp_earned": 10}
+
+    async def scenario(client):
+        single = await client.post("/api/progress", json=update)
+        batch = await client.post("/api/progress/batch", json={"updates": [update]})
+        return single.status_code, batch.status_code
+
+    assert _serve(scenario) == (422, 422)
+
+
+def test_progress_bitmap_format(local):
+    async def scenario(client):
+        await client.post("/api/progress/batch", json={"updates": [
+            {"user_id": "u2", "lesson_id": 1, "xp_earned": 10},
+            {"user_id": "u2", "lesson_id": 3, "xp_earned": 10},
+        ]})
+        listed = await client.get("/api/progress/u2")
+        bitmap = await client.get("/api/progress/u2", params={"format": "bitmap"})
+        return listed.json(), bitmap.json()
+
+    listed, bitmap = _serve(scenario)
+    assert "completed_bitmap" not in listed
+    assert "completed_lessons" not in bitmap
+    assert LessonBitmap(**bitmap["completed_bitmap"]).to_mask() == mask_of(listed["completed_lessons"])
+    assert bitmap["current_lesson"] == listed["current_lesson"]
+
+
+def test_progress_reset_deletes_the_mission_progress(local):
+    async def scenario(client):
+        await client.post("/api/progress/batch", json={"updates": [
+            {"user_id": "u3", "lesson_id": 1, "xp_earned": 10},
+            {"user_id": "u3", "lesson_id": 2, "xp_earned": 10},
+        ]})
+        reset = await client.post("/api/progress/reset/u3")
+        progress = await client.get("/api/progress/u3")
+        rank = await client.get("/api/leaderboard/u3/rank")
+        missing = await client.post("/api/progress/reset/u3", params={"mission_id": "nao-existe"})
+        return reset, progress.json(), rank.json(), missing
+
+    reset, progress, rank, missing = _serve(scenario)
+    assert reset.status_code == 200 and reset.json()["success"]
+    assert progress["completed_lessons"] == []
+    assert rank["completed_lessons"] == 0
+    assert missing.status_code == 404
+    assert not any(r["user_id"] == "u3" for r in local.tables.get("user_progress", {}).values())
+
+
+def test_bootstrap_returns_the_first_paint_in_one_response(local):
+    async def scenario(client):
+        await client.post("/api/progress", json={"user_id": "u2", "lesson_id": 1, "xp_earned": 10})
+        bootstrap = await client.get("/api/bootstrap/u2", params={"limit": 2})
+        missions = await client.get("/api/missions")
+        unknown = await client.get("/api/bootstrap/ninguem")
+        missing = await client.get("/api/bootstrap/u2", params={"mission_id": "nao-existe"})
+        return bootstrap, missions.json(), unknown.json(), missing
+
+    bootstrap, missions, unknown, missing = _serve(scenario)
+    assert bootstrap.status_code == 200
+    body = bootstrap.json()
+    assert body["user"]["id"] == "u2"
+    assert body["missions"] == missions
+    assert 1 in body["progress"]["completed_lessons"]
+    assert [e["user_id"] for e in body["leaderboard"]] == ["u3", "u2"]
+    assert body["rank"]["rank"] == 2
+    assert unknown["user"] is None and unknown["rank"] is None
+    assert missing.status_code == 404
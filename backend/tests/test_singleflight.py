@@ -0,0 +1,136 @@
+"""Single-flight: coalescência, invalidação por escrita e timeout por chave"""
+
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+from app.repositories.base import Row, UserRepository
+from app.repositories.coalescing import CoalescingUserRepository
+
+
+def test_concurrent_reads_share_one_call():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "valor"
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("k", load) for _ in range(20)))
+
+    assert asyncio.run(scenario()) == ["valor"] * 20
+    assert len(calls) == 1
+    assert len(flight) == 0
+
+
+def test_errors_are_shared_by_every_waiter():
+    flight = SingleFlight("test")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ConnectionError("fora")
+
+    async def scenario():
+        return await asyncio.gather(
+            *(flight.do("k", fail) for _ in range(3)), return_exceptions=True
+        )
+
+    assert all(isinstance(r, ConnectionError) for r in asyncio.run(scenario()))
+
+
+def test_forget_during_a_read_makes_waiters_read_again():
+    flight = SingleFlight("test")
+    state = {"value": "antigo"}
+    started = None
+    release = None
+
+    async def load():
+        value = state["value"]
+        started.set()
+        await release.wait()
+        return value
+
+    async def scenario():
+        nonlocal started, release
+        started, release = asyncio.Event(), asyncio.Event()
+        reader = asyncio.ensure_future(flight.do("k", load))
+        await started.wait()
+        # Escrita enquanto a leitura está em andamento
+        state["value"] = "novo"
+        flight.forget("k")
+        late = asyncio.ensure_future(flight.do("k", load))
+        release.set()
+        return await reader, await late
+
+    assert asyncio.run(scenario()) == ("novo", "novo")
+
+
+def test_cancelled_waiter_does_not_cancel_the_shared_call():
+    flight = SingleFlight("test")
+
+    async def load():
+        await asyncio.sleep(0.02)
+        return "ok"
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.do("k", load))
+        second = asyncio.ensure_future(flight.do("k", load))
+        await asyncio.sleep(0)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(scenario()) == "ok"
+
+
+def test_timeout_applies_to_the_shared_call():
+    flight = SingleFlight("test")
+
+    async def slow():
+        await asyncio.sleep(1)
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(flight.do("k", slow, timeout=0.01))
+
+
+class SlowUsers(UserRepository):
+    """Leitura lenta controlada pelo teste, escrita imediata"""
+
+    def __init__(self):
+        self.xp = 0
+        self.reads = 0
+        self.gate = None
+
+    async def get(self, user_id: str):
+        self.reads += 1
+        xp = self.xp
+        await self.gate.wait()
+        return {"id": user_id, "xp": xp}
+
+    async def create(self, profile: Row) -> Row:
+        return profile
+
+    async def add_xp(self, user_id: str, xp: int, coins: int = 0):
+        self.xp += xp
+        return {"id": user_id, "xp": self.xp}
+
+    async def count(self) -> int:
+        return 1
+
+
+def test_write_invalidates_a_coalesced_read_in_flight():
+    inner = SlowUsers()
+    users = CoalescingUserRepository(inner, timeout=None)
+
+    async def scenario():
+        inner.gate = asyncio.Event()
+        reader = asyncio.ensure_future(users.get("u1"))
+        await asyncio.sleep(0)
+        await users.add_xp("u1", 50)
+        inner.gate.set()
+        return await reader
+
+    assert asyncio.run(scenario()) == {"id": "u1", "xp": 50}
+    assert inner.reads == 2
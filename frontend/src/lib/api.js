@@ -5,6 +5,17 @@
 
 const API_BASE_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000';
 
+// Access token do Supabase (verificado localmente pelo backend)
+let accessToken = null;
+
+/**
+ * Define o access token enviado como Bearer em todas as requisições
+ * @param {string|null} token - access_token da sessão do Supabase (null no logout)
+ */
+export function setAccessToken(token) {
+  accessToken = token;
+}
+
 /**
  * Helper para fazer requisições HTTP
  */
@@ -14,6 +25,7 @@ async function request(endpoint, options = {}) {
   const config = {
     headers: {
       'Content-Type': 'application/json',
+      ...(accessToken ? { Authorization: `Bearer ${accessToken}` } : {}),
       ...options.headers,
     },
     ...options,
@@ -57,9 +69,10 @@ export const missionsAPI = {
   /**
    * Lista todas as lições de uma missão
    * @param {string} missionId - ID da missão
+   * @param {string} view - 'full' (padrão) ou 'summary' (sem teoria/exercícios)
    */
-  getLessons: async (missionId) => {
-    return await request(`/api/missions/${missionId}/lessons`);
+  getLessons: async (missionId, view = 'full') => {
+    return await request(`/api/missions/${missionId}/lessons?view=${view}`);
   },
 };
 
@@ -84,6 +97,19 @@ export const lessonsAPI = {
   getNext: async (lessonId, missionId) => {
     return await request(`/api/lessons/${lessonId}/next?mission_id=${missionId}`);
   },
+
+  /**
+   * Corrige a resposta de um exercício de código no servidor
+   * @param {number} lessonId - ID da lição
+   * @param {number} exerciseIndex - Posição do exercício na lição
+   * @param {string} answer - Fórmula DAX do aluno
+   */
+  grade: async (lessonId, exerciseIndex, answer) => {
+    return await request(`/api/lessons/${lessonId}/exercises/${exerciseIndex}/grade`, {
+      method: 'POST',
+      body: JSON.stringify({ answer }),
+    });
+  },
 };
 
 // ============================================
@@ -111,6 +137,17 @@ export const progressAPI = {
     });
   },
 
+  /**
+   * Envia várias atualizações de progresso de uma vez (ex: ao reconectar)
+   * @param {Array<Object>} updates - Lista de dados de progresso
+   */
+  saveBatch: async (updates) => {
+    return await request('/api/progress/batch', {
+      method: 'POST',
+      body: JSON.stringify({ updates }),
+    });
+  },
+
   /**
    * Reseta o progresso do usuário em uma missão
    * @param {string} userId - ID do usuário
@@ -137,6 +174,43 @@ export const leaderboardAPI = {
   },
 };
 
+// ============================================
+// API DE BOOTSTRAP (PRIMEIRA TELA)
+// ============================================
+
+export const bootstrapAPI = {
+  /**
+   * Perfil, missões, progresso e ranking do Dashboard numa requisição só
+   * @param {string} userId - ID do usuário
+   * @param {string} missionId - ID da missão do progresso
+   * @param {number} limit - Tamanho do top do ranking
+   */
+  get: async (userId, missionId = 'dax-basics', limit = 10) => {
+    return await request(`/api/bootstrap/${userId}?mission_id=${missionId}&limit=${limit}`);
+  },
+};
+
+// ============================================
+// EVENTOS EM TEMPO REAL (SSE)
+// ============================================
+
+export const eventsAPI = {
+  /**
+   * Abre o stream de eventos do usuário (ranking e XP em tempo real)
+   * @param {string} userId - ID do usuário
+   * @param {Object} handlers - { leaderboard, rank, user } chamados com o JSON de cada evento
+   * @param {number} limit - Tamanho do top acompanhado
+   * @returns {Function} Função que fecha a conexão
+   */
+  subscribe: (userId, handlers = {}, limit = 10) => {
+    const source = new EventSource(`${API_BASE_URL}/api/events/${userId}?limit=${limit}`);
+    for (const [event, handler] of Object.entries(handlers)) {
+      source.addEventListener(event, (e) => handler(JSON.parse(e.data)));
+    }
+    return () => source.close();
+  },
+};
+
 // ============================================
 // API DE HEALTH CHECK
 // ============================================
@@ -159,5 +233,7 @@ export default {
   lessons: lessonsAPI,
   progress: progressAPI,
   leaderboard: leaderboardAPI,
+  bootstrap: bootstrapAPI,
+  events: eventsAPI,
   health: healthAPI,
 };
\ No newline at end of file
@@ -1,5 +1,6 @@
 import { writable } from 'svelte/store'
 import { supabase } from '../supabaseClient.js'
+import { setAccessToken } from '../lib/api.js'
 
 export const user = writable(null)
 export const loading = writable(true)
@@ -10,6 +11,7 @@ export async function checkUser() {
   
   try {
     const { data: { session } } = await supabase.auth.getSession()
+    setAccessToken(session?.access_token ?? null)
     
     if (session) {
       user.set(session.user)
@@ -28,6 +30,7 @@ export async function checkUser() {
 // Escutar mudanças na autenticação
 supabase.auth.onAuthStateChange((event, session) => {
   console.log('Auth event:', event)
+  setAccessToken(session?.access_token ?? null)
   
   if (session) {
     user.set(session.user)
@@ -39,5 +42,6 @@ supabase.auth.onAuthStateChange((event, session) => {
 // Função de logout
 export async function logout() {
   await supabase.auth.signOut()
+  setAccessToken(null)
   user.set(null)
 }
\ No newline at end of file